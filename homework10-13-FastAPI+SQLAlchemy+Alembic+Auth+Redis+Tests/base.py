@@ -1,13 +1,59 @@
+import os
+import time
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, DateTime
+from sqlalchemy import Column, DateTime, LargeBinary
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.types import TypeDecorator
+
+# UUIDv7 растут со временем: новые ключи дописываются в конец индекса
+TIME_ORDERED_UUIDS = os.getenv("TIME_ORDERED_UUIDS", "1") == "1"
+
+
+def uuid7() -> uuid.UUID:
+    """UUID версии 7: 48 бит времени в миллисекундах, остальное - случайные биты"""
+    value = (time.time_ns() // 1_000_000 & 0xFFFF_FFFF_FFFF) << 80
+    value |= int.from_bytes(os.urandom(10), "big")
+    value = value & ~(0xF << 76) | 0x7 << 76  # версия
+    value = value & ~(0x3 << 62) | 0x2 << 62  # вариант RFC 4122
+    return uuid.UUID(int=value)
+
+
+def new_uuid() -> uuid.UUID:
+    return uuid7() if TIME_ORDERED_UUIDS else uuid.uuid4()
+
+
+class BinaryUUID(TypeDecorator):
+    """UUID: нативный тип в PostgreSQL, 16 байт (BLOB) в остальных БД.
+
+    Принимает uuid.UUID или строку, возвращает uuid.UUID.
+    """
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=True))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return value if dialect.name == "postgresql" else value.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        return uuid.UUID(bytes=bytes(value))
+
 
 class Base(DeclarativeBase):
     pass
 
 class BaseModelMixin:
-    uuid = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
+    uuid = Column(BinaryUUID(), primary_key=True, default=new_uuid, nullable=False)
     created_at = Column(DateTime, default=datetime.now, nullable=False)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
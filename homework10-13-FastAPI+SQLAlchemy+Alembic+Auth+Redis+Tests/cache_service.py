@@ -3,11 +3,14 @@ import json
 import pickle
 from typing import Any, Optional
 
+from profiling import timed_cache
+
 class RedisCache:
     def __init__(self, host='localhost', port=6379, db=0, expire_time=300):
         self.redis_client = redis.Redis(host=host, port=port, db=db, decode_responses=True)
         self.expire_time = expire_time
 
+    @timed_cache(count_hits=True)
     def get(self, key: str) -> Optional[Any]:
         """Получение данных из кеша"""
         try:
@@ -18,6 +21,7 @@ class RedisCache:
         except Exception:
             return None
 
+    @timed_cache()
     def set(self, key: str, value: Any) -> bool:
         """Сохранение данных в кеш"""
         try:
@@ -26,6 +30,7 @@ class RedisCache:
         except Exception:
             return False
 
+    @timed_cache()
     def delete(self, key: str) -> bool:
         """Удаление данных из кеша"""
         try:
@@ -34,6 +39,7 @@ class RedisCache:
         except Exception:
             return False
 
+    @timed_cache()
     def delete_pattern(self, pattern: str) -> bool:
         """Удаление данных по паттерну"""
         try:
@@ -44,6 +50,7 @@ class RedisCache:
         except Exception:
             return False
 
+    @timed_cache()
     def clear_all(self) -> bool:
         """Очистка всего кеша"""
         try:
@@ -2,11 +2,14 @@ import pytest
 import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from main import app
-from models import Base
 
 # Настройки для тестов
 TEST_DATABASE_URL = "sqlite:///./test_students.db"
+# Приложение должно работать с тестовой БД, а не с students.sqlite
+os.environ.setdefault("DATABASE_URL", TEST_DATABASE_URL)
+
+from main import app
+from models import Base
 
 
 @pytest.fixture(scope="session")
@@ -1,17 +1,259 @@
 import csv
-from sqlalchemy import create_engine, func, and_
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, func, and_, insert, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import IntegrityError
-from models import Student, Base
+from models import Student, User, Base
 import uuid
 
+# Профиль SQLite, применяемый к каждому новому соединению
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # отрицательное значение - размер в КиБ
+    "busy_timeout": 5000,
+}
+READ_POOL_SIZE = 8
+# Сколько секунд писатель ждет своей очереди на единственное соединение записи
+WRITE_QUEUE_TIMEOUT = 60
+CSV_BATCH_SIZE = 5000
+# Вывод всех SQL-запросов в stdout (для отладки); время запросов собирает profiling.py
+SQL_ECHO = os.getenv("SQL_ECHO", "0") == "1"
+
+logger = logging.getLogger(__name__)
+
+# Основная БД и реплики для чтения (через запятую)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///students.sqlite")
+REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# Как часто перепроверять доступность реплики, секунд
+REPLICA_HEALTH_TTL = 5
+# Сколько секунд после записи клиент читает с основной БД (read-your-writes)
+STICKY_WINDOW = 5
+
+_engines = {}
+_engines_lock = threading.Lock()
+_routers = {}
+_last_writes = {}
+_last_writes_lock = threading.Lock()
+
+
+def is_sqlite_file(db_url: str) -> bool:
+    """Проверка, что URL указывает на файловую БД SQLite"""
+    url = make_url(db_url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def _apply_sqlite_profile(engine, read_only: bool = False):
+    """Установка PRAGMA при каждом подключении к SQLite"""
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            # Режим журнала хранится в файле БД, его переключает только писатель
+            if read_only and name == "journal_mode":
+                continue
+            cursor.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
+def get_engine(db_url: str, read_only: bool = False, echo: bool = SQL_ECHO, create_schema: bool = True):
+    """Возвращает общий для процесса engine для URL и роли (запись/чтение).
+
+    Для файловой SQLite запись идет через единственное соединение: пул из
+    одного соединения работает как очередь писателей. Чтение обслуживает
+    отдельный пул соединений в режиме query_only.
+    """
+    sqlite_file = is_sqlite_file(db_url)
+    if read_only and not sqlite_file:
+        read_only = False
+    key = (db_url, read_only)
+
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is not None:
+            return engine
+
+        if sqlite_file:
+            pool_size = READ_POOL_SIZE if read_only else 1
+            engine = create_engine(
+                db_url,
+                echo=echo,
+                pool_size=pool_size,
+                max_overflow=0,
+                pool_timeout=WRITE_QUEUE_TIMEOUT,
+                connect_args={"check_same_thread": False},
+            )
+            _apply_sqlite_profile(engine, read_only=read_only)
+        else:
+            engine = create_engine(db_url, echo=echo)
+
+        if create_schema and not read_only:
+            Base.metadata.create_all(engine)
+        _engines[key] = engine
+        return engine
+
+
+def mark_client_write(client_id):
+    """Запоминает время последней записи клиента"""
+    if client_id is None:
+        return
+    now = time.monotonic()
+    with _last_writes_lock:
+        _last_writes[client_id] = now
+        # Не даем словарю расти бесконечно
+        if len(_last_writes) > 10000:
+            for key, written_at in list(_last_writes.items()):
+                if now - written_at > STICKY_WINDOW:
+                    del _last_writes[key]
+
+
+def is_client_sticky(client_id) -> bool:
+    """Писал ли клиент недавно (тогда читаем с основной БД)"""
+    if client_id is None:
+        return False
+    written_at = _last_writes.get(client_id)
+    return written_at is not None and time.monotonic() - written_at < STICKY_WINDOW
+
+
+class ReplicaRouter:
+    """Выбор реплики для чтения по кругу с пропуском недоступных"""
+
+    def __init__(self, replica_urls, echo: bool = SQL_ECHO):
+        self.engines = [
+            get_engine(url, read_only=True, echo=echo, create_schema=False)
+            for url in replica_urls
+        ]
+        self._counter = itertools.count()
+        self._health = {}
+        self._lock = threading.Lock()
+
+    def is_healthy(self, engine) -> bool:
+        """Проверка реплики запросом SELECT 1, результат кешируется на REPLICA_HEALTH_TTL"""
+        status = self._health.get(engine)
+        now = time.monotonic()
+        if status is not None and now - status[1] < REPLICA_HEALTH_TTL:
+            return status[0]
+
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            healthy = True
+        except Exception:
+            healthy = False
+        self._health[engine] = (healthy, now)
+        return healthy
+
+    def choose(self):
+        """Следующая доступная реплика или None, если доступных нет"""
+        with self._lock:
+            start = next(self._counter)
+        for offset in range(len(self.engines)):
+            engine = self.engines[(start + offset) % len(self.engines)]
+            if self.is_healthy(engine):
+                return engine
+        return None
+
+
+def get_router(replica_urls, echo: bool = SQL_ECHO) -> ReplicaRouter:
+    """Общий для процесса роутер, чтобы очередность и статусы реплик сохранялись между запросами"""
+    key = tuple(replica_urls)
+    with _engines_lock:
+        router = _routers.get(key)
+    if router is None:
+        router = ReplicaRouter(replica_urls, echo=echo)
+        with _engines_lock:
+            router = _routers.setdefault(key, router)
+    return router
+
+
+def read_students_csv(file):
+    """Чтение записей студентов из CSV; строки с некорректной оценкой пропускаются"""
+    for row in csv.DictReader(file):
+        try:
+            grade = int(row['Оценка'].strip())
+        except ValueError as e:
+            logger.warning("Ошибка преобразования оценки '%s': %s", row['Оценка'], e)
+            continue
+        yield {
+            "surname": row['Фамилия'].strip(),
+            "name": row['Имя'].strip(),
+            "faculty": row['Факультет'].strip(),
+            "course": row['Курс'].strip(),
+            "grade": grade,
+        }
+
 
 class DBManager:
-    def __init__(self, db_url='sqlite:///students.sqlite'):
-        self.engine = create_engine(db_url, echo=True)
-        Base.metadata.create_all(self.engine)
+    def __init__(self, db_url=DATABASE_URL, replica_urls=None, client_id=None, echo=SQL_ECHO):
+        """client_id - ключ клиента для чтения своих записей после записи (read-your-writes)"""
+        if replica_urls is None:
+            replica_urls = REPLICA_URLS
+        self.client_id = client_id
+        self.engine = get_engine(db_url, echo=echo)
+        self.primary_read_engine = get_engine(db_url, read_only=True, echo=echo)
+        self.read_engine = self.primary_read_engine
+        if replica_urls:
+            # Если все реплики недоступны, читаем с основной БД
+            self.read_engine = get_router(replica_urls, echo=echo).choose() or self.primary_read_engine
+
         Session = sessionmaker(bind=self.engine)
         self.session = Session()
+        # expire_on_commit=False: объекты остаются доступны после закрытия транзакции чтения
+        ReadSession = sessionmaker(bind=self.read_engine, expire_on_commit=False)
+        self.read_session = ReadSession()
+        self.primary_read_session = self.read_session
+        if self.read_engine is not self.primary_read_engine:
+            PrimaryReadSession = sessionmaker(bind=self.primary_read_engine, expire_on_commit=False)
+            self.primary_read_session = PrimaryReadSession()
+        self._wrote = False
+
+    def _mark_write(self):
+        """Последующие чтения этого клиента идут в основную БД"""
+        self._wrote = True
+        mark_client_write(self.client_id)
+
+    @contextmanager
+    def _reading(self):
+        """Сессия для чтения; транзакция завершается сразу, чтобы не удерживать снимок WAL"""
+        if self._wrote or is_client_sticky(self.client_id):
+            session = self.primary_read_session
+        else:
+            session = self.read_session
+        try:
+            yield session
+        finally:
+            session.commit()
+
+    @contextmanager
+    def _primary_reading(self):
+        """Чтение с основной БД через пул чтения"""
+        try:
+            yield self.primary_read_session
+        finally:
+            self.primary_read_session.commit()
+
+    def get_user(self, username: str):
+        """Пользователь для авторизации - через пул чтения, соединение записи не занимается.
+
+        Реплика может еще не получить только что созданного пользователя,
+        поэтому при промахе на реплике запрос повторяется на основной БД.
+        """
+        with self._reading() as session:
+            user = session.query(User).filter(User.username == username).first()
+        if user is None and session is not self.primary_read_session:
+            with self._primary_reading() as session:
+                user = session.query(User).filter(User.username == username).first()
+        return user
 
     # CREATE операция
     def create_student(self, surname: str, name: str, faculty: str, course: str, grade: int):
@@ -26,6 +268,7 @@ class DBManager:
             )
             self.session.add(student)
             self.session.commit()
+            self._mark_write()
             return student
         except IntegrityError:
             self.session.rollback()
@@ -37,31 +280,36 @@ class DBManager:
     # READ операции
     def get_all_students(self):
         """Получение всех записей"""
-        return self.session.query(Student).all()
+        with self._reading() as session:
+            return session.query(Student).all()
 
-    def get_student_by_id(self, student_id: str):
+    def get_student_by_id(self, student_id: uuid.UUID):
         """Получение записи по UUID"""
-        return self.session.query(Student).filter(Student.uuid == student_id).first()
+        with self._reading() as session:
+            return session.query(Student).filter(Student.uuid == student_id).first()
 
     def get_students_by_faculty(self, faculty_name: str):
         """Получение записей по факультету"""
-        return self.session.query(Student).filter(Student.faculty == faculty_name).all()
+        with self._reading() as session:
+            return session.query(Student).filter(Student.faculty == faculty_name).all()
 
     def get_unique_courses(self):
         """Получение уникальных предметов"""
-        courses = self.session.query(Student.course).distinct().all()
+        with self._reading() as session:
+            courses = session.query(Student.course).distinct().all()
         return [course[0] for course in courses]
 
     def get_unique_faculties(self):
         """Получение уникальных факультетов"""
-        faculties = self.session.query(Student.faculty).distinct().all()
+        with self._reading() as session:
+            faculties = session.query(Student.faculty).distinct().all()
         return [faculty[0] for faculty in faculties]
 
     # UPDATE операция
-    def update_student(self, student_id: str, **kwargs):
+    def update_student(self, student_id: uuid.UUID, **kwargs):
         """Обновление записи студента"""
         try:
-            student = self.get_student_by_id(student_id)
+            student = self.session.query(Student).filter(Student.uuid == student_id).first()
             if not student:
                 return None
 
@@ -70,21 +318,23 @@ class DBManager:
                     setattr(student, key, value)
 
             self.session.commit()
+            self._mark_write()
             return student
         except Exception as e:
             self.session.rollback()
             raise e
 
     # DELETE операция
-    def delete_student(self, student_id: str):
+    def delete_student(self, student_id: uuid.UUID):
         """Удаление записи студента"""
         try:
-            student = self.get_student_by_id(student_id)
+            student = self.session.query(Student).filter(Student.uuid == student_id).first()
             if not student:
                 return False
 
             self.session.delete(student)
             self.session.commit()
+            self._mark_write()
             return True
         except Exception as e:
             self.session.rollback()
@@ -93,47 +343,65 @@ class DBManager:
     # Аналитические методы
     def get_average_grade_by_faculty(self, faculty_name: str):
         """Средний балл по факультету"""
-        avg_grade = self.session.query(
-            func.avg(Student.grade)
-        ).filter(Student.faculty == faculty_name).scalar()
+        with self._reading() as session:
+            avg_grade = session.query(
+                func.avg(Student.grade)
+            ).filter(Student.faculty == faculty_name).scalar()
         return round(avg_grade, 2) if avg_grade is not None else 0
 
     def get_students_low_grade_by_course(self, course_name: str, max_grade: int = 30):
         """Записи по предмету с оценкой ниже указанной"""
-        return self.session.query(Student).filter(
-            and_(Student.course == course_name, Student.grade < max_grade)
-        ).all()
+        with self._reading() as session:
+            return session.query(Student).filter(
+                and_(Student.course == course_name, Student.grade < max_grade)
+            ).all()
 
     def get_average_grade_by_course(self, course_name: str):
         """Средний балл по предмету"""
-        avg_grade = self.session.query(
-            func.avg(Student.grade)
-        ).filter(Student.course == course_name).scalar()
+        with self._reading() as session:
+            avg_grade = session.query(
+                func.avg(Student.grade)
+            ).filter(Student.course == course_name).scalar()
         return round(avg_grade, 2) if avg_grade is not None else 0
 
+    def get_grade_totals_by_course(self, course_name: str):
+        """Сумма и количество оценок по предмету (для объединения средних между шардами)"""
+        with self._reading() as session:
+            total, count = session.query(
+                func.sum(Student.grade), func.count(Student.grade)
+            ).filter(Student.course == course_name).one()
+        return (total or 0, count)
+
     # Загрузка из CSV
+    def insert_students(self, rows):
+        """Вставка записей пачками, возвращает число записей.
+
+        Каждая пачка - своя транзакция: после коммита соединение записи
+        возвращается в пул, и другие писатели не ждут конца всего импорта.
+        """
+        batch = []
+        inserted = 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= CSV_BATCH_SIZE:
+                inserted += self._insert_batch(batch)
+                batch = []
+
+        if batch:
+            inserted += self._insert_batch(batch)
+        return inserted
+
+    def _insert_batch(self, batch) -> int:
+        self.session.execute(insert(Student), batch)
+        self.session.commit()
+        self._mark_write()
+        return len(batch)
+
     def load_from_csv(self, filename: str = "students.csv"):
         """Загрузка данных из CSV файла"""
         try:
             with open(filename, 'r', encoding='utf-8') as file:
-                csv_reader = csv.DictReader(file)
-
-                for row in csv_reader:
-                    try:
-                        grade = int(row['Оценка'].strip())
-                        student = Student(
-                            surname=row['Фамилия'].strip(),
-                            name=row['Имя'].strip(),
-                            faculty=row['Факультет'].strip(),
-                            course=row['Курс'].strip(),
-                            grade=grade
-                        )
-                        self.session.add(student)
-                    except ValueError as e:
-                        print(f"Ошибка преобразования оценки '{row['Оценка']}': {e}")
-                        continue
-
-                self.session.commit()
+                self.insert_students(read_students_csv(file))
                 return f"Успешно загружено данных из {filename}"
         except FileNotFoundError:
             return f"Файл {filename} не найден"
@@ -145,20 +413,26 @@ class DBManager:
     def delete_students_by_ids(self, student_ids: list):
         """Удаление записей по списку UUID"""
         try:
-            # Преобразуем строки в UUID объекты
-            uuid_list = [uuid.UUID(student_id) for student_id in student_ids]
-
-            deleted_count = self.session.query(Student) \
-                .filter(Student.uuid.in_(uuid_list)) \
-                .delete(synchronize_session=False)
-
-            self.session.commit()
+            deleted_count = self.delete_students_by_ids_count(student_ids)
             return f"Удалено {deleted_count} записей"
         except Exception as e:
             self.session.rollback()
             return f"Ошибка удаления: {str(e)}"
 
-        def close(self):
-            self.session.close()
+    def delete_students_by_ids_count(self, student_ids: list) -> int:
+        """Удаление записей по списку UUID, возвращает число удаленных"""
+        # Строки и uuid.UUID приводятся к 16 байтам типом колонки
+        deleted_count = self.session.query(Student) \
+            .filter(Student.uuid.in_(student_ids)) \
+            .delete(synchronize_session=False)
+
+        self.session.commit()
+        self._mark_write()
+        return deleted_count
+
+    def close(self):
+        self.session.close()
+        self.read_session.close()
+        self.primary_read_session.close()
 
 
@@ -1,27 +1,37 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
 
 from auth import AuthService
 from db_service import DBManager
+from shard_service import SHARD_URLS, ShardedDBManager
 from models import User
 
 security = HTTPBearer()
 
-def get_db():
-    db = DBManager()
+def create_db_manager(client_id=None):
+    """Менеджер БД: шардированный, если заданы шарды, иначе обычный"""
+    if SHARD_URLS:
+        return ShardedDBManager(SHARD_URLS, client_id=client_id)
+    return DBManager(client_id=client_id)
+
+def get_db(request: Request):
+    # Клиента узнаем по токену, а без него - по адресу
+    client_id = request.headers.get("Authorization") or (request.client.host if request.client else None)
+    db = create_db_manager(client_id=client_id)
     try:
-        yield db.session
+        yield db
     finally:
         db.close()
 
 def get_current_user(
     token: str = Depends(security),
-    db: Session = Depends(get_db)
+    db: DBManager = Depends(get_db)
 ) -> User:
-    auth_service = AuthService(db)
+    auth_service = AuthService(db.session)
     username = auth_service.verify_token(token.credentials)
-    user = db.query(User).filter(User.username == username).first()
+    # Чтение через пул чтения/реплику: иначе каждый запрос держал бы единственное
+    # соединение записи до конца и вставал в очередь за импортом
+    user = db.get_user(username)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     return user
\ No newline at end of file
@@ -1,6 +1,7 @@
+import logging
 import uvicorn
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from typing import List, Optional
 import uuid
 
@@ -8,55 +9,69 @@ from db_service import DBManager
 from validation_pydantic import StudentCreate, StudentUpdate, StudentResponse, FacultyStats, CourseStats, UserRegister, \
     UserLogin, Token
 from auth import AuthService
-from dep import get_db, get_current_user
+from dep import get_db, get_current_user, create_db_manager
 from cache_service import cache
 from models import User
+from profiling import TimedJSONResponse, registry, setup_profiling
+from tracing import registry as trace_registry, traced
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Student Management API",
     description="API для управления записями студентов с кешированием и фоновыми задачами",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=TimedJSONResponse
 )
+setup_profiling(app)
 
 
-# Фоновая задача для загрузки CSV
-async def load_csv_background(filename: str):
+# Фоновые задачи синхронные: Starlette выполняет их в пуле потоков,
+# и импорт не блокирует event loop с обработкой запросов
+@traced
+def load_csv_background(filename: str):
     """Фоновая задача загрузки данных из CSV"""
-    db = DBManager()
+    db = create_db_manager()
     try:
         result = db.load_from_csv(filename)
-        print(f"Фоновая задача завершена: {result}")
+        logger.info("Фоновая задача завершена: %s", result)
     finally:
         db.close()
 
 
 # Фоновая задача для удаления записей
-async def delete_students_background(student_ids: List[str]):
+@traced
+def delete_students_background(student_ids: List[uuid.UUID]):
     """Фоновая задача удаления записей"""
-    db = DBManager()
+    db = create_db_manager()
     try:
         result = db.delete_students_by_ids(student_ids)
         # Инвалидируем кеш после удаления
         cache.delete_pattern("students:*")
         cache.delete_pattern("faculties:*")
         cache.delete_pattern("courses:*")
-        print(f"Фоновая задача удаления завершена: {result}")
+        logger.info("Фоновая задача удаления завершена: %s", result)
     finally:
         db.close()
 
 
+# Обработчики с записью и bcrypt - обычные def: Starlette выполняет их в пуле потоков,
+# и ожидание единственного соединения записи не останавливает event loop
 # Эндпоинты аутентификации (без кеширования)
 @app.post("/auth/register")
-async def register(user_data: UserRegister, db=Depends(get_db)):
-    auth_service = AuthService(db)
+def register(user_data: UserRegister, db: DBManager = Depends(get_db)):
+    auth_service = AuthService(db.session)
     user = auth_service.create_user(user_data.username, user_data.password)
     return {"message": "User created successfully", "username": user.username}
 
 
 @app.post("/auth/login", response_model=Token)
-async def login(user_data: UserLogin, db=Depends(get_db)):
-    auth_service = AuthService(db)
-    user = auth_service.authenticate_user(user_data.username, user_data.password)
+def login(user_data: UserLogin, db: DBManager = Depends(get_db)):
+    auth_service = AuthService(db.session)
+    # Пользователь читается через пул чтения, как в get_current_user
+    user = db.get_user(user_data.username)
+    if not user or not auth_service.verify_password(user_data.password, user.password):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
     access_token = auth_service.create_access_token(user.username)
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -73,7 +88,8 @@ async def root(current_user: User = Depends(get_current_user)):
 
 
 @app.post("/students/", response_model=StudentResponse, status_code=201)
-async def create_student(
+@traced
+def create_student(
         student: StudentCreate,
         db: DBManager = Depends(get_db),
         current_user: User = Depends(get_current_user)
@@ -96,6 +112,7 @@ async def create_student(
 
 
 @app.get("/students/", response_model=List[StudentResponse])
+@traced
 async def get_all_students(
         db: DBManager = Depends(get_db),
         current_user: User = Depends(get_current_user)
@@ -114,8 +131,9 @@ async def get_all_students(
 
 
 @app.get("/students/{student_id}", response_model=StudentResponse)
+@traced
 async def get_student(
-        student_id: str,
+        student_id: uuid.UUID,
         db: DBManager = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
@@ -134,8 +152,8 @@ async def get_student(
 
 
 @app.put("/students/{student_id}", response_model=StudentResponse)
-async def update_student(
-        student_id: str,
+def update_student(
+        student_id: uuid.UUID,
         student_data: StudentUpdate,
         db: DBManager = Depends(get_db),
         current_user: User = Depends(get_current_user)
@@ -158,8 +176,8 @@ async def update_student(
 
 
 @app.delete("/students/{student_id}")
-async def delete_student(
-        student_id: str,
+def delete_student(
+        student_id: uuid.UUID,
         db: DBManager = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
@@ -320,7 +338,7 @@ async def load_csv(
 @app.post("/delete-students/")
 async def delete_students(
         background_tasks: BackgroundTasks,
-        student_ids: List[str],
+        student_ids: List[uuid.UUID],
         current_user: User = Depends(get_current_user)
 ):
     """Удаление записей по списку ID в фоновом режиме"""
@@ -332,6 +350,18 @@ async def delete_students(
     return {"message": f"Задача удаления {len(student_ids)} записей запущена в фоновом режиме"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Метрики запросов в формате Prometheus"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/tracing")
+async def tracing_stats():
+    """Статистика @traced в JSON (пусто, если TRACING_ENABLED не задан)"""
+    return trace_registry.snapshot()
+
+
 @app.post("/clear-cache/")
 async def clear_cache(current_user: User = Depends(get_current_user)):
     """Очистка всего кеша"""
@@ -0,0 +1,69 @@
+"""Перевод колонок uuid из текстового вида (CHAR(32)) в 16 байт (BLOB).
+
+Запуск: python migrate_uuid.py [db_url]
+Для PostgreSQL миграция не нужна: там используется нативный тип uuid.
+"""
+import sys
+import uuid
+
+from sqlalchemy import create_engine, inspect
+
+from db_service import DATABASE_URL
+from models import Base
+
+
+def migrate_uuid_to_binary(db_url: str = DATABASE_URL) -> dict:
+    """Пересоздает таблицы с BLOB-колонкой uuid, конвертирует данные и сжимает файл (VACUUM).
+
+    Возвращает число сконвертированных записей по таблицам.
+    """
+    engine = create_engine(db_url)
+    if engine.dialect.name == "postgresql":
+        return {}
+
+    converted = {}
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing_columns = inspector.get_columns(table.name)
+            uuid_column = next(column for column in existing_columns if column["name"] == "uuid")
+            if "BLOB" in str(uuid_column["type"]).upper():
+                continue
+
+            old_name = f"{table.name}_text_uuid"
+            columns = ", ".join(column["name"] for column in existing_columns)
+            indexes = inspector.get_indexes(table.name)
+            connection.exec_driver_sql(f"ALTER TABLE {table.name} RENAME TO {old_name}")
+            # Индексы старой таблицы мешают создать новые с теми же именами
+            for index in indexes:
+                connection.exec_driver_sql(f"DROP INDEX IF EXISTS {index['name']}")
+            table.create(connection)
+            connection.exec_driver_sql(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {old_name}")
+
+            text_uuids = connection.exec_driver_sql(
+                f"SELECT uuid FROM {table.name} WHERE typeof(uuid) = 'text'"
+            ).scalars().all()
+            if text_uuids:
+                connection.exec_driver_sql(
+                    f"UPDATE {table.name} SET uuid = ? WHERE uuid = ?",
+                    [(uuid.UUID(value).bytes, value) for value in text_uuids],
+                )
+            connection.exec_driver_sql(f"DROP TABLE {old_name}")
+            converted[table.name] = len(text_uuids)
+
+    if converted:
+        # Страницы удаленных старых таблиц остаются в файле свободными, пока его не пересобрать;
+        # VACUUM нельзя выполнять внутри транзакции
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.exec_driver_sql("VACUUM")
+
+    engine.dispose()
+    return converted
+
+
+if __name__ == "__main__":
+    url = sys.argv[1] if len(sys.argv) > 1 else DATABASE_URL
+    for table_name, count in migrate_uuid_to_binary(url).items():
+        print(f"{table_name}: сконвертировано {count} записей")
@@ -0,0 +1,247 @@
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Профилирование выключено по умолчанию: без него не ставятся ни middleware, ни хуки SQL
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+# Запросы к БД дольше порога (мс) пишутся в лог
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger("profiling")
+
+
+class RequestStats:
+    """Счетчики одного запроса"""
+    __slots__ = ("sql_count", "db_time", "cache_hits", "cache_misses", "cache_time", "render_time")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_time = 0.0
+        self.render_time = 0.0
+
+    def add(self, other: "RequestStats"):
+        """Прибавление статистики задачи, выполненной в другом потоке"""
+        self.sql_count += other.sql_count
+        self.db_time += other.db_time
+        self.cache_hits += other.cache_hits
+        self.cache_misses += other.cache_misses
+        self.cache_time += other.cache_time
+        self.render_time += other.render_time
+
+    def server_timing(self, total: float) -> str:
+        """Значение заголовка Server-Timing (длительности в мс)"""
+        return ", ".join([
+            f"total;dur={total * 1000:.2f}",
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.sql_count} queries"',
+            f'cache;dur={self.cache_time * 1000:.2f};desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f"render;dur={self.render_time * 1000:.2f}",
+        ])
+
+
+# Объект статистики общий для задач asyncio и потоков Starlette (контекст копируется, объект тот же).
+# В собственные пулы потоков контекст не переходит - задачи туда отправляются через submit_with_stats
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+_merge_lock = threading.Lock()
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current_stats.get()
+
+
+def submit_with_stats(executor, func, *args, **kwargs):
+    """executor.submit, при котором запросы задачи попадают в статистику текущего запроса.
+
+    Задача считает в свой RequestStats (потоки не пишут в один объект
+    одновременно) и прибавляет его к статистике запроса до завершения Future.
+    """
+    parent = _current_stats.get()
+    if parent is None:
+        return executor.submit(func, *args, **kwargs)
+
+    def run():
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_stats.reset(token)
+            with _merge_lock:
+                parent.add(stats)
+
+    return executor.submit(run)
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus (накопительные корзины)"""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> list:
+        lines = [
+            f'{name}_bucket{{{labels},le="{bound}"}} {count}'
+            for bound, count in zip(self.buckets, self.counts)
+        ]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.total}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Метрики запросов по маршрутам"""
+
+    HISTOGRAMS = {
+        "http_request_duration_seconds": "Длительность обработки запроса",
+        "db_query_duration_seconds": "Время запросов к БД за один HTTP-запрос",
+        "cache_duration_seconds": "Время обращений к Redis за один HTTP-запрос",
+        # Только JSONResponse.render: jsonable_encoder и проверка response_model сюда не входят
+        "response_render_duration_seconds": "Время кодирования ответа в JSON",
+    }
+    COUNTERS = {
+        "db_queries_total": "Число SQL-запросов",
+        "cache_hits_total": "Попадания в кеш",
+        "cache_misses_total": "Промахи кеша",
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, method: str, route: str, total: float, stats: RequestStats):
+        key = (method, route)
+        with self._lock:
+            histograms = self._histograms.get(key)
+            if histograms is None:
+                histograms = self._histograms[key] = {name: Histogram() for name in self.HISTOGRAMS}
+                self._counters[key] = dict.fromkeys(self.COUNTERS, 0)
+            histograms["http_request_duration_seconds"].observe(total)
+            histograms["db_query_duration_seconds"].observe(stats.db_time)
+            histograms["cache_duration_seconds"].observe(stats.cache_time)
+            histograms["response_render_duration_seconds"].observe(stats.render_time)
+            counters = self._counters[key]
+            counters["db_queries_total"] += stats.sql_count
+            counters["cache_hits_total"] += stats.cache_hits
+            counters["cache_misses_total"] += stats.cache_misses
+
+    def render(self) -> str:
+        """Текстовый формат экспозиции Prometheus"""
+        lines = []
+        with self._lock:
+            for name, description in self.HISTOGRAMS.items():
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} histogram")
+                for (method, route), histograms in self._histograms.items():
+                    lines.extend(histograms[name].render(name, f'method="{method}",route="{route}"'))
+            for name, description in self.COUNTERS.items():
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} counter")
+                for (method, route), counters in self._counters.items():
+                    lines.append(f'{name}{{method="{method}",route="{route}"}} {counters[name]}')
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse, учитывающий время кодирования в JSON (render) в статистике запроса"""
+
+    def render(self, content) -> bytes:
+        stats = _current_stats.get()
+        if stats is None:
+            return super().render(content)
+        started = time.perf_counter()
+        body = super().render(content)
+        stats.render_time += time.perf_counter() - started
+        return body
+
+
+def timed_cache(count_hits: bool = False):
+    """Учет времени обращений к Redis; для чтения - еще и попаданий/промахов"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            stats = _current_stats.get()
+            if stats is None:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            result = func(*args, **kwargs)
+            stats.cache_time += time.perf_counter() - started
+            if count_hits:
+                if result is None:
+                    stats.cache_misses += 1
+                else:
+                    stats.cache_hits += 1
+            return result
+        return wrapper
+    return decorator
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.sql_count += 1
+        stats.db_time += elapsed
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        logger.warning("Медленный запрос (%.1f мс): %s", elapsed * 1000, statement)
+
+
+def install_sql_hooks():
+    """Хуки на все engine: число и время SQL-запросов, лог медленных запросов"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def setup_profiling(app, enabled: bool = PROFILING_ENABLED):
+    """Подключение профилирования к приложению; при enabled=False ничего не делает"""
+    if not enabled:
+        return
+    install_sql_hooks()
+
+    @app.middleware("http")
+    async def profile_request(request, call_next):
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _current_stats.reset(token)
+        total = time.perf_counter() - started
+
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        registry.observe(request.method, route_path, total, stats)
+        response.headers["Server-Timing"] = stats.server_timing(total)
+        return response
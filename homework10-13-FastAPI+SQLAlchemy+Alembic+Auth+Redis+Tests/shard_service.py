@@ -0,0 +1,179 @@
+import os
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+from db_service import CSV_BATCH_SIZE, SQL_ECHO, DBManager, read_students_csv
+from models import Student
+from profiling import submit_with_stats
+
+# Шарды через запятую; если не заданы, сервис работает с одной БД
+SHARD_URLS = [url.strip() for url in os.getenv("DATABASE_SHARD_URLS", "").split(",") if url.strip()]
+SHARD_WORKERS = 16
+
+_executor = ThreadPoolExecutor(max_workers=SHARD_WORKERS, thread_name_prefix="shard")
+
+
+def shard_index(faculty: str, shard_count: int) -> int:
+    """Номер шарда для факультета; crc32 стабилен между процессами, в отличие от hash()"""
+    return zlib.crc32(faculty.encode("utf-8")) % shard_count
+
+
+class ShardedDBManager:
+    """Записи студентов, распределенные по нескольким БД по хешу факультета.
+
+    Запросы по одному факультету идут в один шард, остальные выполняются
+    параллельно во всех шардах, и результаты объединяются.
+    Пользователи хранятся в первом шарде.
+    """
+
+    def __init__(self, shard_urls, client_id=None, echo=SQL_ECHO):
+        self.shards = [DBManager(url, replica_urls=[], client_id=client_id, echo=echo) for url in shard_urls]
+
+    @property
+    def session(self):
+        """Сессия шарда с пользователями (для авторизации)"""
+        return self.shards[0].session
+
+    def get_user(self, username: str):
+        """Пользователь для авторизации (пользователи лежат в первом шарде)"""
+        return self.shards[0].get_user(username)
+
+    def shard_for(self, faculty: str) -> DBManager:
+        return self.shards[shard_index(faculty, len(self.shards))]
+
+    def _scatter(self, method: str, *args, **kwargs) -> list:
+        """Параллельный вызов метода во всех шардах, результаты в порядке шардов"""
+        futures = [submit_with_stats(_executor, getattr(shard, method), *args, **kwargs) for shard in self.shards]
+        return [future.result() for future in futures]
+
+    def _find_student(self, student_id):
+        """Поиск записи во всех шардах, возвращает (шард, запись)"""
+        for shard, student in zip(self.shards, self._scatter("get_student_by_id", student_id)):
+            if student is not None:
+                return shard, student
+        return None, None
+
+    # CREATE операция
+    def create_student(self, surname: str, name: str, faculty: str, course: str, grade: int):
+        """Создание новой записи студента в шарде факультета"""
+        return self.shard_for(faculty).create_student(surname, name, faculty, course, grade)
+
+    # READ операции
+    def get_all_students(self):
+        """Получение всех записей из всех шардов"""
+        return [student for students in self._scatter("get_all_students") for student in students]
+
+    def get_student_by_id(self, student_id: uuid.UUID):
+        """Получение записи по UUID"""
+        return self._find_student(student_id)[1]
+
+    def get_students_by_faculty(self, faculty_name: str):
+        """Получение записей по факультету"""
+        return self.shard_for(faculty_name).get_students_by_faculty(faculty_name)
+
+    def get_unique_courses(self):
+        """Получение уникальных предметов"""
+        courses = self._scatter("get_unique_courses")
+        return list(dict.fromkeys(course for shard_courses in courses for course in shard_courses))
+
+    def get_unique_faculties(self):
+        """Получение уникальных факультетов"""
+        # Факультет целиком лежит в одном шарде, повторов между шардами нет
+        return [faculty for faculties in self._scatter("get_unique_faculties") for faculty in faculties]
+
+    # UPDATE операция
+    def update_student(self, student_id: uuid.UUID, **kwargs):
+        """Обновление записи; при смене факультета запись переносится в другой шард"""
+        shard, student = self._find_student(student_id)
+        if student is None:
+            return None
+
+        target = self.shard_for(kwargs.get("faculty", student.faculty))
+        if target is shard:
+            return shard.update_student(student_id, **kwargs)
+
+        record = {column: getattr(student, column) for column in Student.__table__.columns.keys()}
+        record.update((key, value) for key, value in kwargs.items() if key in record)
+        record["updated_at"] = datetime.now()
+        # Сначала вставка, потом удаление: при сбое запись задвоится, но не потеряется
+        target.insert_students([record])
+        shard.delete_student(student_id)
+        return target.get_student_by_id(student.uuid)
+
+    # DELETE операции
+    def delete_student(self, student_id: uuid.UUID):
+        """Удаление записи студента"""
+        return any(self._scatter("delete_student", student_id))
+
+    def delete_students_by_ids(self, student_ids: list):
+        """Удаление записей по списку UUID во всех шардах"""
+        try:
+            deleted_count = sum(self._scatter("delete_students_by_ids_count", student_ids))
+            return f"Удалено {deleted_count} записей"
+        except Exception as e:
+            for shard in self.shards:
+                shard.session.rollback()
+            return f"Ошибка удаления: {str(e)}"
+
+    # Аналитические методы
+    def get_average_grade_by_faculty(self, faculty_name: str):
+        """Средний балл по факультету"""
+        return self.shard_for(faculty_name).get_average_grade_by_faculty(faculty_name)
+
+    def get_students_low_grade_by_course(self, course_name: str, max_grade: int = 30):
+        """Записи по предмету с оценкой ниже указанной"""
+        results = self._scatter("get_students_low_grade_by_course", course_name, max_grade)
+        return [student for students in results for student in students]
+
+    def get_average_grade_by_course(self, course_name: str):
+        """Средний балл по предмету: сумма и количество по шардам, а не среднее средних"""
+        totals = self._scatter("get_grade_totals_by_course", course_name)
+        total = sum(shard_total for shard_total, _ in totals)
+        count = sum(shard_count for _, shard_count in totals)
+        return round(total / count, 2) if count else 0
+
+    # Загрузка из CSV
+    def load_from_csv(self, filename: str = "students.csv"):
+        """Загрузка данных из CSV файла с распределением по шардам.
+
+        Файл читается потоково: буфер шарда отправляется на вставку каждые
+        CSV_BATCH_SIZE записей, поэтому в памяти не больше двух пачек на шард.
+        """
+        buffers = [[] for _ in self.shards]
+        # У сессии шарда не больше одной вставки одновременно
+        pending = [None for _ in self.shards]
+
+        def flush(index):
+            if pending[index] is not None:
+                pending[index].result()
+            pending[index] = submit_with_stats(_executor, self.shards[index].insert_students, buffers[index])
+            buffers[index] = []
+
+        try:
+            with open(filename, 'r', encoding='utf-8') as file:
+                for row in read_students_csv(file):
+                    index = shard_index(row["faculty"], len(self.shards))
+                    buffers[index].append(row)
+                    if len(buffers[index]) >= CSV_BATCH_SIZE:
+                        flush(index)
+            for index, buffer in enumerate(buffers):
+                if buffer:
+                    flush(index)
+            for future in pending:
+                if future is not None:
+                    future.result()
+            return f"Успешно загружено данных из {filename}"
+        except FileNotFoundError:
+            return f"Файл {filename} не найден"
+        except Exception as e:
+            # Откат только после того, как вставки в других потоках закончились
+            wait([future for future in pending if future is not None])
+            for shard in self.shards:
+                shard.session.rollback()
+            return f"Ошибка загрузки: {str(e)}"
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
@@ -1,11 +1,23 @@
 import pytest
 import asyncio
+import csv
+import sqlite3
+import threading
+import time
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from main import app
 from models import Base, Student, User
 from auth import AuthService
+import db_service
+from db_service import DBManager
+from shard_service import ShardedDBManager, shard_index
+from base import uuid7
+from migrate_uuid import migrate_uuid_to_binary
+import profiling
+from cache_service import RedisCache
 import uuid
 from datetime import datetime
 
@@ -393,4 +405,554 @@ class TestIntegrationScenarios:
 
         # 4. Логаут
         logout_response = client.post("/auth/logout", headers=headers)
-        assert logout_response.status_code == 200
\ No newline at end of file
+        assert logout_response.status_code == 200
+
+
+# Тесты профиля SQLite (WAL, PRAGMA, разделение чтения и записи)
+class TestSQLiteProfile:
+    """Тесты настроек SQLite для конкурентной работы"""
+
+    def test_pragmas_applied(self, tmp_path):
+        """Тест применения PRAGMA к соединениям записи и чтения"""
+        # Arrange
+        db = DBManager(f"sqlite:///{tmp_path / 'profile.sqlite'}", echo=False)
+
+        # Act
+        journal_mode = db.session.execute(text("PRAGMA journal_mode")).scalar()
+        synchronous = db.session.execute(text("PRAGMA synchronous")).scalar()
+        busy_timeout = db.session.execute(text("PRAGMA busy_timeout")).scalar()
+        query_only = db.read_session.execute(text("PRAGMA query_only")).scalar()
+        db.close()
+
+        # Assert
+        assert journal_mode == "wal"
+        assert synchronous == 1  # NORMAL
+        assert busy_timeout == 5000
+        assert query_only == 1
+
+    def test_readers_not_blocked_during_import(self, tmp_path, monkeypatch):
+        """Тест: чтение не блокируется во время импорта 100 тыс. строк"""
+        # Arrange - маленький кеш страниц, чтобы импорт не помещался в память,
+        # как при загрузке больших файлов
+        monkeypatch.setitem(db_service.SQLITE_PRAGMAS, "cache_size", 100)
+        db_url = f"sqlite:///{tmp_path / 'import.sqlite'}"
+        csv_path = tmp_path / "big.csv"
+        with open(csv_path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["Фамилия", "Имя", "Факультет", "Курс", "Оценка"])
+            for i in range(100_000):
+                writer.writerow(["Иванов", "Петр", "ФПМИ", f"Курс {i % 10}", i % 100])
+
+        seed = DBManager(db_url, echo=False)
+        seed.create_student("Смит", "Федор", "ФТФ", "Физика", 70)
+        seed.close()
+
+        def load():
+            loader = DBManager(db_url, echo=False)
+            try:
+                loader.load_from_csv(str(csv_path))
+            finally:
+                loader.close()
+
+        loader_thread = threading.Thread(target=load)
+
+        # Act
+        latencies = []
+        loader_thread.start()
+        while loader_thread.is_alive():
+            reader = DBManager(db_url, echo=False)
+            started = time.perf_counter()
+            faculties = reader.get_unique_faculties()
+            latencies.append(time.perf_counter() - started)
+            reader.close()
+            # Читатель видит только зафиксированные данные
+            assert faculties == ["ФТФ"] or sorted(faculties) == ["ФПМИ", "ФТФ"]
+        loader_thread.join()
+
+        # Assert
+        assert latencies, "импорт завершился раньше первого чтения"
+        assert max(latencies) < 1.0
+        db = DBManager(db_url, echo=False)
+        assert len(db.get_all_students()) == 100_001
+        db.close()
+
+    @staticmethod
+    def during_import(request):
+        """Запрос к приложению во время импорта 20 000 записей; (ответ, задержка, шел ли еще импорт)"""
+        first_batch_written = threading.Event()
+
+        def rows():
+            for i in range(20_000):
+                if i == db_service.CSV_BATCH_SIZE:
+                    first_batch_written.set()
+                if i % 1000 == 0:
+                    time.sleep(0.2)
+                yield {"surname": "Иванов", "name": "Петр", "faculty": "ФПМИ", "course": "Физика", "grade": i % 100}
+
+        def load():
+            loader = DBManager(TEST_DATABASE_URL, echo=False)
+            try:
+                loader.insert_students(rows())
+            finally:
+                loader.close()
+
+        loader_thread = threading.Thread(target=load)
+        loader_thread.start()
+        assert first_batch_written.wait(10)
+        started = time.perf_counter()
+        response = request()
+        latency = time.perf_counter() - started
+        import_running = loader_thread.is_alive()
+        loader_thread.join()
+        return response, latency, import_running
+
+    def test_api_not_blocked_during_import(self, auth_headers):
+        """Тест: авторизованный GET через приложение не ждет импорта"""
+        # Act
+        response, latency, import_running = self.during_import(
+            lambda: client.get("/faculties/", headers=auth_headers))
+
+        # Assert
+        assert response.status_code == 200
+        assert import_running, "импорт завершился раньше запроса"
+        assert latency < 1.0
+
+    def test_write_not_blocked_during_import(self, auth_headers, sample_student_data):
+        """Тест: POST во время импорта получает соединение записи между пачками"""
+        # Act
+        response, latency, import_running = self.during_import(
+            lambda: client.post("/students/", json=sample_student_data, headers=auth_headers))
+
+        # Assert
+        assert response.status_code == 201
+        assert import_running, "импорт завершился раньше запроса"
+        assert latency < 1.0
+        student = client.get(f"/students/{response.json()['uuid']}", headers=auth_headers)
+        assert student.status_code == 200
+
+
+# Тесты маршрутизации чтения на реплики
+class TestReadReplicas:
+    """Тесты чтения с реплик и записи в основную БД"""
+
+    @staticmethod
+    def make_db(path, surname):
+        """Отдельный файл SQLite, имитирующий основную БД или реплику"""
+        db_url = f"sqlite:///{path}"
+        db = DBManager(db_url, replica_urls=[], echo=False)
+        db.create_student(surname, "Иван", "ФТФ", "Физика", 50)
+        db.close()
+        return db_url
+
+    def test_reads_go_to_replica_and_writes_to_primary(self, tmp_path):
+        """Тест: чтение с реплики, запись в основную БД"""
+        # Arrange
+        primary_url = self.make_db(tmp_path / "primary.sqlite", "Основной")
+        replica_url = self.make_db(tmp_path / "replica.sqlite", "Реплика")
+
+        # Act
+        db = DBManager(primary_url, replica_urls=[replica_url], echo=False)
+        surnames = [student.surname for student in db.get_all_students()]
+        db.create_student("Новый", "Петр", "ФТФ", "Физика", 70)
+        db.close()
+
+        # Assert
+        assert surnames == ["Реплика"]
+        primary = DBManager(primary_url, replica_urls=[], echo=False)
+        assert {student.surname for student in primary.get_all_students()} == {"Основной", "Новый"}
+        primary.close()
+
+    def test_round_robin_between_replicas(self, tmp_path):
+        """Тест распределения чтения по репликам по кругу"""
+        # Arrange
+        primary_url = self.make_db(tmp_path / "primary.sqlite", "Основной")
+        replicas = [
+            self.make_db(tmp_path / "replica1.sqlite", "Первая"),
+            self.make_db(tmp_path / "replica2.sqlite", "Вторая"),
+        ]
+
+        # Act
+        seen = []
+        for _ in range(4):
+            db = DBManager(primary_url, replica_urls=replicas, echo=False)
+            seen.append(db.get_all_students()[0].surname)
+            db.close()
+
+        # Assert
+        assert seen == ["Первая", "Вторая", "Первая", "Вторая"]
+
+    def test_unhealthy_replica_skipped(self, tmp_path):
+        """Тест пропуска недоступной реплики и возврата к основной БД"""
+        # Arrange
+        primary_url = self.make_db(tmp_path / "primary.sqlite", "Основной")
+        broken_url = f"sqlite:///{tmp_path / 'missing' / 'replica.sqlite'}"
+        replica_url = self.make_db(tmp_path / "replica.sqlite", "Реплика")
+
+        # Act
+        db = DBManager(primary_url, replica_urls=[broken_url, replica_url], echo=False)
+        with_healthy = [student.surname for student in db.get_all_students()]
+        db.close()
+        db = DBManager(primary_url, replica_urls=[broken_url], echo=False)
+        all_broken = [student.surname for student in db.get_all_students()]
+        db.close()
+
+        # Assert
+        assert with_healthy == ["Реплика"]
+        assert all_broken == ["Основной"]
+
+    def test_read_your_writes(self, tmp_path, monkeypatch):
+        """Тест: после записи клиент некоторое время читает с основной БД"""
+        # Arrange
+        primary_url = self.make_db(tmp_path / "primary.sqlite", "Основной")
+        replica_url = self.make_db(tmp_path / "replica.sqlite", "Реплика")
+        writer = DBManager(primary_url, replica_urls=[replica_url], client_id="writer", echo=False)
+        writer.create_student("Новый", "Петр", "ФТФ", "Физика", 70)
+        writer.close()
+
+        # Act
+        sticky = DBManager(primary_url, replica_urls=[replica_url], client_id="writer", echo=False)
+        sticky_surnames = {student.surname for student in sticky.get_all_students()}
+        sticky.close()
+        other = DBManager(primary_url, replica_urls=[replica_url], client_id="reader", echo=False)
+        other_surnames = {student.surname for student in other.get_all_students()}
+        other.close()
+        monkeypatch.setattr(db_service, "STICKY_WINDOW", 0)
+        expired = DBManager(primary_url, replica_urls=[replica_url], client_id="writer", echo=False)
+        expired_surnames = {student.surname for student in expired.get_all_students()}
+        expired.close()
+
+        # Assert
+        assert sticky_surnames == {"Основной", "Новый"}
+        assert other_surnames == {"Реплика"}
+        assert expired_surnames == {"Реплика"}
+
+    def test_auth_lookup_uses_replica(self, tmp_path):
+        """Тест: поиск пользователя идет на реплику и не занимает соединение записи"""
+        # Arrange
+        primary_url = self.make_db(tmp_path / "primary.sqlite", "Основной")
+        replica_url = self.make_db(tmp_path / "replica.sqlite", "Реплика")
+        for url, username in ((primary_url, "primary_user"), (replica_url, "replica_user")):
+            seed = DBManager(url, replica_urls=[], echo=False)
+            AuthService(seed.session).create_user(username, "secret")
+            seed.close()
+        db = DBManager(primary_url, replica_urls=[replica_url], echo=False)
+
+        # Act
+        from_replica = db.get_user("replica_user")
+        # Пользователь еще не дошел до реплики - повтор на основной БД
+        from_primary = db.get_user("primary_user")
+        writer_connections = db.engine.pool.checkedout()
+        db.close()
+
+        # Assert
+        assert from_replica.username == "replica_user"
+        assert from_primary.username == "primary_user"
+        assert writer_connections == 0
+
+
+# Тесты шардирования по факультетам
+class TestSharding:
+    """Тесты распределения записей по шардам"""
+
+    FACULTIES = ["ФТФ", "ФПМИ", "РЭФ", "АВТФ", "ФЛА", "ФМА"]
+
+    @pytest.fixture
+    def shard_urls(self, tmp_path):
+        return [f"sqlite:///{tmp_path / f'shard{i}.sqlite'}" for i in range(3)]
+
+    def two_faculties_on_different_shards(self, shard_count):
+        first = self.FACULTIES[0]
+        for faculty in self.FACULTIES[1:]:
+            if shard_index(faculty, shard_count) != shard_index(first, shard_count):
+                return first, faculty
+        pytest.fail("все факультеты попали в один шард")
+
+    def test_faculty_stored_in_single_shard(self, shard_urls):
+        """Тест: записи факультета лежат в одном шарде"""
+        # Arrange
+        db = ShardedDBManager(shard_urls, echo=False)
+
+        # Act
+        for faculty in self.FACULTIES:
+            db.create_student("Иванов", "Петр", faculty, "Физика", 50)
+        faculty_students = db.get_students_by_faculty("ФТФ")
+        all_students = db.get_all_students()
+        faculties = db.get_unique_faculties()
+        db.close()
+
+        # Assert
+        assert len(all_students) == len(self.FACULTIES)
+        assert sorted(faculties) == sorted(self.FACULTIES)
+        assert [student.faculty for student in faculty_students] == ["ФТФ"]
+        for index, url in enumerate(shard_urls):
+            shard = DBManager(url, replica_urls=[], echo=False)
+            for faculty in shard.get_unique_faculties():
+                assert shard_index(faculty, len(shard_urls)) == index
+            shard.close()
+
+    def test_course_average_merged_from_sums(self, shard_urls):
+        """Тест: средний балл по предмету считается по суммам и количествам шардов"""
+        # Arrange
+        db = ShardedDBManager(shard_urls, echo=False)
+        first, second = self.two_faculties_on_different_shards(len(shard_urls))
+        db.create_student("Иванов", "Петр", first, "Физика", 100)
+        db.create_student("Петров", "Иван", second, "Физика", 0)
+        db.create_student("Сидоров", "Алексей", second, "Физика", 0)
+        db.create_student("Смит", "Федор", second, "Химия", 10)
+
+        # Act
+        average = db.get_average_grade_by_course("Физика")
+        courses = db.get_unique_courses()
+        low_grades = db.get_students_low_grade_by_course("Физика")
+        db.close()
+
+        # Assert
+        assert average == 33.33  # а не (100 + 0) / 2
+        assert sorted(courses) == ["Физика", "Химия"]
+        assert len(low_grades) == 2
+
+    def test_update_moves_student_between_shards(self, shard_urls):
+        """Тест переноса записи при смене факультета"""
+        # Arrange
+        db = ShardedDBManager(shard_urls, echo=False)
+        first, second = self.two_faculties_on_different_shards(len(shard_urls))
+        student = db.create_student("Иванов", "Петр", first, "Физика", 50)
+
+        # Act
+        updated = db.update_student(student.uuid, faculty=second, grade=90)
+
+        # Assert
+        assert updated.uuid == student.uuid
+        assert updated.faculty == second
+        assert updated.grade == 90
+        assert db.get_students_by_faculty(first) == []
+        assert len(db.get_all_students()) == 1
+        db.close()
+
+    def test_load_and_delete_across_shards(self, shard_urls, tmp_path):
+        """Тест загрузки CSV и удаления по списку UUID во всех шардах"""
+        # Arrange
+        csv_path = tmp_path / "students.csv"
+        with open(csv_path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["Фамилия", "Имя", "Факультет", "Курс", "Оценка"])
+            for i, faculty in enumerate(self.FACULTIES):
+                writer.writerow(["Иванов", "Петр", faculty, "Физика", i])
+        db = ShardedDBManager(shard_urls, echo=False)
+
+        # Act
+        db.load_from_csv(str(csv_path))
+        students = db.get_all_students()
+        result = db.delete_students_by_ids([str(student.uuid) for student in students])
+
+        # Assert
+        assert len(students) == len(self.FACULTIES)
+        assert result == f"Удалено {len(self.FACULTIES)} записей"
+        assert db.get_all_students() == []
+        db.close()
+
+
+    def test_load_streams_batches_per_shard(self, shard_urls, tmp_path, monkeypatch):
+        """Тест: CSV загружается пачками по CSV_BATCH_SIZE, а не целиком в память"""
+        # Arrange
+        monkeypatch.setattr("shard_service.CSV_BATCH_SIZE", 10)
+        csv_path = tmp_path / "students.csv"
+        with open(csv_path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["Фамилия", "Имя", "Факультет", "Курс", "Оценка"])
+            for i in range(300):
+                writer.writerow(["Иванов", "Петр", self.FACULTIES[i % len(self.FACULTIES)], "Физика", i % 100])
+        db = ShardedDBManager(shard_urls, echo=False)
+        batch_sizes = []
+        for shard in db.shards:
+            original = shard.insert_students
+
+            def insert_students(rows, original=original):
+                batch_sizes.append(len(rows))
+                return original(rows)
+
+            shard.insert_students = insert_students
+
+        # Act
+        result = db.load_from_csv(str(csv_path))
+        students = db.get_all_students()
+        db.close()
+
+        # Assert
+        assert result.startswith("Успешно")
+        assert len(students) == 300
+        assert sum(batch_sizes) == 300
+        assert max(batch_sizes) == 10
+
+
+# Тесты хранения UUID в бинарном виде
+class TestBinaryUUID:
+    """Тесты компактного хранения UUID"""
+
+    def test_uuid_stored_as_16_bytes(self, tmp_path):
+        """Тест: в SQLite ключ хранится как 16 байт, поиск по строке и по UUID"""
+        # Arrange
+        db_path = tmp_path / "binary.sqlite"
+        db = DBManager(f"sqlite:///{db_path}", replica_urls=[], echo=False)
+        student = db.create_student("Иванов", "Петр", "ФТФ", "Физика", 50)
+
+        # Act
+        by_uuid = db.get_student_by_id(student.uuid)
+        by_str = db.get_student_by_id(str(student.uuid))
+        db.close()
+        stored = sqlite3.connect(db_path).execute("SELECT typeof(uuid), length(uuid) FROM students").fetchone()
+
+        # Assert
+        assert isinstance(student.uuid, uuid.UUID)
+        assert by_uuid.uuid == student.uuid
+        assert by_str.uuid == student.uuid
+        assert stored == ("blob", 16)
+
+    def test_uuid7_time_ordered(self):
+        """Тест: UUIDv7 упорядочены по времени создания"""
+        # Act
+        first = uuid7()
+        time.sleep(0.002)
+        second = uuid7()
+
+        # Assert
+        assert first.version == 7
+        assert first.variant == uuid.RFC_4122
+        assert first.bytes < second.bytes
+
+    def test_migrate_text_uuids(self, tmp_path):
+        """Тест миграции текстовых UUID в бинарные"""
+        # Arrange - таблица в старом формате с UUID в виде 32 hex-символов
+        db_path = tmp_path / "legacy.sqlite"
+        student_id = uuid.uuid4()
+        connection = sqlite3.connect(db_path)
+        connection.execute(
+            "CREATE TABLE students (surname VARCHAR(50) NOT NULL, name VARCHAR(50) NOT NULL, "
+            "faculty VARCHAR(50) NOT NULL, course VARCHAR(50) NOT NULL, grade INTEGER NOT NULL, "
+            "uuid UUID NOT NULL, created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL, PRIMARY KEY (uuid))"
+        )
+        connection.execute(
+            "INSERT INTO students VALUES ('Иванов', 'Петр', 'ФТФ', 'Физика', 50, ?, "
+            "'2024-01-01 00:00:00.000000', '2024-01-01 00:00:00.000000')",
+            (student_id.hex,),
+        )
+        connection.commit()
+        connection.close()
+
+        # Act
+        converted = migrate_uuid_to_binary(f"sqlite:///{db_path}")
+        db = DBManager(f"sqlite:///{db_path}", replica_urls=[], echo=False)
+        student = db.get_student_by_id(student_id)
+        db.close()
+        connection = sqlite3.connect(db_path)
+        free_pages = connection.execute("PRAGMA freelist_count").fetchone()[0]
+        connection.close()
+
+        # Assert
+        assert converted == {"students": 1}
+        assert free_pages == 0
+        assert student.surname == "Иванов"
+        assert migrate_uuid_to_binary(f"sqlite:///{db_path}") == {}
+
+
+# Тесты профилирования запросов
+class TestProfiling:
+    """Тесты Server-Timing, метрик и лога медленных запросов"""
+
+    @pytest.fixture
+    def profiled_client(self, tmp_path):
+        db_url = f"sqlite:///{tmp_path / 'profiled.sqlite'}"
+        redis_cache = RedisCache(port=1)  # недоступный Redis - всегда промах
+        DBManager(db_url, replica_urls=[], echo=False).close()  # схема создается заранее
+        profiled_app = FastAPI(default_response_class=profiling.TimedJSONResponse)
+        profiling.setup_profiling(profiled_app, enabled=True)
+
+        @profiled_app.get("/faculties/{faculty_name}")
+        def faculty_students(faculty_name: str):
+            redis_cache.get(f"faculties:{faculty_name}")
+            db = DBManager(db_url, replica_urls=[], echo=False)
+            try:
+                return [student.surname for student in db.get_students_by_faculty(faculty_name)]
+            finally:
+                db.close()
+
+        return TestClient(profiled_app)
+
+    def test_server_timing_header(self, profiled_client):
+        """Тест заголовка Server-Timing с данными о БД и кеше"""
+        # Act
+        response = profiled_client.get("/faculties/ФТФ")
+
+        # Assert
+        assert response.status_code == 200
+        server_timing = response.headers["Server-Timing"]
+        assert "total;dur=" in server_timing
+        assert '1 queries' in server_timing
+        assert '0 hits, 1 misses' in server_timing
+        assert "render;dur=" in server_timing
+
+    def test_sharded_queries_counted(self, tmp_path):
+        """Тест: запросы в потоках пула шардов попадают в Server-Timing запроса"""
+        # Arrange
+        shard_urls = [f"sqlite:///{tmp_path / f'shard{i}.sqlite'}" for i in range(3)]
+        ShardedDBManager(shard_urls, echo=False).close()  # схема создается заранее
+        profiled_app = FastAPI(default_response_class=profiling.TimedJSONResponse)
+        profiling.setup_profiling(profiled_app, enabled=True)
+
+        @profiled_app.get("/students/")
+        def all_students():
+            db = ShardedDBManager(shard_urls, echo=False)
+            try:
+                return [student.surname for student in db.get_all_students()]
+            finally:
+                db.close()
+
+        # Act
+        response = TestClient(profiled_app).get("/students/")
+
+        # Assert
+        assert response.status_code == 200
+        assert '3 queries' in response.headers["Server-Timing"]
+
+    def test_metrics_per_route(self, profiled_client):
+        """Тест гистограмм по маршрутам в формате Prometheus"""
+        # Act
+        profiled_client.get("/faculties/ФТФ")
+        profiled_client.get("/faculties/ФПМИ")
+        metrics = profiling.registry.render()
+
+        # Assert
+        assert "# TYPE http_request_duration_seconds histogram" in metrics
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/faculties/{faculty_name}",le="+Inf"}' in metrics
+        assert 'cache_misses_total{method="GET",route="/faculties/{faculty_name}"}' in metrics
+
+    def test_slow_query_logged(self, profiled_client, monkeypatch, caplog):
+        """Тест лога запросов дольше порога"""
+        # Arrange
+        monkeypatch.setattr(profiling, "SLOW_QUERY_MS", 0)
+
+        # Act
+        with caplog.at_level("WARNING", logger="profiling"):
+            profiled_client.get("/faculties/ФТФ")
+
+        # Assert
+        assert any("Медленный запрос" in record.message for record in caplog.records)
+
+    def test_metrics_endpoint(self):
+        """Тест эндпоинта /metrics основного приложения"""
+        # Act
+        response = client.get("/metrics")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+
+    def test_tracing_endpoint(self):
+        """Тест эндпоинта со статистикой @traced"""
+        # Act
+        response = client.get("/tracing")
+
+        # Assert
+        assert response.status_code == 200
+        assert isinstance(response.json(), dict)
+
@@ -0,0 +1,199 @@
+"""Декоратор трассировки: число вызовов, суммарное время и перцентили.
+
+Модуль без внешних зависимостей. Каталоги заданий - не пакеты, поэтому
+у каждого сервиса своя копия (homework4, homework6, homework8,
+homework10-13); копии одинаковые и меняются вместе.
+
+Включается переменной TRACING_ENABLED=1 (читается при декорировании): в
+выключенном состоянии @traced возвращает исходную функцию, накладных
+расходов нет. При TRACING_SAMPLE_RATE < 1 время замеряется у каждого
+N-го вызова (N = 1 / rate), вызовы и ошибки считаются всегда.
+
+Пример:
+    @traced
+    def return_book(title): ...
+
+    print(registry.to_json())
+"""
+import asyncio
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from functools import wraps
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "0") == "1"
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+# Сколько замеров хранится на функцию для перцентилей (reservoir sampling)
+MAX_SAMPLES = 10000
+PERCENTILES = (50, 90, 99)
+
+
+class ThreadStats:
+    """Замеры одного потока: пишет только свой поток, поэтому без блокировок"""
+    __slots__ = ("calls", "errors", "timed", "total_ns", "max_ns", "samples")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timed = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.samples = []
+
+
+class FunctionStats:
+    def __init__(self):
+        # Счетчик выборки: next() у itertools.count атомарен, вызовы выбираются без блокировки.
+        # Число вызовов и ошибок считается отдельно, в потоковых шардах
+        self.counter = itertools.count()
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def calls(self) -> int:
+        with self._lock:
+            shards = list(self._shards)
+        return sum(shard.calls for shard in shards)
+
+    def shard(self) -> ThreadStats:
+        """Замеры текущего потока"""
+        try:
+            return self._local.shard
+        except AttributeError:
+            pass
+        shard = self._local.shard = ThreadStats()
+        with self._lock:
+            self._shards.append(shard)
+        return shard
+
+    def record(self, shard: ThreadStats, elapsed_ns: int, failed: bool):
+        shard.errors += failed
+        shard.timed += 1
+        shard.total_ns += elapsed_ns
+        if elapsed_ns > shard.max_ns:
+            shard.max_ns = elapsed_ns
+        if len(shard.samples) < MAX_SAMPLES:
+            shard.samples.append(elapsed_ns)
+        else:
+            slot = int(random.random() * shard.timed)
+            if slot < MAX_SAMPLES:
+                shard.samples[slot] = elapsed_ns
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            shards = list(self._shards)
+        calls = sum(shard.calls for shard in shards)
+        timed = sum(shard.timed for shard in shards)
+        total_ns = sum(shard.total_ns for shard in shards)
+        samples = sorted(value for shard in shards for value in list(shard.samples))
+        result = {
+            "calls": calls,
+            "errors": sum(shard.errors for shard in shards),
+            "timed_calls": timed,
+            # Суммарное время оценивается по замеренной доле вызовов
+            "total_ms": total_ns / 1e6 * (calls / timed) if timed else 0.0,
+            "mean_ms": total_ns / timed / 1e6 if timed else 0.0,
+            "max_ms": max((shard.max_ns for shard in shards), default=0) / 1e6,
+        }
+        for percentile in PERCENTILES:
+            value = samples[min(len(samples) - 1, len(samples) * percentile // 100)] if samples else 0
+            result[f"p{percentile}_ms"] = value / 1e6
+        return result
+
+
+class TraceRegistry:
+    """Статистика по всем трассируемым функциям процесса"""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def stats_for(self, name: str) -> FunctionStats:
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = FunctionStats()
+            return stats
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            items = list(self._stats.items())
+        return {name: stats.to_dict() for name, stats in items}
+
+    def to_json(self, indent: int = 2) -> str:
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=indent)
+
+    def export_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+registry = TraceRegistry()
+
+
+def traced(func=None, *, name: str = None, sample_rate: float = None, enabled: bool = None,
+           trace_registry: TraceRegistry = None):
+    """Декоратор для обычных и async-функций; можно как @traced, так и @traced(sample_rate=0.1)"""
+
+    def decorator(func):
+        if not (TRACING_ENABLED if enabled is None else enabled):
+            return func
+
+        stats = (trace_registry or registry).stats_for(name or f"{func.__module__}.{func.__qualname__}")
+        rate = TRACING_SAMPLE_RATE if sample_rate is None else sample_rate
+        period = max(1, round(1 / rate)) if rate > 0 else 2 ** 63
+        count = stats.counter.__next__
+        shard = stats.shard
+        record = stats.record
+        clock = time.perf_counter_ns
+
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                # Корутина выполняется в потоке своего цикла событий, шард берется один раз
+                local = shard()
+                local.calls += 1
+                if count() % period:
+                    try:
+                        return await func(*args, **kwargs)
+                    except BaseException:
+                        local.errors += 1
+                        raise
+                started = clock()
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException:
+                    record(local, clock() - started, True)
+                    raise
+                record(local, clock() - started, False)
+                return result
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            local = shard()
+            local.calls += 1
+            if count() % period:
+                try:
+                    return func(*args, **kwargs)
+                except BaseException:
+                    local.errors += 1
+                    raise
+            started = clock()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                record(local, clock() - started, True)
+                raise
+            record(local, clock() - started, False)
+            return result
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional
+from datetime import datetime
 import uuid
 
 # Базовые схемы
@@ -24,9 +25,9 @@ class StudentUpdate(BaseModel):
 
 # Схема для ответа
 class StudentResponse(StudentBase):
-    uuid: str
-    created_at: str
-    updated_at: str
+    uuid: uuid.UUID
+    created_at: datetime
+    updated_at: datetime
 
     class Config:
         from_attributes = True
@@ -0,0 +1,155 @@
+"""Бенчмарк file_utils против прежних скриптов на readlines().
+
+Генерируются входные файлы заданного размера (по умолчанию 256 МБ):
+текст для копирования и подсчета слов, прайс для суммы, строки с
+повторами для task4. Каждый вариант запускается в отдельном процессе,
+пик памяти - VmHWM процесса (ru_maxrss наследуется от родителя через fork).
+
+Запуск: python bench_files.py [размер, МБ]
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import file_utils
+
+
+def legacy_copy(source, destination):
+    with open(source) as file_source:
+        lines = file_source.readlines()
+        with open(destination, "w") as file_destination:
+            for line in lines:
+                file_destination.write(line)
+
+
+def legacy_sum(path):
+    total = 0
+    with open(path) as file:
+        lines = file.readlines()
+        for line in lines:
+            line = line.split()
+            total += float(line[2])
+    return total
+
+
+def legacy_words(path):
+    quantity = 0
+    with open(path, encoding="utf-8") as file:
+        lines = file.readlines()
+        for line in lines:
+            line = line.split()
+            for item in line:
+                if item != "—":
+                    quantity += 1
+    return quantity
+
+
+def legacy_unique(source, destination):
+    with open(source, encoding="utf-8") as file_input:
+        lines = file_input.readlines()
+        unique_set = set()
+        for line in lines:
+            unique_set.add(line)
+        with open(destination, "w", encoding="utf-8") as file_destination:
+            for line in unique_set:
+                file_destination.write(line)
+    return len(unique_set)
+
+
+CASES = {
+    "copy": (legacy_copy, file_utils.copy_file),
+    "sum": (legacy_sum, file_utils.sum_column),
+    "words": (legacy_words, file_utils.count_words),
+    "unique": (legacy_unique, file_utils.unique_lines),
+}
+
+
+def generate(directory: str, size_mb: int) -> dict:
+    rng = random.Random(0)
+    words = ["Программирование", "—", "это", "увлекательное", "занятие", "Python", "код", "данные", "файл"]
+    target = size_mb * 2 ** 20
+    paths = {name: os.path.join(directory, f"{name}.txt") for name in ("text", "prices", "lines")}
+
+    line_pool = [" ".join(rng.choices(words, k=12)) + "\n" for _ in range(1000)]
+    with open(paths["text"], "w", encoding="utf-8") as file:
+        written = 0
+        while written < target:
+            block = "".join(rng.choices(line_pool, k=1000))
+            file.write(block)
+            written += len(block.encode("utf-8"))
+
+    with open(paths["prices"], "w", encoding="utf-8") as file:
+        written = 0
+        while written < target:
+            block = "".join(f"Товар{rng.randrange(10 ** 6)}\t{rng.randint(1, 9)}\t{rng.randint(1, 999)}\n"
+                            for _ in range(10000))
+            file.write(block)
+            written += len(block.encode("utf-8"))
+
+    # Много разных строк: 60% повторов
+    unique_pool = [f"строка номер {i} " + "x" * 80 + "\n" for i in range(target // 250)]
+    with open(paths["lines"], "w", encoding="utf-8") as file:
+        written = 0
+        while written < target:
+            block = "".join(rng.choices(unique_pool, k=10000))
+            file.write(block)
+            written += len(block.encode("utf-8"))
+    return paths
+
+
+def peak_rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def child(case: str, variant: str, directory: str):
+    legacy, streaming = CASES[case]
+    func = legacy if variant == "legacy" else streaming
+    paths = {name: os.path.join(directory, f"{name}.txt") for name in ("text", "prices", "lines")}
+    args = {
+        "copy": (paths["text"], os.path.join(directory, f"copy_{variant}.txt")),
+        "sum": (paths["prices"],),
+        "words": (paths["text"],),
+        "unique": (paths["lines"], os.path.join(directory, f"unique_{variant}.txt")),
+    }[case]
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({"seconds": elapsed, "result": result,
+                      "peak_mb": peak_rss_mb()}))
+
+
+def main(size_mb: int):
+    with tempfile.TemporaryDirectory() as directory:
+        generate(directory, size_mb)
+        print(f"входные файлы по {size_mb} МБ")
+        print(f"{'задача':<8} {'вариант':<12} {'время, с':>9} {'пик RSS, МБ':>12}")
+        for case in CASES:
+            results = []
+            for variant, label in (("legacy", "readlines"), ("streaming", "file_utils")):
+                output = subprocess.run(
+                    [sys.executable, __file__, "--child", case, variant, directory],
+                    capture_output=True, text=True, check=True,
+                ).stdout
+                r = json.loads(output.strip().splitlines()[-1])
+                results.append(r)
+                print(f"{case:<8} {label:<12} {r['seconds']:>9.2f} {r['peak_mb']:>12.1f}")
+            if case in ("sum", "words", "unique"):
+                assert results[0]["result"] == results[1]["result"], (case, results)
+        with open(os.path.join(directory, "text.txt"), "rb") as a, \
+                open(os.path.join(directory, "copy_streaming.txt"), "rb") as b:
+            assert a.read() == b.read()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3], sys.argv[4])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 256)
@@ -0,0 +1,92 @@
+"""Обработка файлов без загрузки целиком в память.
+
+Все функции читают файл кусками по buffer_size байт (FILE_BUFFER_SIZE по
+умолчанию), поэтому память не зависит от размера входа (у unique_lines -
+только от числа разных строк):
+
+    copy_file     - копирование в ядре через os.sendfile, запасной путь - чтение и запись кусками;
+    sum_column    - сумма числового столбца по строкам (task2);
+    count_words   - число слов, куски текста без разбиения на строки (task3);
+    unique_lines  - строки без повторов в порядке первого появления (task4);
+                    в памяти хранятся 16-байтовые хэши строк, а не сами строки.
+"""
+import hashlib
+import os
+
+FILE_BUFFER_SIZE = int(os.getenv("FILE_BUFFER_SIZE", str(1024 * 1024)))
+# Linux копирует sendfile'ом не больше ~2 ГБ за вызов
+SENDFILE_MAX = 1 << 30
+
+
+def copy_file(source: str, destination: str, buffer_size: int = FILE_BUFFER_SIZE) -> int:
+    """Копирует файл байт в байт; возвращает число скопированных байт"""
+    with open(source, "rb", buffering=0) as src, open(destination, "wb", buffering=0) as dst:
+        size = os.fstat(src.fileno()).st_size
+        copied = 0
+        # У procfs, каналов и символьных устройств st_size == 0 - их копирует только цикл чтения
+        if size and hasattr(os, "sendfile"):
+            try:
+                while copied < size:
+                    sent = os.sendfile(dst.fileno(), src.fileno(), copied, min(SENDFILE_MAX, size - copied))
+                    if sent == 0:
+                        break
+                    copied += sent
+                return copied
+            except OSError:
+                # Файловая система не поддерживает sendfile - дописываем обычным способом
+                src.seek(copied)
+                dst.seek(copied)
+        while True:
+            chunk = src.read(buffer_size)
+            if not chunk:
+                return copied
+            view = memoryview(chunk)
+            # Небуферизованная запись в канал может записать не все
+            while view:
+                view = view[dst.write(view):]
+            copied += len(chunk)
+
+
+def sum_column(path: str, column: int = 2, encoding: str = "utf-8", buffer_size: int = FILE_BUFFER_SIZE) -> float:
+    """Сумма числового столбца (разделитель - пробельные символы); пустые строки пропускаются"""
+    total = 0.0
+    with open(path, encoding=encoding, buffering=buffer_size) as file:
+        for line in file:
+            fields = line.split()
+            if fields:
+                total += float(fields[column])
+    return total
+
+
+def count_words(path: str, encoding: str = "utf-8", buffer_size: int = FILE_BUFFER_SIZE,
+                skip: tuple = ("—",)) -> int:
+    """Число слов, разделенных пробельными символами; токены из skip (тире) не считаются"""
+    count = 0
+    tail = ""
+    with open(path, encoding=encoding) as file:
+        while True:
+            chunk = file.read(buffer_size)
+            if not chunk:
+                break
+            chunk = tail + chunk
+            words = chunk.split()
+            # Слово в конце куска может продолжиться в следующем
+            tail = words.pop() if words and not chunk[-1].isspace() else ""
+            count += len(words) - sum(words.count(token) for token in skip)
+    if tail and tail not in skip:
+        count += 1
+    return count
+
+
+def unique_lines(source: str, destination: str, buffer_size: int = FILE_BUFFER_SIZE) -> int:
+    """Записывает строки source без повторов; возвращает число записанных строк"""
+    seen = set()
+    written = 0
+    with open(source, "rb", buffering=buffer_size) as src, open(destination, "wb", buffering=buffer_size) as dst:
+        for line in src:
+            digest = hashlib.blake2b(line, digest_size=16).digest()
+            if digest not in seen:
+                seen.add(digest)
+                dst.write(line)
+                written += 1
+    return written
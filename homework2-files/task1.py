@@ -1,6 +1,3 @@
+from file_utils import copy_file
 
-with open("files/source.txt") as file_source:
-    lines = file_source.readlines()
-    with open("files/destination.txt", "w") as file_destination:
-        for line in lines:
-            file_destination.write(line)
\ No newline at end of file
+copy_file("files/source.txt", "files/destination.txt")
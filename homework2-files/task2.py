@@ -1,10 +1,5 @@
+from file_utils import sum_column
 
-sum = 0
-
-with open("files/prices.txt") as file:
-    lines = file.readlines()
-    for line in lines:
-        line = line.split()
-        sum += float(line[2])
+sum = sum_column("files/prices.txt", column=2)
 
 print(sum)
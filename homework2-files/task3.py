@@ -1,12 +1,5 @@
+from file_utils import count_words
 
-quantity = 0
+quantity = count_words("files/text_file.txt", encoding="utf-8")
 
-with open("files/text_file.txt", encoding="utf-8") as file:
-    lines = file.readlines()
-    for line in lines:
-        line = line.split()
-        for item in line:
-            if item != "—":
-                quantity += 1
-
-print(quantity)
\ No newline at end of file
+print(quantity)
@@ -0,0 +1,296 @@
+"""Бенчмарк магазина: индексы Store против перебора списка.
+
+Смешанная нагрузка: 70% поиск по артикулу, 25% изменение остатка,
+5% выборка по диапазону цен.
+
+Нагрузочный тест заказов: потоки резервируют наборы товаров и часть заказов
+отменяют; после теста остаток + резервы живых заказов должны совпасть с
+начальным запасом, остаток не может уйти в минус.
+
+Суммы заказов: прежний обход позиций против накопленной суммы в копейках,
+пакетный расчет корзин price_carts.
+
+Журнал событий PersistentStore: заказы из нескольких потоков с group commit
+против fsync на каждое событие, время восстановления со снимком и без.
+
+Запуск: python bench_store.py [число товаров]
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from classes import Order, OutOfStock, Product, Store, price_carts
+from event_store import MAX_BATCH, PersistentStore
+
+
+def scan_get(products, sku):
+    """Прежний способ: перебор Store.products"""
+    for product in products:
+        if product.sku == sku:
+            return product
+    return None
+
+
+def scan_price_range(products, low, high):
+    return sorted((p for p in products if low <= p.price <= high), key=lambda p: p.price)
+
+
+def workload(count: int, operations: int, seed: int = 1):
+    rng = random.Random(seed)
+    for _ in range(operations):
+        roll = rng.random()
+        sku = f"SKU-{rng.randrange(count):07d}"
+        if roll < 0.70:
+            yield "get", sku, None
+        elif roll < 0.95:
+            yield "stock", sku, rng.choice((-1, 1))
+        else:
+            low = rng.randint(1, 99_000)
+            yield "range", low, low + 100
+
+
+def run_indexed(store: Store, operations: list) -> int:
+    found = 0
+    for kind, first, second in operations:
+        if kind == "get":
+            found += store.get_product(first) is not None
+        elif kind == "stock":
+            store.update_stock(first, second)
+        else:
+            found += len(store.products_in_price_range(first, second))
+    return found
+
+
+def run_scan(products: list, operations: list) -> int:
+    found = 0
+    for kind, first, second in operations:
+        if kind == "get":
+            found += scan_get(products, first) is not None
+        elif kind == "stock":
+            scan_get(products, first).update_stock(second)
+        else:
+            found += len(scan_price_range(products, first, second))
+    return found
+
+
+def main(count: int):
+    rng = random.Random(0)
+    store = Store()
+    started = time.perf_counter()
+    for i in range(count):
+        store.add_product(Product(f"Товар {i}", rng.randint(1, 100_000), 1000, sku=f"SKU-{i:07d}"))
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    store.products_in_price_range(0, 0)
+    first_range = time.perf_counter() - started
+
+    indexed_ops = list(workload(count, 100_000))
+    scan_ops = indexed_ops[:50]
+    assert run_indexed(store, scan_ops) == run_scan(store.products, scan_ops)
+
+    started = time.perf_counter()
+    run_indexed(store, indexed_ops)
+    indexed = (time.perf_counter() - started) / len(indexed_ops)
+
+    started = time.perf_counter()
+    run_scan(store.products, scan_ops)
+    scan = (time.perf_counter() - started) / len(scan_ops)
+
+    started = time.perf_counter()
+    pages = sum(1 for _ in store.iter_products())
+    streaming = time.perf_counter() - started
+
+    print(f"{count} товаров: добавление {build:.2f} с, построение индекса цен {first_range * 1000:.0f} мс")
+    print(f"{'смешанная нагрузка, индексы':<36} {indexed * 1e6:>12.2f} мкс/операция")
+    print(f"{'смешанная нагрузка, перебор списка':<36} {scan * 1e6:>12.2f} мкс/операция")
+    print(f"{'обход всех товаров iter_products':<36} {streaming * 1000:>12.1f} мс ({pages} шт)")
+
+
+def naive_add_products(order: Order, items: dict):
+    """Прежний подход: проверка и списание отдельными шагами, без блокировок"""
+    for product, quantity in items.items():
+        if quantity > product.stock:
+            raise OutOfStock(product.name)
+    time.sleep(0)  # переключение потока между проверкой и списанием
+    for product, quantity in items.items():
+        product.stock -= quantity
+        order.positions[product] = order.positions.get(product, 0) + quantity
+
+
+def stress_orders(threads: int, orders_per_thread: int, reserve, products_count: int = 20,
+                  stock: int = 500) -> dict:
+    products = [Product(f"Товар {i}", 100, stock) for i in range(products_count)]
+    kept = []
+    kept_lock = threading.Lock()
+    failed = [0]
+    start = threading.Barrier(threads)
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        mine = []
+        rejected = 0
+        start.wait()
+        for _ in range(orders_per_thread):
+            order = Order()
+            items = {product: rng.randint(1, 3) for product in rng.sample(products, rng.randint(1, 4))}
+            try:
+                reserve(order, items)
+            except OutOfStock:
+                rejected += 1
+                continue
+            if rng.random() < 0.5:
+                order.cancel()
+            else:
+                mine.append(order)
+        with kept_lock:
+            kept.extend(mine)
+            failed[0] += rejected
+
+    pool = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    reserved = {product: 0 for product in products}
+    for order in kept:
+        for product, quantity in order.positions.items():
+            reserved[product] += quantity
+    oversold = sum(max(0, reserved[p] - stock) for p in products)
+    lost = sum(abs(p.stock + reserved[p] - stock) for p in products)
+    return {
+        "orders": threads * orders_per_thread,
+        "rejected": failed[0],
+        "oversold": oversold,
+        "inconsistent": lost,
+        "negative": sum(p.stock < 0 for p in products),
+        "rate": threads * orders_per_thread / elapsed,
+    }
+
+
+def bench_orders(orders_per_thread: int = 5000):
+    # Частое переключение потоков, чтобы гонки проявлялись за время теста
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        run_orders(orders_per_thread)
+    finally:
+        sys.setswitchinterval(interval)
+
+
+def run_orders(orders_per_thread: int):
+    print("\nзаказы из нескольких товаров, 50% отмен")
+    print(f"{'вариант':<28} {'потоков':>7} {'отказов':>8} {'перепродано':>11} {'расхождение':>11} {'заказов/с':>10}")
+    cases = [("add_products (блокировки)", lambda order, items: order.add_products(items))] * 4
+    cases.append(("без блокировок", naive_add_products))
+    for (label, reserve), threads in zip(cases, (1, 2, 4, 8, 8)):
+        result = stress_orders(threads, orders_per_thread, reserve)
+        print(f"{label:<28} {threads:>7} {result['rejected']:>8} {result['oversold']:>11} "
+              f"{result['inconsistent']:>11} {result['rate']:>10.0f}")
+        if reserve is not naive_add_products:
+            assert result["oversold"] == result["inconsistent"] == result["negative"] == 0, result
+
+
+def legacy_total(order: Order):
+    """Прежний calculate_total: обход всех позиций при каждом вызове"""
+    total = 0
+    for product, quantity in order.positions.items():
+        total += product.price * quantity
+    return total
+
+
+def bench_totals(positions: int = 1000, repeat: int = 2000, carts: int = 100_000):
+    rng = random.Random(0)
+    products = [Product(f"Товар {i}", f"{rng.randint(1, 99999) / 100:.2f}", 10 ** 9) for i in range(positions)]
+    order = Order()
+    for product in products:
+        order.add_product(product, rng.randint(1, 5))
+    assert order.calculate_total() == legacy_total(order)
+
+    def measure(func, count):
+        started = time.perf_counter()
+        for _ in range(count):
+            func()
+        return (time.perf_counter() - started) / count
+
+    print(f"\nзаказ из {positions} позиций, повторный расчет суммы")
+    print(f"{'обход позиций (Decimal)':<36} {measure(lambda: legacy_total(order), 200) * 1e6:>10.2f} мкс")
+    print(f"{'накопленная сумма':<36} {measure(order.calculate_total, repeat) * 1e6:>10.2f} мкс")
+
+    baskets = [{product: rng.randint(1, 3) for product in rng.sample(products, 10)} for _ in range(carts)]
+    started = time.perf_counter()
+    decimal_totals = [sum(product.price * quantity for product, quantity in cart.items()) for cart in baskets]
+    per_cart = time.perf_counter() - started
+    started = time.perf_counter()
+    batch_totals = price_carts(baskets)
+    batch = time.perf_counter() - started
+    assert decimal_totals == batch_totals
+    print(f"\n{carts} корзин по 10 товаров")
+    print(f"{'Decimal по каждой позиции':<36} {per_cart * 1000:>10.1f} мс")
+    print(f"{'price_carts (копейки, int)':<36} {batch * 1000:>10.1f} мс")
+
+
+def persist_orders(directory: str, threads: int, orders_per_thread: int, **options) -> float:
+    """Заказы из нескольких потоков в PersistentStore; возвращает заказов в секунду"""
+    shop = PersistentStore(directory, **options)
+    skus = [shop.add_product(Product(f"Товар {i}", 100, 10 ** 9, sku=f"SKU-{i}")).sku for i in range(100)]
+    start = threading.Barrier(threads + 1)
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        start.wait()
+        for _ in range(orders_per_thread):
+            order_id = shop.place_order({sku: rng.randint(1, 3) for sku in rng.sample(skus, 3)})
+            if rng.random() < 0.2:
+                shop.cancel_order(order_id)
+
+    pool = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in pool:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    shop.close()
+    return threads * orders_per_thread / elapsed
+
+
+def reopen(directory: str, **options):
+    started = time.perf_counter()
+    shop = PersistentStore(directory, **options)
+    elapsed = time.perf_counter() - started
+    shop.close()
+    return shop, elapsed
+
+
+def bench_event_store(threads: int = 16, orders_per_thread: int = 500):
+    print(f"\nжурнал заказов: {threads} потоков x {orders_per_thread} заказов, 20% отмен")
+    with tempfile.TemporaryDirectory() as root:
+        for label, batch in (("group commit", MAX_BATCH), ("fsync на каждое событие", 1)):
+            rate = persist_orders(os.path.join(root, str(batch)), threads, orders_per_thread, max_batch=batch)
+            print(f"{label:<36} {rate:>10.0f} заказов/с")
+
+        # Восстановление: весь журнал против снимка + хвоста
+        full = os.path.join(root, "full")
+        snap = os.path.join(root, "snap")
+        persist_orders(full, 8, 5000, fsync=False, snapshot_every=10 ** 9)
+        persist_orders(snap, 8, 5000, fsync=False, snapshot_every=5000)
+        replay_full, full_time = reopen(full, snapshot_every=10 ** 9)
+        replay_snap, snap_time = reopen(snap, snapshot_every=5000)
+        assert replay_full.total_reserved() == replay_snap.total_reserved()
+        print(f"{'восстановление из журнала':<36} {full_time * 1000:>10.0f} мс ({replay_full.replayed} событий)")
+        print(f"{'восстановление из снимка':<36} {snap_time * 1000:>10.0f} мс ({replay_snap.replayed} событий)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
+    bench_orders()
+    bench_totals()
+    bench_event_store()
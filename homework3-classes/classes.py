@@ -1,81 +1,292 @@
+import threading
+from bisect import bisect_left, bisect_right
+from contextlib import ExitStack
+from decimal import ROUND_HALF_UP, Decimal
+
+PAGE_SIZE = 50
+CENT = Decimal("0.01")
+
+
+def to_money(value):
+    """Денежная сумма: Decimal с точностью до копейки (float переводится через str, без двоичной погрешности)"""
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def to_cents(value):
+    return int(to_money(value) * 100)
+
+
+def from_cents(cents):
+    return Decimal(cents).scaleb(-2)
+
+
+def price_key(product):
+    return product.price
+
+
+class OutOfStock(Exception):
+    pass
+
 
 class Product:
-    def __init__(self, name, price, stock):
+    def __init__(self, name, price, stock, sku=None):
         self.name = name
-        self.price = price
+        self.price = to_money(price)
         self.stock = stock
+        # Артикул; если не задан, товар идентифицируется названием
+        self.sku = sku if sku is not None else name
+        # Все изменения остатка - под блокировкой товара
+        self.lock = threading.Lock()
 
     def update_stock(self, quantity):
         quantity = int(quantity)
-        if self.stock + quantity >= 0:
+        with self.lock:
+            if self.stock + quantity >= 0:
+                self.stock += quantity
+            else:
+                raise ValueError('Количество товара не может быть отрицательным')
+
+    def _check_available(self, quantity):
+        if quantity > self.stock:
+            raise OutOfStock(f"Недостаточно товара '{self.name}' на складе. Доступно: {self.stock}")
+
+    def reserve(self, quantity):
+        """Атомарно списывает quantity со склада или бросает OutOfStock"""
+        with self.lock:
+            self._check_available(quantity)
+            self.stock -= quantity
+
+    def release(self, quantity):
+        """Возвращает зарезервированное количество на склад"""
+        with self.lock:
             self.stock += quantity
-        else:
-            raise ValueError('Количество товара не может быть отрицательным')
+
+
+def check_quantity(quantity):
+    if quantity <= 0:
+        raise ValueError('Количество товара в заказе должно быть положительным')
+
 
 class Order:
     def __init__(self):
         self.positions = {}
+        # Цена фиксируется при первом добавлении товара; сумма заказа
+        # поддерживается в копейках и меняется на каждой операции за O(1)
+        self.unit_cents = {}
+        self.total_cents = 0
+        self._lock = threading.Lock()
+
+    def _add_position(self, product, quantity):
+        """Учет уже зарезервированного количества; вызывается под self._lock"""
+        cents = self.unit_cents.get(product)
+        if cents is None:
+            cents = self.unit_cents[product] = to_cents(product.price)
+        self.positions[product] = self.positions.get(product, 0) + quantity
+        self.total_cents += cents * quantity
 
     def add_product(self, product, quantity):
-        """Добавляет товар в заказ"""
-        if quantity <= product.stock:
-            self.positions[product] = quantity
-            product.stock -= quantity
-        else:
-            raise Exception(f"Недостаточно товара '{product.name}' на складе. Доступно: {product.stock}")
+        """Добавляет товар в заказ; повторное добавление увеличивает количество"""
+        check_quantity(quantity)
+        product.reserve(quantity)
+        with self._lock:
+            self._add_position(product, quantity)
+
+    def add_products(self, items):
+        """Резервирует несколько товаров по принципу «все или ничего».
+
+        items - словарь {товар: количество}. Блокировки товаров берутся в одном
+        порядке (по id), поэтому встречные заказы не могут взаимно заблокироваться.
+        """
+        for quantity in items.values():
+            check_quantity(quantity)
+        ordered = sorted(items, key=id)
+        with ExitStack() as stack:
+            for product in ordered:
+                stack.enter_context(product.lock)
+            for product in ordered:
+                product._check_available(items[product])
+            for product in ordered:
+                product.stock -= items[product]
+        with self._lock:
+            for product, quantity in items.items():
+                self._add_position(product, quantity)
+
+    def remove_product(self, product):
+        """Убирает товар из заказа и возвращает его на склад"""
+        with self._lock:
+            quantity = self.positions.pop(product, 0)
+            self.total_cents -= self.unit_cents.pop(product, 0) * quantity
+        if quantity:
+            product.release(quantity)
+
+    def set_quantity(self, product, quantity):
+        """Меняет количество товара в заказе; 0 - убрать товар"""
+        if quantity == 0:
+            self.remove_product(product)
+            return
+        check_quantity(quantity)
+        with self._lock:
+            delta = quantity - self.positions.get(product, 0)
+            if delta > 0:
+                product.reserve(delta)
+                self._add_position(product, delta)
+            elif delta < 0:
+                self.positions[product] = quantity
+                self.total_cents += self.unit_cents[product] * delta
+        if delta < 0:
+            product.release(-delta)
+
+    def cancel(self):
+        """Отменяет заказ и возвращает все резервы на склад"""
+        with self._lock:
+            positions, self.positions = self.positions, {}
+            self.unit_cents = {}
+            self.total_cents = 0
+        for product, quantity in positions.items():
+            product.release(quantity)
 
     def calculate_total(self):
-        """Рассчитывает стоимость заказа"""
+        """Стоимость заказа (Decimal) по зафиксированным ценам - без обхода позиций"""
+        return from_cents(self.total_cents)
+
+
+def price_carts(carts):
+    """Стоимость многих корзин {товар: количество} по текущим ценам за один проход.
+
+    Цена каждого товара переводится в копейки один раз на весь пакет, дальше
+    считается только в целых числах; в Decimal переводится итог корзины.
+    """
+    cents = {}
+    totals = []
+    for cart in carts:
         total = 0
-        for product, quantity in self.positions.items():
-            total += product.price * quantity
-        return total
+        for product, quantity in cart.items():
+            unit = cents.get(product)
+            if unit is None:
+                unit = cents[product] = to_cents(product.price)
+            total += unit * quantity
+        totals.append(from_cents(total))
+    return totals
 
 class Store:
     def __init__(self):
         self.products = []
+        self._by_sku = {}
+        self._by_name = {}
+        # Индекс по цене строится лениво: новые товары копятся в _price_pending
+        # и вливаются в отсортированный список при первом запросе по цене
+        self._by_price = []
+        self._price_pending = []
+        self._price_stale = False
 
     def add_product(self, product):
         """Добавляет товар в магазин"""
+        if product.sku in self._by_sku:
+            raise ValueError(f"Товар с артикулом '{product.sku}' уже есть в магазине")
         self.products.append(product)
+        self._by_sku[product.sku] = product
+        self._by_name.setdefault(product.name, product)
+        self._price_pending.append(product)
+
+    def get_product(self, sku):
+        """Товар по артикулу или None"""
+        return self._by_sku.get(sku)
+
+    def find_by_name(self, name):
+        """Товар по названию (первый добавленный) или None"""
+        return self._by_name.get(name)
 
-    def list_products(self):
-        """Показывает все товары в магазине"""
-        print(f"Наименование товара ----- Цена -------- Количество")
-        for product in self.products:
-            print(f"{product.name} ----- {product.price} ----- {product.stock}")
+    def update_stock(self, sku, quantity):
+        """Изменяет остаток товара по артикулу"""
+        product = self._by_sku.get(sku)
+        if product is None:
+            raise KeyError(f"Нет товара с артикулом '{sku}'")
+        product.update_stock(quantity)
+        return product
+
+    def update_price(self, sku, price):
+        """Меняет цену; менять price напрямую нельзя - индекс по цене устареет"""
+        product = self._by_sku.get(sku)
+        if product is None:
+            raise KeyError(f"Нет товара с артикулом '{sku}'")
+        product.price = to_money(price)
+        self._price_stale = True
+        return product
+
+    def _price_index(self):
+        if self._price_stale:
+            self._by_price = sorted(self.products, key=price_key)
+            self._price_pending = []
+            self._price_stale = False
+        elif self._price_pending:
+            # Два отсортированных куска Timsort сливает за линейное время
+            self._price_pending.sort(key=price_key)
+            self._by_price.extend(self._price_pending)
+            self._by_price.sort(key=price_key)
+            self._price_pending = []
+        return self._by_price
+
+    def products_in_price_range(self, low=None, high=None):
+        """Товары с ценой в диапазоне [low, high], по возрастанию цены"""
+        index = self._price_index()
+        start = 0 if low is None else bisect_left(index, low, key=price_key)
+        end = len(index) if high is None else bisect_right(index, high, key=price_key)
+        return index[start:end]
+
+    def iter_products(self, offset=0, limit=None):
+        """Товары по порядку добавления, без копирования всего списка"""
+        end = len(self.products) if limit is None else min(len(self.products), offset + limit)
+        for i in range(offset, end):
+            yield self.products[i]
+
+    def list_products(self, page=1, page_size=PAGE_SIZE):
+        """Страница товаров (нумерация с 1)"""
+        return list(self.iter_products((page - 1) * page_size, page_size))
 
     def create_order(self):
         """Создает новый заказ"""
         return Order()
 
-# Задача: Модель магазина
 
-# Создаем магазин
-store = Store()
+def print_products(products):
+    print(f"Наименование товара ----- Цена -------- Количество")
+    for product in products:
+        print(f"{product.name} ----- {product.price} ----- {product.stock}")
+
+
+if __name__ == "__main__":
+    # Задача: Модель магазина
+
+    # Создаем магазин
+    store = Store()
+
+    # Создаем товары
+    product1 = Product("Ноутбук", 1000, 5)
+    product2 = Product("Смартфон", 500, 10)
 
-# Создаем товары
-product1 = Product("Ноутбук", 1000, 5)
-product2 = Product("Смартфон", 500, 10)
+    # Добавляем товары в магазин
+    store.add_product(product1)
+    store.add_product(product2)
 
-# Добавляем товары в магазин
-store.add_product(product1)
-store.add_product(product2)
+    # Список всех товаров
+    print_products(store.iter_products())
 
-# Список всех товаров
-store.list_products()
+    # Создаем заказ
+    order = store.create_order()
 
-# Создаем заказ
-order = store.create_order()
+    # Добавляем товары в заказ
+    order.add_product(product1, 2)
+    order.add_product(product2, 3)
 
-# Добавляем товары в заказ
-order.add_product(product1, 2)
-order.add_product(product2, 3)
+    # Выводим общую стоимость заказа
+    total = order.calculate_total()
+    print(f"Общая стоимость заказа: {total}")
 
-# Выводим общую стоимость заказа
-total = order.calculate_total()
-print(f"Общая стоимость заказа: {total}")
+    # Проверяем остатки на складе после заказа
+    print_products(store.iter_products())
 
-# Проверяем остатки на складе после заказа
-store.list_products()
+    # Товары дешевле 600
+    print_products(store.products_in_price_range(high=600))
 
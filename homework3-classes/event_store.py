@@ -0,0 +1,311 @@
+"""Сохранение магазина на диск: журнал событий и снимки состояния.
+
+Каждое изменение (добавление товара, изменение остатка или цены, заказ,
+отмена) применяется к Store в памяти и дописывается событием в журнал JSONL.
+Журнал пишет отдельный поток: он забирает все накопившиеся события и
+делает один fsync на пачку (group commit), вызывающий поток ждет только
+своего подтверждения.
+
+Каждые SNAPSHOT_EVERY событий состояние сохраняется снимком, а журнал
+начинается с нового файла. При старте читается снимок и только более
+новые файлы журнала. Старые файлы не удаляются - это история для аудита.
+"""
+import json
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+from classes import Order, Product, Store, from_cents
+
+EVENTS_DIR = os.getenv("SHOP_EVENTS_DIR", "shop_events")
+SNAPSHOT_EVERY = int(os.getenv("SHOP_SNAPSHOT_EVERY", "10000"))
+MAX_BATCH = 1024
+SNAPSHOT_FILE = "snapshot.json"
+LOG_PREFIX = "events_"
+LOG_SUFFIX = ".jsonl"
+
+_ROLL = object()
+
+
+def log_name(first_seq):
+    return f"{LOG_PREFIX}{first_seq:012d}{LOG_SUFFIX}"
+
+
+def log_files(directory):
+    """Пары (номер первого события, путь) в порядке записи"""
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(LOG_PREFIX) and name.endswith(LOG_SUFFIX)
+    )
+    return [(int(name[len(LOG_PREFIX):-len(LOG_SUFFIX)]), os.path.join(directory, name)) for name in names]
+
+
+class EventLog:
+    """Журнал с одним потоком-писателем и group commit"""
+
+    def __init__(self, directory, first_seq, fsync=True, max_batch=MAX_BATCH):
+        self.directory = directory
+        self.fsync = fsync
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._file = self._open(first_seq)
+        self._thread = threading.Thread(target=self._writer, name="event-log-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, event):
+        """Ставит событие в очередь; Future завершается после fsync"""
+        future = Future()
+        self._queue.put((event, future))
+        return future
+
+    def roll(self, first_seq):
+        """Следующие события пойдут в новый файл (после снимка)"""
+        self._queue.put((_ROLL, first_seq))
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def _open(self, first_seq):
+        path = os.path.join(self.directory, log_name(first_seq))
+        f = open(path, "ab")
+        f.seek(0, os.SEEK_END)
+        # Файл уже был (перезапуск): недописанная после сбоя строка завершается переводом строки,
+        # иначе следующее событие склеится с ней и пропадет при восстановлении
+        if f.tell() > 0:
+            with open(path, "rb") as existing:
+                existing.seek(-1, os.SEEK_END)
+                torn = existing.read(1) != b"\n"
+            if torn:
+                f.write(b"\n")
+                f.flush()
+        return f
+
+    def _writer(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            pending = []
+            for item in batch:
+                if item is None:
+                    stopping = True
+                    break
+                event, target = item
+                if event is _ROLL:
+                    self._flush(pending)
+                    pending = []
+                    self._file.close()
+                    self._file = self._open(target)
+                else:
+                    pending.append(item)
+            self._flush(pending)
+
+    def _flush(self, pending):
+        if not pending:
+            return
+        try:
+            self._file.write(b"".join(
+                json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n" for event, _ in pending
+            ))
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+        else:
+            for _, future in pending:
+                future.set_result(None)
+
+
+class PersistentStore:
+    """Store с журналом событий; все изменения - только через методы этого класса"""
+
+    def __init__(self, directory=EVENTS_DIR, snapshot_every=SNAPSHOT_EVERY, fsync=True, max_batch=MAX_BATCH):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.store = Store()
+        self.orders = {}
+        self._next_order_id = 1
+        self._seq = 0
+        self._snapshot_seq = 0
+        # Применение события и присвоение ему номера - под одной блокировкой,
+        # поэтому порядок в журнале совпадает с порядком изменений в памяти
+        self._lock = threading.Lock()
+        # Снимки пишутся вне основной блокировки, но по одному и только более новые
+        self._snapshot_lock = threading.Lock()
+        self._written_seq = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.replayed = self._load()
+        # После перезапуска журнал всегда продолжается новым файлом
+        self._log = EventLog(directory, self._seq + 1, fsync=fsync, max_batch=max_batch)
+
+    # Команды
+
+    def add_product(self, product):
+        self._commit({
+            "type": "ProductAdded",
+            "sku": product.sku,
+            "name": product.name,
+            "price": str(product.price),
+            "stock": product.stock,
+        })
+        return self.store.get_product(product.sku)
+
+    def adjust_stock(self, sku, quantity):
+        self._commit({"type": "StockAdjusted", "sku": sku, "quantity": quantity})
+
+    def update_price(self, sku, price):
+        self._commit({"type": "PriceChanged", "sku": sku, "price": str(price)})
+
+    def place_order(self, items):
+        """Заказ {артикул: количество} целиком или OutOfStock; возвращает номер заказа"""
+        event = {"type": "OrderPlaced", "items": [[sku, quantity] for sku, quantity in items.items()]}
+        self._commit(event)
+        return event["order_id"]
+
+    def cancel_order(self, order_id):
+        self._commit({"type": "OrderCancelled", "order_id": order_id})
+
+    def close(self):
+        self._log.close()
+
+    def _commit(self, event):
+        with self._lock:
+            if event["type"] == "OrderPlaced":
+                event["order_id"] = self._next_order_id
+            self._apply(event)
+            self._seq += 1
+            event["seq"] = self._seq
+            future = self._log.append(event)
+
+            state = None
+            if self._seq - self._snapshot_seq >= self.snapshot_every:
+                state = self._state()
+                self._log.roll(self._seq + 1)
+                self._snapshot_seq = self._seq
+        if state is not None:
+            self._write_snapshot(state)
+        future.result()
+
+    # Применение событий - общее для команд и восстановления
+
+    def _apply(self, event):
+        kind = event["type"]
+        if kind == "ProductAdded":
+            self.store.add_product(Product(event["name"], event["price"], event["stock"], sku=event["sku"]))
+        elif kind == "StockAdjusted":
+            self.store.update_stock(event["sku"], event["quantity"])
+        elif kind == "PriceChanged":
+            self.store.update_price(event["sku"], event["price"])
+        elif kind == "OrderPlaced":
+            items = {}
+            for sku, quantity in event["items"]:
+                product = self.store.get_product(sku)
+                if product is None:
+                    raise KeyError(f"Нет товара с артикулом '{sku}'")
+                items[product] = items.get(product, 0) + quantity
+            order = Order()
+            order.add_products(items)
+            self.orders[event["order_id"]] = order
+            self._next_order_id = event["order_id"] + 1
+        elif kind == "OrderCancelled":
+            order = self.orders.pop(event["order_id"], None)
+            if order is None:
+                raise KeyError(f"Нет заказа {event['order_id']}")
+            order.cancel()
+        else:
+            raise ValueError(f"Неизвестное событие {kind}")
+
+    # Снимки и восстановление
+
+    def _state(self):
+        return {
+            "seq": self._seq,
+            "next_order_id": self._next_order_id,
+            "products": [
+                [p.sku, p.name, str(p.price), p.stock] for p in self.store.products
+            ],
+            "orders": [
+                [order_id, [[p.sku, quantity, order.unit_cents[p]] for p, quantity in order.positions.items()]]
+                for order_id, order in self.orders.items()
+            ],
+        }
+
+    def _write_snapshot(self, state):
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        with self._snapshot_lock:
+            if state["seq"] <= self._written_seq:
+                return
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+            self._written_seq = state["seq"]
+
+    def snapshot(self):
+        """Внеочередной снимок"""
+        with self._lock:
+            state = self._state()
+            self._log.roll(self._seq + 1)
+            self._snapshot_seq = self._seq
+        self._write_snapshot(state)
+
+    def _restore(self, state):
+        self._seq = self._snapshot_seq = self._written_seq = state["seq"]
+        self._next_order_id = state["next_order_id"]
+        for sku, name, price, stock in state["products"]:
+            self.store.add_product(Product(name, price, stock, sku=sku))
+        for order_id, positions in state["orders"]:
+            # Остатки в снимке уже учитывают резервы, поэтому позиции восстанавливаются без списания
+            order = Order()
+            for sku, quantity, cents in positions:
+                product = self.store.get_product(sku)
+                order.positions[product] = quantity
+                order.unit_cents[product] = cents
+                order.total_cents += cents * quantity
+            self.orders[order_id] = order
+
+    def _load(self):
+        """Снимок + события после него; возвращает число примененных событий"""
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._restore(json.load(f))
+
+        files = log_files(self.directory)
+        # Начинаем с последнего файла, открытого не позже события после снимка
+        start = 0
+        for i, (first_seq, _) in enumerate(files):
+            if first_seq <= self._seq + 1:
+                start = i
+        replayed = 0
+        for _, file_path in files[start:]:
+            with open(file_path, "rb") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue  # недописанная строка после сбоя
+                    if event["seq"] <= self._seq:
+                        continue
+                    self._apply(event)
+                    self._seq = event["seq"]
+                    replayed += 1
+        return replayed
+
+    def total_reserved(self):
+        """Сумма всех открытых заказов"""
+        return from_cents(sum(order.total_cents for order in self.orders.values()))
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from classes import Product
+from event_store import PersistentStore, log_files
+
+
+@pytest.fixture
+def events_dir(tmp_path):
+    return str(tmp_path / "shop_events")
+
+
+class TestPersistentStore:
+    """Тесты журнала событий магазина"""
+
+    def test_restart_replays_events(self, events_dir):
+        """Тест восстановления остатков и заказов после перезапуска"""
+        # Arrange
+        store = PersistentStore(events_dir, fsync=False)
+        product = store.add_product(Product("Молоко", "89.90", 10))
+        order_id = store.place_order({product.sku: 3})
+        store.adjust_stock(product.sku, 5)
+        store.close()
+
+        # Act
+        restarted = PersistentStore(events_dir, fsync=False)
+
+        # Assert
+        assert restarted.store.get_product(product.sku).stock == 12
+        assert order_id in restarted.orders
+        restarted.close()
+
+    def test_restart_after_snapshot(self, events_dir):
+        """Тест восстановления из снимка и более новых файлов журнала"""
+        # Arrange
+        store = PersistentStore(events_dir, snapshot_every=3, fsync=False)
+        product = store.add_product(Product("Хлеб", "45.00", 100))
+        for _ in range(7):
+            store.adjust_stock(product.sku, -1)
+        store.close()
+
+        # Act
+        restarted = PersistentStore(events_dir, snapshot_every=3, fsync=False)
+
+        # Assert
+        assert restarted.store.get_product(product.sku).stock == 93
+        assert restarted.replayed < 8
+        restarted.close()
+
+    def test_torn_tail_of_rolled_file(self, events_dir):
+        """Тест: недописанная первая строка нового файла журнала не склеивается со следующим событием"""
+        # Arrange: снимок после 2 событий, третье событие - первое в новом файле, и оно оборвано
+        store = PersistentStore(events_dir, snapshot_every=2, fsync=False)
+        product = store.add_product(Product("Сыр", "500.00", 100))
+        store.adjust_stock(product.sku, 5)
+        store.adjust_stock(product.sku, 1)
+        store.close()
+        first_seq, path = log_files(events_dir)[-1]
+        with open(path, "rb") as f:
+            lines = f.read().splitlines(keepends=True)
+        assert first_seq == 3 and len(lines) == 1
+        with open(path, "wb") as f:
+            f.write(lines[0][:len(lines[0]) // 2])
+
+        # Act: после перезапуска журнал продолжается тем же файлом
+        store = PersistentStore(events_dir, snapshot_every=2, fsync=False)
+        store.adjust_stock(product.sku, 2)
+        store.close()
+        restarted = PersistentStore(events_dir, snapshot_every=2, fsync=False)
+
+        # Assert: подтвержденное событие не потерялось
+        assert restarted.store.get_product(product.sku).stock == 107
+        with open(path, "rb") as f:
+            assert json.loads(f.read().splitlines()[-1])["quantity"] == 2
+        restarted.close()
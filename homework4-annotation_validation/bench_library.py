@@ -0,0 +1,154 @@
+"""Бенчмарки библиотеки.
+
+Поиск: перебор списка против индексов Library.
+Память: Library из моделей Book против компактного Catalogue.
+Трассировка: накладные расходы прежнего log_operation и @traced.
+
+Запуск: python bench_library.py [число книг]
+"""
+import contextlib
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from functools import wraps
+
+import manage_library
+from catalogue import Catalogue
+from manage_library import Book, Library
+from tracing import TraceRegistry, traced
+
+AUTHORS = [f"Автор {i}" for i in range(10000)]
+CATEGORIES = ["Классика", "Ужасы", "Фантастика", "Детектив", "Поэзия", "Наука"]
+
+
+def scan_find_book(library: Library, title: str) -> bool:
+    """Прежний find_book: линейный перебор library.books"""
+    for book in library.books:
+        if book.title == title:
+            return True
+    return False
+
+
+def scan_by_author(library: Library, author: str) -> list:
+    return [book for book in library.books if book.author == author]
+
+
+def measure(func, items) -> float:
+    started = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - started) / len(items)
+
+
+def main(count: int):
+    rng = random.Random(0)
+    library = Library()
+    manage_library.library = library
+
+    started = time.perf_counter()
+    for i in range(count):
+        manage_library.add_book(
+            f"Книга {i}", rng.choice(AUTHORS), rng.randint(1800, 2024), [rng.choice(CATEGORIES)]
+        )
+    build = time.perf_counter() - started
+
+    # Перебор медленный - для него хватает 20 поисков, для индексов берется 10000
+    titles = [f"Книга {rng.randrange(count)}" for _ in range(10000)]
+    authors = [rng.choice(AUTHORS) for _ in range(10000)]
+    cases = [
+        ("find_book: перебор списка", measure(lambda title: scan_find_book(library, title), titles[:20])),
+        ("find_book: индекс по названию", measure(manage_library.find_book, titles)),
+        ("по автору: перебор списка", measure(lambda author: scan_by_author(library, author), authors[:20])),
+        ("по автору: индекс", measure(library.books_by_author, authors)),
+    ]
+    assert all(manage_library.find_book(title) for title in titles)
+    assert all(len(scan_by_author(library, a)) == len(library.books_by_author(a)) for a in authors[:3])
+
+    print(f"{count} книг, добавление с индексами: {build:.1f} с ({build / count * 1e6:.2f} мкс/книга)")
+    for label, elapsed in cases:
+        print(f"{label:<32} {elapsed * 1e6:>14.2f} мкс/поиск")
+
+
+def generate_books(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(count):
+        categories = rng.sample(CATEGORIES, rng.randint(1, 3))
+        yield f"Книга {i}", rng.choice(AUTHORS), rng.randint(1800, 2024), categories
+
+
+def bench_memory(count: int):
+    """Байт на книгу по tracemalloc: названия и авторы в обоих вариантах одни и те же строки"""
+    rows = list(generate_books(count))
+
+    def measure_memory(build) -> float:
+        gc.collect()
+        tracemalloc.start()
+        storage = build()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert len(getattr(storage, "books", storage)) == count
+        return size / count
+
+    def build_library():
+        library = Library()
+        for title, author, year, categories in rows:
+            library.add_book(Book(title=title, author=author, year=year, available=True, categories=categories))
+        return library
+
+    def build_catalogue():
+        catalogue = Catalogue()
+        for title, author, year, categories in rows:
+            catalogue.add_book(title, author, year, categories)
+        return catalogue
+
+    print(f"\nпамять на {count} книг (без учета самих строк названий и авторов)")
+    for label, build in (("Library, модели Book + индексы", build_library), ("Catalogue", build_catalogue)):
+        print(f"{label:<32} {measure_memory(build):>10.1f} байт/книга")
+
+
+def log_operation(func):
+    """Прежний декоратор: два print на каждый вызов"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        print(f"Выполняется операция: {func.__name__}")
+        result = func(*args, **kwargs)
+        print(f"Операция {func.__name__} завершена")
+        return result
+    return wrapper
+
+
+def bench_tracing(calls: int = 200_000, repeat: int = 5):
+    """Стоимость вызова с разными обертками (print уходит в /dev/null), лучший из repeat прогонов"""
+    library = Library(books=[Book(title="Книга", author="Автор", year=2000, available=True)])
+    trace_registry = TraceRegistry()
+
+    def noop(title: str) -> bool:
+        return True
+
+    args = ["Книга"] * calls
+    for label, plain in (("пустая функция", noop), ("library.return_book", library.return_book)):
+        cases = [
+            ("без обертки", plain),
+            ("log_operation (print)", log_operation(plain)),
+            ("@traced, выключен", traced(plain, enabled=False)),
+            ("@traced, все вызовы", traced(plain, name=label, enabled=True, trace_registry=trace_registry)),
+            ("@traced, выборка 1%", traced(plain, name=f"{label}, 1%", enabled=True, sample_rate=0.01,
+                                            trace_registry=trace_registry)),
+        ]
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            results = [(case, min(measure(func, args) for _ in range(repeat))) for case, func in cases]
+        print(f"\n{label}, {calls} вызовов")
+        for case, elapsed in results:
+            print(f"{case:<32} {elapsed * 1e9:>10.0f} нс/вызов")
+    print(trace_registry.to_json())
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    main(count)
+    bench_memory(min(count, 200_000))
+    bench_tracing()
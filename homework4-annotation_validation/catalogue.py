@@ -0,0 +1,136 @@
+"""Компактный каталог книг для миллионов записей.
+
+Книга не хранится отдельным объектом: каждая колонка - свой массив
+(struct-of-arrays), строка каталога - индекс в этих массивах.
+Авторы и категории интернированы и хранятся номерами, категории книги -
+срез общего массива номеров (CSR: смещения + значения), доступность -
+битовый массив. Pydantic-модель Book используется только на входе
+(валидация) и на выходе (book()).
+"""
+import threading
+from array import array
+from typing import Dict, List, Optional
+
+from manage_library import LOCK_STRIPES, Book, BookNotAvailable
+
+# Номера категорий хранятся в 2 байтах
+MAX_CATEGORIES = 0xFFFF
+
+
+class Interner:
+    """Строка <-> номер; каждая строка хранится один раз"""
+    __slots__ = ("values", "ids")
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class Catalogue:
+    """Каталог книг в виде колонок; книга адресуется номером строки.
+
+    Выдача и возврат потокобезопасны, добавление книг - из одного потока.
+    """
+
+    def __init__(self):
+        self.titles: List[str] = []
+        self.authors = Interner()
+        self.categories = Interner()
+        self.author_ids = array("I")
+        self.years = array("i")
+        # Категории книги row: category_ids[category_offsets[row]:category_offsets[row + 1]]
+        self.category_offsets = array("I", [0])
+        self.category_ids = array("H")
+        self._available = bytearray()
+        # Изменение бита - чтение и запись всего байта, поэтому блокировка выбирается по байту
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        # Индекс по названию: при одинаковых названиях - первая книга, как в Library
+        self._by_title: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def add(self, book: Book) -> int:
+        """Добавление уже провалидированной книги; возвращает номер строки"""
+        # Все значения вычисляются до записи в колонки, чтобы ошибка не оставила неполную строку
+        category_ids = [self.categories.intern(category) for category in book.categories]
+        if category_ids and max(category_ids) > MAX_CATEGORIES:
+            raise ValueError(f"Catalogue supports at most {MAX_CATEGORIES + 1} categories")
+        author_id = self.authors.intern(book.author)
+        year = array("i", [book.year])
+
+        row = len(self.titles)
+        self.titles.append(book.title)
+        self._by_title.setdefault(book.title, row)
+        self.author_ids.append(author_id)
+        self.years.extend(year)
+        self.category_ids.extend(category_ids)
+        self.category_offsets.append(len(self.category_ids))
+        if row % 8 == 0:
+            self._available.append(0)
+        if book.available:
+            self.set_available(row, True)
+        return row
+
+    def add_book(self, title: str, author: str, year: int, categories: List[str] = None,
+                 available: bool = True) -> int:
+        """Добавление с валидацией через модель Book"""
+        return self.add(Book(
+            title=title,
+            author=author,
+            year=year,
+            available=available,
+            categories=categories if categories is not None else [],
+        ))
+
+    def find(self, title: str) -> Optional[int]:
+        return self._by_title.get(title)
+
+    def book(self, row: int) -> Book:
+        """Модель Book для строки каталога (данные уже проверены при добавлении)"""
+        start, end = self.category_offsets[row], self.category_offsets[row + 1]
+        return Book.model_construct(
+            title=self.titles[row],
+            author=self.authors.values[self.author_ids[row]],
+            year=self.years[row],
+            available=self.is_available(row),
+            categories=[self.categories.values[i] for i in self.category_ids[start:end]],
+        )
+
+    def is_available(self, row: int) -> bool:
+        return bool(self._available[row >> 3] & (1 << (row & 7)))
+
+    def set_available(self, row: int, available: bool) -> None:
+        with self._locks[(row >> 3) % LOCK_STRIPES]:
+            if available:
+                self._available[row >> 3] |= 1 << (row & 7)
+            else:
+                self._available[row >> 3] &= ~(1 << (row & 7)) & 0xFF
+
+    def borrow(self, row: int) -> None:
+        """Атомарная выдача (compare-and-set бита доступности)"""
+        mask = 1 << (row & 7)
+        with self._locks[(row >> 3) % LOCK_STRIPES]:
+            if not self._available[row >> 3] & mask:
+                raise BookNotAvailable(f"Book '{self.titles[row]}' is not available for borrowing")
+            self._available[row >> 3] &= ~mask & 0xFF
+
+    def return_row(self, row: int) -> None:
+        self.set_available(row, True)
+
+    def rows_by_author(self, author: str) -> List[int]:
+        """Номера строк книг автора (проход по массиву номеров, без обращения к строкам)"""
+        author_id = self.authors.ids.get(author)
+        if author_id is None:
+            return []
+        return [row for row, value in enumerate(self.author_ids) if value == author_id]
@@ -1,15 +1,11 @@
-from pydantic import BaseModel, field_validator
-from typing import Optional, List
-from functools import wraps
-
-def log_operation(func):
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        print(f"Выполняется операция: {func.__name__}")
-        result = func(*args, **kwargs)
-        print(f"Операция {func.__name__} завершена")
-        return result
-    return wrapper
+from pydantic import BaseModel, PrivateAttr, field_validator
+from typing import Dict, Optional, List
+import threading
+
+from tracing import TRACING_ENABLED, registry, traced
+
+# Число блокировок для выдачи/возврата книг
+LOCK_STRIPES = 64
 
 class Book(BaseModel):
     title: str
@@ -25,8 +21,7 @@ class Book(BaseModel):
         for category in categories:
             if not isinstance(category, str) or not category.strip():
                 raise ValueError("Each category must be a non-empty string")
-            return categories
-        return None
+        return categories
 
 
 class User(BaseModel):
@@ -40,14 +35,82 @@ class User(BaseModel):
             raise ValueError("Email must contain @")
         return email
 
+class BookIndex:
+    """Хеш-индексы книг (по названию и вторичные по автору, году, категории)
+    и блокировки выдачи: книга защищается блокировкой hash(title) % LOCK_STRIPES"""
+    __slots__ = ("by_title", "by_author", "by_year", "by_category", "locks")
+
+    def __init__(self):
+        self.by_title: Dict[str, Book] = {}
+        self.by_author: Dict[str, List[Book]] = {}
+        self.by_year: Dict[int, List[Book]] = {}
+        self.by_category: Dict[str, List[Book]] = {}
+        self.locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def add(self, book: Book) -> None:
+        # При одинаковых названиях находится первая добавленная книга, как при переборе списка
+        self.by_title.setdefault(book.title, book)
+        self.by_author.setdefault(book.author, []).append(book)
+        self.by_year.setdefault(book.year, []).append(book)
+        for category in dict.fromkeys(book.categories):
+            self.by_category.setdefault(category, []).append(book)
+
+
 class Library(BaseModel):
     books: List[Book] = []
     users: List[User] = []
 
+    # Книги добавляются только через add_book, иначе индекс разойдется со списком books.
+    # Индекс - один приватный атрибут: каждое обращение к приватному атрибуту pydantic недешево
+    _index: BookIndex = PrivateAttr(default_factory=BookIndex)
+
+    def model_post_init(self, __context) -> None:
+        index = self._index
+        for book in self.books:
+            index.add(book)
+
+    def add_book(self, book: Book) -> None:
+        self.books.append(book)
+        self._index.add(book)
+
+    def get_book(self, title: str) -> Optional[Book]:
+        return self._index.by_title.get(title)
+
+    def books_by_author(self, author: str) -> List[Book]:
+        return list(self._index.by_author.get(author, ()))
+
+    def books_by_year(self, year: int) -> List[Book]:
+        return list(self._index.by_year.get(year, ()))
+
+    def books_by_category(self, category: str) -> List[Book]:
+        return list(self._index.by_category.get(category, ()))
+
+    def borrow_book(self, title: str) -> bool:
+        """Атомарная выдача: проверка и отметка под блокировкой книги"""
+        index = self._index
+        book = index.by_title.get(title)
+        if book is None:
+            return False
+        with index.locks[hash(title) % LOCK_STRIPES]:
+            if not book.available:
+                raise BookNotAvailable(f"Book '{title}' is not available for borrowing")
+            book.available = False
+        return True
+
+    def return_book(self, title: str) -> bool:
+        index = self._index
+        book = index.by_title.get(title)
+        if book is None:
+            return False
+        with index.locks[hash(title) % LOCK_STRIPES]:
+            book.available = True
+        return True
+
     def total_books(self) -> int:
         return len(self.books)
 
 
+@traced
 def add_book(title: str, author: str, year: int, categories: List[str] = None) -> str:
     if categories is None:
         categories = []
@@ -59,33 +122,33 @@ def add_book(title: str, author: str, year: int, categories: List[str] = None) -
         available=True,
         categories=categories,
     )
-    library.books.append(book)
+    library.add_book(book)
     return (f"{title} by {author} is added to Library")
 
 
+@traced
 def find_book(title: str) -> bool:
-    for book in library.books:
-        if book.title == title:
-            return True
-    return False
+    return library.get_book(title) is not None
 
 
+@traced
 def is_book_borrow(title: str) -> bool:
-    for book in library.books:
-        if book.title == title:
-            if not book.available:
-                raise BookNotAvailable(f"Book '{title}' is not available for borrowing")
-            return book.available
-    return False
+    book = library.get_book(title)
+    if book is None:
+        return False
+    if not book.available:
+        raise BookNotAvailable(f"Book '{title}' is not available for borrowing")
+    return book.available
+
+
+@traced
+def borrow_book(title: str) -> bool:
+    return library.borrow_book(title)
 
 
-@log_operation
+@traced
 def return_book(title: str) -> bool:
-    for book in library.books:
-        if book.title == title:
-            book.available = True
-            return True
-    return False
+    return library.return_book(title)
 
 class BookNotAvailable(Exception):
     pass
@@ -103,6 +166,8 @@ if __name__ == "__main__":
 
     try:
         print("Book is available -", is_book_borrow("Спецоперация и мир"))
+        print("Book borrowed -", borrow_book("Спецоперация и мир"))
+        print("Book is available -", is_book_borrow("Спецоперация и мир"))
     except BookNotAvailable as e:
         print(f"Error: {e}")
 
@@ -110,6 +175,9 @@ if __name__ == "__main__":
 
     print("Total books in library:", library.total_books())
 
+    if TRACING_ENABLED:
+        print(registry.to_json())
+
 
 
 
@@ -0,0 +1,100 @@
+"""Нагрузочная проверка выдачи книг из многих потоков.
+
+Каждая успешная выдача регистрирует держателя через dict.setdefault (атомарно
+под GIL): если книгу уже кто-то держит, это двойная выдача. Для сравнения
+запускается наивная выдача «проверить, затем отметить» без блокировок.
+
+Запуск: python stress_library.py [потоков] [операций на поток]
+"""
+import random
+import sys
+import threading
+import time
+
+from catalogue import Catalogue
+from manage_library import Book, BookNotAvailable, Library
+
+BOOKS = 50
+
+
+def naive_borrow(library: Library, title: str) -> bool:
+    """Прежний подход: проверка и изменение без синхронизации"""
+    book = library.get_book(title)
+    if not book.available:
+        raise BookNotAvailable(title)
+    time.sleep(0)  # переключение потока между проверкой и записью
+    book.available = False
+    return True
+
+
+def run(borrow, give_back, keys: list, threads: int, operations: int) -> dict:
+    holders = {}
+    stats = {"borrowed": 0, "busy": 0, "double": 0}
+    stats_lock = threading.Lock()
+    start = threading.Barrier(threads)
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        borrowed = busy = double = 0
+        start.wait()
+        for _ in range(operations):
+            key = rng.choice(keys)
+            try:
+                borrow(key)
+            except BookNotAvailable:
+                busy += 1
+                continue
+            borrowed += 1
+            if holders.setdefault(key, seed) != seed:
+                double += 1
+                continue
+            time.sleep(0)  # книга «на руках» на время переключения потоков
+            del holders[key]
+            give_back(key)
+        with stats_lock:
+            stats["borrowed"] += borrowed
+            stats["busy"] += busy
+            stats["double"] += double
+
+    pool = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def main(threads: int, operations: int):
+    titles = [f"Книга {i}" for i in range(BOOKS)]
+
+    def new_library() -> Library:
+        return Library(books=[Book(title=t, author="Автор", year=2000, available=True) for t in titles])
+
+    library = new_library()
+    naive = new_library()
+    catalogue = Catalogue()
+    rows = [catalogue.add_book(title, "Автор", 2000) for title in titles]
+
+    cases = [
+        ("Library.borrow_book", run(library.borrow_book, library.return_book, titles, threads, operations)),
+        ("Catalogue.borrow", run(catalogue.borrow, catalogue.return_row, rows, threads, operations)),
+        ("без блокировок", run(lambda t: naive_borrow(naive, t), naive.return_book, titles, threads, operations)),
+    ]
+    print(f"{threads} потоков x {operations} операций, {BOOKS} книг")
+    for label, stats in cases:
+        print(f"{label:<22} выдано {stats['borrowed']:>8} занято {stats['busy']:>8} "
+              f"двойных выдач {stats['double']:>6} {stats['seconds']:>7.2f} с")
+
+    assert cases[0][1]["double"] == 0 and cases[1][1]["double"] == 0
+    assert all(book.available for book in library.books)
+    assert all(catalogue.is_available(row) for row in rows)
+
+
+if __name__ == "__main__":
+    sys.setswitchinterval(1e-5)
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 16,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10000,
+    )
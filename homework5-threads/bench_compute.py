@@ -0,0 +1,79 @@
+"""Бенчмарк parallel_compute: масштабирование по числу исполнителей.
+
+Сравниваются прежний способ (цикл с i ** 2 и i ** 3 в двух потоках
+threading.Thread), пул потоков, пул процессов и NumPy на 1..N исполнителях.
+Считаются контрольные суммы степеней, чтобы не хранить таблицу на 10**8 чисел;
+результаты всех вариантов сверяются.
+
+Запуск: python bench_compute.py [диапазон для чистого Python] [диапазон для NumPy] [макс. исполнителей]
+"""
+import os
+import sys
+import time
+from threading import Thread
+
+from parallel_compute import MASK, power_checksums
+
+POWERS = (2, 3)
+
+
+def legacy_threads(stop: int) -> dict:
+    """Прежний подход threads-task1: одна и та же работа, поделенная на два Thread"""
+    totals = [dict.fromkeys(POWERS, 0), dict.fromkeys(POWERS, 0)]
+
+    def worker(index: int, low: int, high: int):
+        for i in range(low, high):
+            totals[index][2] += i ** 2
+            totals[index][3] += i ** 3
+
+    middle = stop // 2
+    threads = [Thread(target=worker, args=(0, 0, middle)), Thread(target=worker, args=(1, middle, stop))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {p: (totals[0][p] + totals[1][p]) & MASK for p in POWERS}
+
+
+def measure(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def worker_counts(limit: int) -> list[int]:
+    counts = [1]
+    while counts[-1] * 2 <= limit:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != limit:
+        counts.append(limit)
+    return counts
+
+
+def main(python_stop: int, numpy_stop: int, max_workers: int):
+    print(f"ядер: {os.cpu_count()}, степени {POWERS}")
+    expected, legacy = measure(legacy_threads, python_stop)
+    print(f"\nдиапазон 0..{python_stop:,}")
+    print(f"{'вариант':<26} {'исполнителей':>12} {'время, с':>10} {'ускорение':>10}")
+    print(f"{'2 x threading.Thread':<26} {2:>12} {legacy:>10.2f} {1:>10.2f}")
+    for backend in ("thread", "process", "numpy"):
+        for workers in worker_counts(max_workers):
+            result, elapsed = measure(power_checksums, 0, python_stop, POWERS, backend=backend, workers=workers)
+            assert result == expected, (backend, result, expected)
+            print(f"{backend:<26} {workers:>12} {elapsed:>10.2f} {legacy / elapsed:>10.2f}")
+
+    print(f"\nдиапазон 0..{numpy_stop:,}")
+    print(f"{'вариант':<26} {'исполнителей':>12} {'время, с':>10} {'ускорение':>10}")
+    baseline = None
+    for workers in worker_counts(max_workers):
+        result, elapsed = measure(power_checksums, 0, numpy_stop, POWERS, backend="numpy", workers=workers)
+        baseline = baseline or elapsed
+        print(f"{'numpy':<26} {workers:>12} {elapsed:>10.2f} {baseline / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 7,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10 ** 8,
+        int(sys.argv[3]) if len(sys.argv) > 3 else max(os.cpu_count() or 1, 4),
+    )
@@ -0,0 +1,110 @@
+"""Бенчмарк Ticker против потока на задачу (как в threads-task2.py).
+
+Каждый вариант запускается в отдельном процессе: N задач по count тиков
+с интервалом interval. Измеряются прирост RSS от запуска задач и опоздание
+тиков относительно расписания start + n * interval. У потоков с
+time.sleep(interval) опоздание накапливается от тика к тику (дрейф).
+
+Запуск: python bench_ticker.py [задач] [тиков] [интервал, с]
+"""
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+from ticker import Ticker
+
+# Первый тик - через START_DELAY секунд, чтобы успели запуститься все задачи
+START_DELAY = 3.0
+
+
+def rss_kb() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def percentile(values: list, p: int) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, len(values) * p // 100)] if values else 0.0
+
+
+def run_threads(tasks: int, count: int, interval: float) -> dict:
+    """Прежний подход: поток на задачу, time.sleep между тиками"""
+    lateness = []
+    start = time.monotonic() + START_DELAY
+    baseline = rss_kb()
+
+    def sleeping(offset: float):
+        deadline = start + offset
+        time.sleep(max(0.0, deadline - time.monotonic()))
+        for n in range(count):
+            lateness.append(time.monotonic() - (deadline + n * interval))
+            time.sleep(interval)
+
+    pool = [threading.Thread(target=sleeping, args=(i * interval / tasks,)) for i in range(tasks)]
+    for thread in pool:
+        thread.start()
+    started = rss_kb()
+    for thread in pool:
+        thread.join()
+    return {"lateness": lateness, "rss_kb": started - baseline}
+
+
+def run_ticker(tasks: int, count: int, interval: float) -> dict:
+    async def main():
+        ticker = Ticker(max_concurrency=tasks, record_lateness=True)
+        baseline = rss_kb()
+        for i in range(tasks):
+            ticker.every(interval, int, count=count, delay=START_DELAY + i * interval / tasks)
+        await asyncio.sleep(0)
+        started = rss_kb()
+        await ticker.join()
+        return {"lateness": ticker.lateness, "rss_kb": started - baseline, "skipped": ticker.stats()["skipped"]}
+
+    return asyncio.run(main())
+
+
+def child(variant: str, tasks: int, count: int, interval: float):
+    started = time.perf_counter()
+    result = (run_threads if variant == "threads" else run_ticker)(tasks, count, interval)
+    lateness = result.pop("lateness")
+    result.update({
+        "seconds": time.perf_counter() - started,
+        "ticks": len(lateness),
+        "p50_ms": percentile(lateness, 50) * 1000,
+        "p99_ms": percentile(lateness, 99) * 1000,
+        "max_ms": max(lateness, default=0.0) * 1000,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+    print(json.dumps(result))
+
+
+def main(tasks: int, count: int, interval: float):
+    print(f"{tasks} задач x {count} тиков, интервал {interval} с")
+    print(f"{'вариант':<22} {'тиков':>8} {'RSS задач, МБ':>14} {'пик RSS, МБ':>12} "
+          f"{'p50, мс':>8} {'p99, мс':>8} {'макс, мс':>9} {'время, с':>9}")
+    for variant, label in (("threads", "поток на задачу"), ("ticker", "Ticker (asyncio)")):
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", variant, str(tasks), str(count), str(interval)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        print(f"{label:<22} {r['ticks']:>8} {r['rss_kb'] / 1024:>14.1f} {r['peak_rss_mb']:>12.1f} "
+              f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['max_ms']:>9.2f} {r['seconds']:>9.2f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), float(sys.argv[5]))
+    else:
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 10_000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+            float(sys.argv[3]) if len(sys.argv) > 3 else 1.0,
+        )
@@ -0,0 +1,113 @@
+"""Параллельный расчет таблицы степеней (квадраты, кубы) для диапазона чисел.
+
+Диапазон делится на куски, куски считаются выбранным способом (backend):
+    serial  - в текущем потоке;
+    thread  - пул потоков (из-за GIL чистый Python не ускоряется, вариант для сравнения);
+    process - пул процессов, реальная параллельность на нескольких ядрах;
+    numpy   - векторные операции NumPy по кускам в пуле потоков (NumPy отпускает GIL).
+
+power_table возвращает сами значения, power_checksums - суммы степеней по
+модулю 2**64 без хранения таблицы (для диапазонов до 10**8 и больше). Суммы
+по модулю точны во всех вариантах: в NumPy uint64 переполняется ровно так же.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+BACKENDS = ("serial", "thread", "process", "numpy")
+WORKERS = int(os.getenv("COMPUTE_WORKERS", str(os.cpu_count() or 1)))
+CHUNK_SIZE = int(os.getenv("COMPUTE_CHUNK_SIZE", "1000000"))
+MASK = 2 ** 64 - 1
+INT64_MAX = np.iinfo(np.int64).max
+
+
+def split_range(start: int, stop: int, chunks: int) -> list[tuple[int, int]]:
+    """Делит [start, stop) на chunks почти равных непустых кусков"""
+    size = stop - start
+    chunks = max(1, min(chunks, size))
+    step, extra = divmod(size, chunks)
+    bounds = []
+    low = start
+    for i in range(chunks):
+        high = low + step + (i < extra)
+        bounds.append((low, high))
+        low = high
+    return bounds
+
+
+def table_chunk(start: int, stop: int, powers: tuple) -> dict[int, list[int]]:
+    return {p: [i ** p for i in range(start, stop)] for p in powers}
+
+
+def numpy_table_chunk(start: int, stop: int, powers: tuple) -> dict[int, np.ndarray]:
+    values = np.arange(start, stop, dtype=np.int64)
+    return {p: values ** p for p in powers}
+
+
+def checksum_chunk(start: int, stop: int, powers: tuple) -> dict[int, int]:
+    return {p: sum(i ** p for i in range(start, stop)) & MASK for p in powers}
+
+
+def numpy_checksum_chunk(start: int, stop: int, powers: tuple) -> dict[int, int]:
+    values = np.arange(start, stop, dtype=np.uint64)
+    return {p: int(np.sum(values ** np.uint64(p), dtype=np.uint64)) for p in powers}
+
+
+def _run(func, start: int, stop: int, powers: tuple, backend: str, workers: int, chunk_size: int) -> list:
+    """Результаты func по кускам диапазона, в порядке кусков"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Неизвестный способ расчета {backend!r}, допустимы: {', '.join(BACKENDS)}")
+    if stop <= start:
+        return []
+    workers = max(1, workers or WORKERS)
+    chunks = -(-(stop - start) // chunk_size)
+    if backend != "serial":
+        # Кусков больше, чем исполнителей, чтобы неравные куски не оставляли ядра без работы
+        chunks = max(chunks, workers * 4)
+    bounds = split_range(start, stop, chunks)
+    starts = [low for low, _ in bounds]
+    stops = [high for _, high in bounds]
+
+    if backend == "serial":
+        return list(map(func, starts, stops, repeat(powers)))
+    pool = ProcessPoolExecutor if backend == "process" else ThreadPoolExecutor
+    with pool(max_workers=workers) as executor:
+        return list(executor.map(func, starts, stops, repeat(powers)))
+
+
+def power_table(start: int, stop: int, powers: tuple = (2, 3), backend: str = "serial",
+                workers: int = None, chunk_size: int = CHUNK_SIZE) -> dict:
+    """{степень: значения i ** степень для i из [start, stop)}
+
+    Для numpy значения - массивы int64, для остальных - списки int.
+    """
+    powers = tuple(powers)
+    if backend == "numpy":
+        if stop > start and max(abs(start), abs(stop - 1)) ** max(powers) > INT64_MAX:
+            raise OverflowError(f"Степени чисел до {stop} не помещаются в int64")
+        parts = _run(numpy_table_chunk, start, stop, powers, "numpy", workers, chunk_size)
+        return {p: np.concatenate([part[p] for part in parts]) if parts else np.array([], dtype=np.int64)
+                for p in powers}
+
+    parts = _run(table_chunk, start, stop, powers, backend, workers, chunk_size)
+    table = {p: [] for p in powers}
+    for part in parts:
+        for p in powers:
+            table[p].extend(part[p])
+    return table
+
+
+def power_checksums(start: int, stop: int, powers: tuple = (2, 3), backend: str = "process",
+                    workers: int = None, chunk_size: int = CHUNK_SIZE) -> dict[int, int]:
+    """{степень: сумма i ** степень по [start, stop) по модулю 2**64}"""
+    if start < 0:
+        raise ValueError("Контрольные суммы считаются для неотрицательных чисел")
+    powers = tuple(powers)
+    func = numpy_checksum_chunk if backend == "numpy" else checksum_chunk
+    totals = dict.fromkeys(powers, 0)
+    for part in _run(func, start, stop, powers, backend, workers, chunk_size):
+        for p in powers:
+            totals[p] = (totals[p] + part[p]) & MASK
+    return totals
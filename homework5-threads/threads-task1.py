@@ -1,21 +1,29 @@
-from threading import Thread
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from parallel_compute import BACKENDS, power_table
+
+
+def cubes(start: int = 1, stop: int = 11, backend: str = "serial") -> dict[str, list[int]]:
+    table = power_table(start, stop, powers=(2, 3), backend=backend)
+    return {
+        "cubes_list": [int(value) for value in table[3]],
+        "sqr_list": [int(value) for value in table[2]],
+    }
 
-def cubes() -> dict[str, list[int]]:
-    cubes_list = []
-    sqr_list = []
-    for i in range(1, 11):
-        sqr_list.append(i ** 2)
-        cubes_list.append(i ** 3)
-    res = {"cubes_list": cubes_list, "sqr_list": sqr_list}
-    return print(res)
 
 if __name__ == "__main__":
+    # python threads-task1.py [serial|thread|process|numpy]
+    backend = sys.argv[1] if len(sys.argv) > 1 else "serial"
+    if backend not in BACKENDS:
+        sys.exit(f"Способ расчета: {', '.join(BACKENDS)}")
 
-    thread1 = Thread(target=cubes)
-    print(f"Расчет из первого потока:")
-    thread1.start()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(cubes, backend=backend)
+        second = executor.submit(cubes, backend=backend)
 
-    thread2 = Thread(target=cubes)
+    print(f"Расчет из первого потока:")
+    print(first.result())
     print()
     print(f"Расчет из второго потока:")
-    thread2.start()
+    print(second.result())
@@ -1,24 +1,20 @@
-import time
-from threading import Thread
+import asyncio
+import itertools
 
-def sleeping_nums() -> None:
-    for i in range(1, 11):
-        print(i)
-        time.sleep(1)
-    return None
+from ticker import Ticker
+
+
+def sleeping_nums(counter) -> None:
+    print(next(counter))
 
-if __name__ == "__main__":
-    t1 = Thread(target=sleeping_nums)
-    t2 = Thread(target=sleeping_nums)
-    t3 = Thread(target=sleeping_nums)
-    t4 = Thread(target=sleeping_nums)
 
-    t1.start()
-    t2.start()
-    t3.start()
-    t4.start()
+async def main() -> None:
+    # Четыре счетчика 1..10 раз в секунду - корутины на одном цикле вместо четырех потоков
+    ticker = Ticker()
+    for _ in range(4):
+        ticker.every(1, sleeping_nums, itertools.count(1), count=10)
+    await ticker.join()
 
-    t1.join()
-    t2.join()
-    t3.join()
-    t4.join()
\ No newline at end of file
+
+if __name__ == "__main__":
+    asyncio.run(main())
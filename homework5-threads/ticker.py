@@ -0,0 +1,137 @@
+"""Планировщик периодических задач на одном цикле asyncio.
+
+Вместо потока на задачу (threads-task2.py: Thread + time.sleep) каждая
+периодическая задача - корутина на общем цикле событий, поэтому десятки
+тысяч задач стоят единицы килобайт каждая.
+
+Срабатывания планируются по абсолютному времени: n-й тик назначен на
+start + n * interval, поэтому время выполнения обработчика и опоздания
+цикла не накапливаются (нет дрейфа). Если задача отстала больше чем на
+интервал, пропущенные тики не догоняются, а считаются в skipped.
+Одновременно выполняемых обработчиков - не больше max_concurrency.
+
+Пример:
+    async def main():
+        ticker = Ticker()
+        ticker.every(1.0, print, "tick", count=10)
+        await ticker.join()
+"""
+import asyncio
+import os
+
+MAX_CONCURRENCY = int(os.getenv("TICKER_MAX_CONCURRENCY", "1000"))
+
+
+class PeriodicTask:
+    """Одна периодическая задача; создается через Ticker.every"""
+
+    def __init__(self, ticker, interval: float, callback, args: tuple, count: int = None, delay: float = 0.0):
+        if interval <= 0:
+            raise ValueError("Интервал должен быть положительным")
+        self.ticker = ticker
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.count = count
+        self.ticks = 0
+        self.skipped = 0
+        self.errors = 0
+        self.last_error = None
+        self.max_lateness = 0.0
+        self.total_lateness = 0.0
+        loop = asyncio.get_running_loop()
+        self.start = loop.time() + delay
+        self._task = loop.create_task(self._run())
+
+    def cancel(self):
+        self._task.cancel()
+
+    @property
+    def done(self) -> bool:
+        return self._task.done()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self.ticker.semaphore
+        samples = self.ticker.lateness
+        deadline = self.start
+        while self.count is None or self.ticks < self.count:
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            async with semaphore:
+                lateness = loop.time() - deadline
+                self.total_lateness += lateness
+                if lateness > self.max_lateness:
+                    self.max_lateness = lateness
+                if samples is not None:
+                    samples.append(lateness)
+                try:
+                    result = self.callback(*self.args)
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    # Ошибка одного тика не останавливает расписание
+                    self.errors += 1
+                    self.last_error = e
+            self.ticks += 1
+
+            deadline += self.interval
+            behind = loop.time() - deadline
+            if behind >= self.interval:
+                missed = int(behind // self.interval)
+                deadline += missed * self.interval
+                self.skipped += missed
+
+
+class Ticker:
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, record_lateness: bool = False):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        # Опоздание каждого тика в секундах (для измерения джиттера)
+        self.lateness = [] if record_lateness else None
+        self.tasks = set()
+        # Итоги завершенных задач, чтобы stats() работал и после join()
+        self._finished = {"ticks": 0, "skipped": 0, "errors": 0, "total_lateness": 0.0, "max_lateness": 0.0}
+
+    def every(self, interval: float, callback, *args, count: int = None, delay: float = 0.0) -> PeriodicTask:
+        """Вызывать callback(*args) каждые interval секунд (count раз или до отмены).
+
+        callback может быть обычной функцией или корутинной функцией.
+        """
+        task = PeriodicTask(self, interval, callback, args, count=count, delay=delay)
+        self.tasks.add(task)
+        task._task.add_done_callback(lambda _: self._finish(task))
+        return task
+
+    def _finish(self, task: PeriodicTask):
+        self.tasks.discard(task)
+        finished = self._finished
+        finished["ticks"] += task.ticks
+        finished["skipped"] += task.skipped
+        finished["errors"] += task.errors
+        finished["total_lateness"] += task.total_lateness
+        finished["max_lateness"] = max(finished["max_lateness"], task.max_lateness)
+
+    def cancel_all(self):
+        for task in list(self.tasks):
+            task.cancel()
+
+    async def join(self):
+        """Ждет завершения всех задач (отмененные тоже считаются завершенными)"""
+        while self.tasks:
+            await asyncio.gather(*(task._task for task in list(self.tasks)), return_exceptions=True)
+
+    def stats(self) -> dict:
+        tasks = list(self.tasks)
+        finished = self._finished
+        ticks = finished["ticks"] + sum(task.ticks for task in tasks)
+        total_lateness = finished["total_lateness"] + sum(task.total_lateness for task in tasks)
+        return {
+            "running": len(tasks),
+            "ticks": ticks,
+            "skipped": finished["skipped"] + sum(task.skipped for task in tasks),
+            "errors": finished["errors"] + sum(task.errors for task in tasks),
+            "mean_lateness": total_lateness / ticks if ticks else 0.0,
+            "max_lateness": max([finished["max_lateness"]] + [task.max_lateness for task in tasks]),
+        }
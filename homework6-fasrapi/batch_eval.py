@@ -0,0 +1,89 @@
+"""Пакетное векторизованное вычисление на NumPy.
+
+Ошибки (деление на ноль, переполнение, комплексный результат) возвращаются
+для каждого элемента отдельно, а не прерывают весь пакет.
+"""
+import operator
+
+import numpy as np
+
+from expression_engine import CONST, LOAD, NEG, CompiledExpression, ExpressionError
+
+OPERATIONS = {
+    "+": np.add,
+    "-": np.subtract,
+    "*": np.multiply,
+    "/": np.divide,
+}
+
+ZERO_DIVISION_ERROR = "Деление на ноль"
+NOT_FINITE_ERROR = "Результат не является действительным числом"
+
+
+def _with_errors(values: np.ndarray, zero_division: np.ndarray) -> dict:
+    """Результаты со значением None и ошибкой для неудачных элементов"""
+    failed = zero_division | ~np.isfinite(values)
+    results = values.tolist()
+    errors = []
+    for index in np.flatnonzero(failed).tolist():
+        results[index] = None
+        errors.append({
+            "index": index,
+            "error": ZERO_DIVISION_ERROR if zero_division[index] else NOT_FINITE_ERROR,
+        })
+    return {"results": results, "errors": errors}
+
+
+def evaluate_operations(a, b, ops) -> dict:
+    """Вычисление троек (a, b, op): одна векторная операция на каждый вид оператора"""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    ops = np.asarray(ops)
+    values = np.full(a.shape, np.nan)
+
+    with np.errstate(all="ignore"):
+        for op, func in OPERATIONS.items():
+            mask = ops == op
+            if mask.any():
+                values[mask] = func(a[mask], b[mask])
+
+    zero_division = (ops == "/") & (b == 0)
+    return _with_errors(values, zero_division)
+
+
+def evaluate_vectorized(expression: CompiledExpression, bindings: dict) -> dict:
+    """Вычисление выражения сразу для всех наборов значений переменных"""
+    missing = [name for name in expression.variables if name not in bindings]
+    if missing:
+        raise ExpressionError(f"Не заданы значения переменных: {', '.join(missing)}")
+
+    arrays = {name: np.asarray(bindings[name], dtype=np.float64) for name in expression.variables}
+    sizes = {array.shape[0] for array in arrays.values()}
+    if len(sizes) > 1:
+        raise ExpressionError("Массивы значений переменных должны быть одной длины")
+    size = sizes.pop() if sizes else 1
+
+    zero_division = np.zeros(size, dtype=bool)
+    stack = []
+    with np.errstate(all="ignore"):
+        for opcode, argument in expression.code:
+            if opcode == CONST:
+                # Константы - тоже float64 NumPy: 1/0 дает inf и отметку об ошибке, а не ZeroDivisionError
+                stack.append(np.float64(argument))
+            elif opcode == LOAD:
+                stack.append(arrays[argument])
+            elif opcode == NEG:
+                stack.append(np.negative(stack.pop()))
+            else:
+                right = stack.pop()
+                left = stack.pop()
+                if argument is operator.truediv:
+                    zero_division |= np.broadcast_to(right == 0, (size,))
+                elif argument is operator.pow:
+                    # 0 в отрицательной степени - тоже деление на ноль
+                    zero_division |= np.broadcast_to((left == 0) & (right < 0), (size,))
+                    argument = np.power
+                stack.append(argument(left, right))
+
+    values = np.broadcast_to(np.asarray(stack[0], dtype=np.float64), (size,))
+    return _with_errors(values, zero_division)
@@ -0,0 +1,182 @@
+"""Бенчмарки калькулятора.
+
+Запуск: python bench_calculator.py
+"""
+import asyncio
+import random
+import time
+
+from batch_eval import evaluate_operations, evaluate_vectorized
+from expression_engine import _compile_normalized, compile_expression
+
+
+async def legacy_complication(exp: str) -> float:
+    """Прежний алгоритм /complication: rfind скобок, рекурсия и пересборка строки"""
+    exp = exp.replace(" ", "").replace("%20", "")
+    while '(' in exp:
+        start = exp.rfind('(')
+        end = exp.find(')', start)
+        sub_result = await legacy_complication(exp[start + 1:end])
+        exp = exp[:start] + str(sub_result) + exp[end + 1:]
+
+    current_num = ""
+    numbers = []
+    operators = []
+    for char in exp:
+        if char in "+-*/":
+            numbers.append(float(current_num))
+            operators.append(char)
+            current_num = ""
+        else:
+            current_num += char
+    numbers.append(float(current_num))
+
+    i = 0
+    while i < len(operators):
+        if operators[i] in "*/":
+            if operators[i] == "*":
+                numbers[i] = numbers[i] * numbers[i + 1]
+            else:
+                numbers[i] = numbers[i] / numbers[i + 1]
+            numbers.pop(i + 1)
+            operators.pop(i)
+        else:
+            i += 1
+
+    result = numbers[0]
+    for i in range(len(operators)):
+        if operators[i] == "+":
+            result += numbers[i + 1]
+        else:
+            result -= numbers[i + 1]
+    return result
+
+
+def nested_expression(depth: int, width: int, seed: int = 0) -> str:
+    """Выражение с вложенностью depth и width произведениями на каждом уровне.
+
+    Значение остается небольшим и положительным: прежний алгоритм не разбирает
+    отрицательные числа и экспоненциальную запись, которые дает str(float).
+    """
+    rng = random.Random(seed)
+    expression = "1"
+    for _ in range(depth):
+        terms = "+".join(f"{rng.randint(1, 9)}*{rng.randint(1, 9)}" for _ in range(width))
+        expression = f"({terms}+{expression})/{width * 50}"
+    return expression
+
+
+def flat_product(length: int) -> str:
+    """Длинная цепочка умножений без скобок: прежний алгоритм делает pop(i) на каждую операцию"""
+    return "*".join(["1.0001"] * length)
+
+
+def measure(func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat
+
+
+def bench_expressions():
+    cases = [
+        ("вложенность 10x5", nested_expression(10, 5)),
+        ("вложенность 200x10", nested_expression(200, 10)),
+        ("вложенность 500x20", nested_expression(500, 20)),
+        ("вложенность 3000x1", nested_expression(3000, 1)),
+        ("умножения 20000", flat_product(20000)),
+        ("умножения 80000", flat_product(80000)),
+    ]
+    print(f"{'выражение':<20} {'длина':>7} {'прежний, мс':>12} {'компиляция, мс':>15} {'из кеша, мс':>12}")
+    for label, expression in cases:
+        repeat = max(1, 20000 // len(expression))
+
+        legacy = measure(lambda: asyncio.run(legacy_complication(expression)), repeat)
+
+        def compile_cold():
+            _compile_normalized.cache_clear()
+            return compile_expression(expression).evaluate()
+
+        cold = measure(compile_cold, repeat)
+        compile_expression(expression)
+        cached = measure(lambda: compile_expression(expression).evaluate(), repeat * 10)
+
+        expected = compile_expression(expression).evaluate()
+        legacy_value = asyncio.run(legacy_complication(expression))
+        assert abs(legacy_value - expected) <= 1e-6 * max(1.0, abs(expected)), (legacy_value, expected)
+
+        print(f"{label:<20} {len(expression):>7} {legacy * 1000:>12.3f} {cold * 1000:>15.3f} {cached * 1000:>12.3f}")
+
+
+def bench_batch(size: int = 100_000, http_sample: int = 2000):
+    """Пакет из size элементов: одним POST /evaluate/batch против отдельных GET /expression"""
+    from fastapi.testclient import TestClient
+
+    from calculator import app
+
+    rng = random.Random(0)
+    ops = [rng.choice("+-*/") for _ in range(size)]
+    a = [rng.uniform(-100, 100) for _ in range(size)]
+    b = [rng.choice((0.0, rng.uniform(-100, 100))) for _ in range(size)]
+    operations = [{"a": x, "b": y, "op": op} for x, y, op in zip(a, b, ops)]
+    client = TestClient(app)
+
+    vectorized = measure(lambda: evaluate_operations(a, b, ops), 5)
+    compiled = compile_expression("x*y - x/(y+1) + 2^x")
+    bindings = {"x": [value / 50 for value in a], "y": b}
+    expression = measure(lambda: evaluate_vectorized(compiled, bindings), 5)
+
+    started = time.perf_counter()
+    response = client.post("/evaluate/batch", json={"operations": operations})
+    batch_http = time.perf_counter() - started
+    assert response.status_code == 200 and len(response.json()["results"]) == size
+
+    started = time.perf_counter()
+    for item in operations[:http_sample]:
+        client.get("/add", params={"a": item["a"], "b": item["b"]})
+    per_request = (time.perf_counter() - started) / http_sample
+
+    print(f"\nпакет из {size} элементов")
+    print(f"{'тройки (a, b, op), NumPy':<40} {vectorized * 1000:>10.1f} мс")
+    print(f"{'выражение с массивами переменных':<40} {expression * 1000:>10.1f} мс")
+    print(f"{'POST /evaluate/batch целиком':<40} {batch_http * 1000:>10.1f} мс")
+    print(f"{'отдельные GET-запросы (оценка)':<40} {per_request * size * 1000:>10.1f} мс")
+
+
+def bench_templates(requests: int = 3000):
+    """Одна формула с разными значениями: подстановка в /complication против шаблона /expressions"""
+    from fastapi.testclient import TestClient
+
+    from calculator import app
+
+    client = TestClient(app)
+    formula = "(a+5)*b - (a*b)/(b+1) + (a-3)*(b-7)"
+    rng = random.Random(0)
+    values = [(rng.randint(1, 10 ** 6), rng.randint(1, 10 ** 6)) for _ in range(requests)]
+    template_id = client.post("/expressions", json={"expression": formula}).json()["id"]
+
+    started = time.perf_counter()
+    for a, b in values:
+        client.get("/complication", params={"exp": formula.replace("a", str(a)).replace("b", str(b))})
+    substituted = (time.perf_counter() - started) / requests
+
+    started = time.perf_counter()
+    for a, b in values:
+        client.get(f"/expressions/{template_id}", params={"a": a, "b": b})
+    template = (time.perf_counter() - started) / requests
+
+    compiled = compile_expression(formula)
+    parse = measure(lambda: _compile_normalized.__wrapped__(compiled.text), 2000)
+    evaluate = measure(lambda: compiled.evaluate({"a": 3.0, "b": 4.0}), 20000)
+
+    print(f"\nшаблон выражения, {requests} запросов с разными значениями")
+    print(f"{'/complication с подстановкой':<40} {substituted * 1e6:>10.1f} мкс/запрос")
+    print(f"{'/expressions/{id}':<40} {template * 1e6:>10.1f} мкс/запрос")
+    print(f"{'разбор формулы':<40} {parse * 1e6:>10.1f} мкс")
+    print(f"{'вычисление готового байткода':<40} {evaluate * 1e6:>10.1f} мкс")
+
+
+if __name__ == "__main__":
+    bench_expressions()
+    bench_batch()
+    bench_templates()
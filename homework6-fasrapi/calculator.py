@@ -1,7 +1,17 @@
+import math
+from typing import Dict, List, Literal, Optional
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, model_validator
+
+from batch_eval import evaluate_operations, evaluate_vectorized
+from expression_engine import ExpressionError, ExpressionRegistry, compile_expression
+from tracing import registry, traced
 
 app = FastAPI()
+templates = ExpressionRegistry()
 
 @app.get("/add")
 async def add(a: float, b: float) -> float:
@@ -32,61 +42,107 @@ async def expression(a: float, b: float, op:str):
     else:
         raise Exception()
 
+def evaluate_or_400(compiled, values: dict = None) -> float:
+    """Вычисление с переводом ошибок в ответ 400"""
+    try:
+        result = compiled.evaluate(values)
+    except ExpressionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ZeroDivisionError:
+        raise HTTPException(status_code=400, detail="Деление на ноль")
+    except OverflowError:
+        raise HTTPException(status_code=400, detail="Слишком большой результат")
+    # Дробная степень отрицательного числа дает комплексное число
+    if isinstance(result, complex):
+        raise HTTPException(status_code=400, detail="Результат не является действительным числом")
+    # Переполнение float (1e308*10, 1e400) дает inf без исключения, а inf и nan не сериализуются в JSON
+    if not math.isfinite(result):
+        raise HTTPException(status_code=400, detail="Слишком большой результат")
+    return result
+
 @app.get("/complication")
+@traced
 async def complication(exp: str) -> float:
-    # Убираем пробелы и %20
-    exp = exp.replace(" ", "").replace("%20", "")
-
-    # Обрабатываем скобки рекурсивно
-    while '(' in exp:
-        start = exp.rfind('(')
-        end = exp.find(')', start)
-
-        # Вычисляем выражение внутри скобок
-        sub_result = await complication(exp[start + 1:end])
-
-        # Заменяем скобочное выражение на результат
-        exp = exp[:start] + str(sub_result) + exp[end + 1:]
-
-    i = 0
-    current_num = ""
-    numbers = []
-    operators = []
-
-    while i < len(exp):
-        if exp[i] in "+-*/":
-            numbers.append(float(current_num))
-            operators.append(exp[i])
-            current_num = ""
-        else:
-            current_num += exp[i]
-        i += 1
-
-    numbers.append(float(current_num))
-
-    # Сначала умножаем и делим
-    i = 0
-    while i < len(operators):
-        if operators[i] in "*/":
-            if operators[i] == "*":
-                result = numbers[i] * numbers[i + 1]
-            else:
-                result = numbers[i] / numbers[i + 1]
-            numbers[i] = result
-            numbers.pop(i + 1)
-            operators.pop(i)
-        else:
-            i += 1
-
-    # Потом складываем и вычитаем
-    result = numbers[0]
-    for i in range(len(operators)):
-        if operators[i] == "+":
-            result += numbers[i + 1]
-        else:
-            result -= numbers[i + 1]
-
-    return result
+    # Разбор выполняется один раз, повторные выражения берутся из кеша
+    try:
+        compiled = compile_expression(exp)
+    except ExpressionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return evaluate_or_400(compiled)
+
+class TemplateRequest(BaseModel):
+    expression: str
+
+@app.post("/expressions", status_code=201)
+async def register_expression(request: TemplateRequest):
+    try:
+        template_id, compiled = templates.register(request.expression)
+    except ExpressionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"id": template_id, "expression": compiled.text, "variables": list(compiled.variables)}
+
+@app.get("/expressions/{template_id}")
+@traced
+async def evaluate_expression(template_id: str, request: Request) -> float:
+    # Значения переменных передаются query-параметрами: /expressions/{id}?a=1&b=2
+    compiled = templates.get(template_id)
+    if compiled is None:
+        raise HTTPException(status_code=404, detail="Выражение не найдено, зарегистрируйте его заново")
+    values = {}
+    for name in compiled.variables:
+        raw = request.query_params.get(name)
+        if raw is None:
+            raise HTTPException(status_code=400, detail=f"Не задано значение переменной '{name}'")
+        try:
+            value = float(raw)
+        except ValueError:
+            value = math.nan
+        # float() принимает и "nan", "inf" - такие значения тоже отклоняются
+        if not math.isfinite(value):
+            raise HTTPException(status_code=400, detail=f"Значение переменной '{name}' не является числом")
+        values[name] = value
+    return evaluate_or_400(compiled, values)
+
+class BatchOperation(BaseModel):
+    a: float
+    b: float
+    op: Literal["+", "-", "*", "/"]
+
+class BatchRequest(BaseModel):
+    """Либо список троек (a, b, op), либо выражение и массивы значений переменных"""
+    operations: Optional[List[BatchOperation]] = None
+    expression: Optional[str] = None
+    bindings: Dict[str, List[float]] = {}
+
+    @model_validator(mode="after")
+    def check_mode(self):
+        if (self.operations is None) == (self.expression is None):
+            raise ValueError("Нужно указать либо operations, либо expression")
+        return self
+
+@app.post("/evaluate/batch")
+@traced
+def evaluate_batch(request: BatchRequest):
+    # Ошибки отдельных элементов (деление на ноль) не прерывают пакет: result=None + запись в errors.
+    # JSONResponse напрямую - без jsonable_encoder, который медленно обходит сотни тысяч чисел
+    if request.operations is not None:
+        operations = request.operations
+        result = evaluate_operations(
+            [item.a for item in operations],
+            [item.b for item in operations],
+            [item.op for item in operations],
+        )
+    else:
+        try:
+            result = evaluate_vectorized(compile_expression(request.expression), request.bindings)
+        except ExpressionError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse(result)
+
+@app.get("/tracing")
+async def tracing_stats():
+    """Статистика @traced в JSON (пусто, если TRACING_ENABLED не задан)"""
+    return registry.snapshot()
 
 if __name__ == "__main__":
     uvicorn.run(app)
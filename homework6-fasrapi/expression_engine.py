@@ -0,0 +1,218 @@
+"""Компилятор арифметических выражений.
+
+Выражение разбирается за один проход (токенизатор + сортировочная станция)
+в байткод стековой машины - обратную польскую запись. Константные
+подвыражения сворачиваются при компиляции. Скомпилированные выражения
+кешируются по нормализованному тексту.
+
+Поддерживаются: числа, переменные, + - * /, унарный минус,
+возведение в степень (^ или **, правоассоциативное), скобки.
+"""
+import hashlib
+import operator
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+COMPILE_CACHE_SIZE = 1024
+TEMPLATE_REGISTRY_SIZE = 4096
+
+TOKEN_RE = re.compile(r"""
+    (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<op>\*\*|[-+*/^])
+  | (?P<open>\()
+  | (?P<close>\))
+  | (?P<error>.)
+""", re.VERBOSE)
+
+NEG_OP = "neg"
+# Приоритет операторов; унарный минус слабее степени: -2^2 = -(2^2)
+PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2, NEG_OP: 3, "^": 4}
+RIGHT_ASSOCIATIVE = {"^", NEG_OP}
+
+BINARY_OPS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "^": operator.pow,
+}
+
+# Коды инструкций стековой машины
+CONST, LOAD, NEG, BINARY = range(4)
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+def normalize(text: str) -> str:
+    """Текст выражения без пробелов (в том числе %20 из URL) - ключ кеша"""
+    return "".join(text.replace("%20", " ").split())
+
+
+def _emit(code: list, op: str):
+    """Добавление оператора в байткод со сверткой констант"""
+    if op == NEG_OP:
+        if code and code[-1][0] == CONST:
+            code[-1] = (CONST, -code[-1][1])
+        else:
+            code.append((NEG, None))
+        return
+
+    func = BINARY_OPS[op]
+    if len(code) >= 2 and code[-1][0] == CONST and code[-2][0] == CONST:
+        try:
+            value = func(code[-2][1], code[-1][1])
+        except (ZeroDivisionError, OverflowError):
+            value = None  # ошибка проявится при вычислении
+        if isinstance(value, float):
+            code[-2:] = [(CONST, value)]
+            return
+    code.append((BINARY, func))
+
+
+def _compile(text: str):
+    """Сортировочная станция: токены -> байткод, без рекурсии (глубина скобок не ограничена)"""
+    code = []
+    variables = {}
+    operators = []
+    expect_operand = True
+
+    for match in TOKEN_RE.finditer(text):
+        kind = match.lastgroup
+        value = match.group()
+
+        if kind == "number" or kind == "name":
+            if not expect_operand:
+                raise ExpressionError(f"Пропущен оператор перед '{value}'")
+            if kind == "number":
+                code.append((CONST, float(value)))
+            else:
+                variables.setdefault(value, None)
+                code.append((LOAD, value))
+            expect_operand = False
+        elif kind == "op":
+            if value == "**":
+                value = "^"
+            if expect_operand:
+                if value == "-":
+                    operators.append(NEG_OP)
+                elif value != "+":  # унарный плюс ничего не меняет
+                    raise ExpressionError(f"Неожиданный оператор '{value}' в позиции {match.start()}")
+                continue
+            precedence = PRECEDENCE[value]
+            while operators and operators[-1] != "(":
+                top = PRECEDENCE[operators[-1]]
+                if top > precedence or (top == precedence and value not in RIGHT_ASSOCIATIVE):
+                    _emit(code, operators.pop())
+                else:
+                    break
+            operators.append(value)
+            expect_operand = True
+        elif kind == "open":
+            if not expect_operand:
+                raise ExpressionError(f"Пропущен оператор перед '(' в позиции {match.start()}")
+            operators.append("(")
+        elif kind == "close":
+            if expect_operand:
+                raise ExpressionError(f"Неожиданная ')' в позиции {match.start()}")
+            while operators and operators[-1] != "(":
+                _emit(code, operators.pop())
+            if not operators:
+                raise ExpressionError(f"Лишняя ')' в позиции {match.start()}")
+            operators.pop()
+        else:
+            raise ExpressionError(f"Неожиданный символ '{value}' в позиции {match.start()}")
+
+    if expect_operand:
+        raise ExpressionError("Неожиданный конец выражения")
+    while operators:
+        op = operators.pop()
+        if op == "(":
+            raise ExpressionError("Не закрыта скобка")
+        _emit(code, op)
+    return tuple(code), tuple(variables)
+
+
+class CompiledExpression:
+    """Скомпилированное выражение; переменные - в порядке первого появления"""
+    __slots__ = ("text", "code", "variables")
+
+    def __init__(self, text: str, code: tuple, variables: tuple):
+        self.text = text
+        self.code = code
+        self.variables = variables
+
+    def evaluate(self, values: dict = None):
+        """Вычисление на стековой машине. Подходит и для скаляров, и для массивов NumPy"""
+        if len(self.code) == 1 and self.code[0][0] == CONST:
+            return self.code[0][1]
+
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        for opcode, argument in self.code:
+            if opcode == CONST:
+                push(argument)
+            elif opcode == LOAD:
+                try:
+                    push(values[argument])
+                except (KeyError, TypeError):
+                    raise ExpressionError(f"Не задано значение переменной '{argument}'")
+            elif opcode == NEG:
+                push(-pop())
+            else:
+                right = pop()
+                push(argument(pop(), right))
+        return stack[0]
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _compile_normalized(text: str) -> CompiledExpression:
+    if not text:
+        raise ExpressionError("Пустое выражение")
+    code, variables = _compile(text)
+    return CompiledExpression(text, code, variables)
+
+
+def compile_expression(text: str) -> CompiledExpression:
+    """Компиляция выражения с кешем по нормализованному тексту"""
+    return _compile_normalized(normalize(text))
+
+
+class ExpressionRegistry:
+    """Зарегистрированные шаблоны выражений с вытеснением давно не использованных (LRU).
+
+    Идентификатор - хеш нормализованного текста, поэтому повторная регистрация
+    той же формулы возвращает тот же id.
+    """
+
+    def __init__(self, max_size: int = TEMPLATE_REGISTRY_SIZE):
+        self.max_size = max_size
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, text: str) -> tuple:
+        """Компиляция и сохранение шаблона; возвращает (id, скомпилированное выражение)"""
+        compiled = compile_expression(text)
+        template_id = hashlib.sha1(compiled.text.encode()).hexdigest()[:16]
+        with self._lock:
+            self._templates[template_id] = compiled
+            self._templates.move_to_end(template_id)
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+        return template_id, compiled
+
+    def get(self, template_id: str):
+        """Шаблон по id или None, если он не зарегистрирован или вытеснен"""
+        with self._lock:
+            compiled = self._templates.get(template_id)
+            if compiled is not None:
+                self._templates.move_to_end(template_id)
+        return compiled
+
+    def __len__(self):
+        return len(self._templates)
@@ -0,0 +1,228 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from calculator import app
+from expression_engine import ExpressionError, _compile_normalized, compile_expression
+from tracing import TraceRegistry, traced
+
+client = TestClient(app)
+
+
+class TestExpressionEngine:
+    """Тесты компилятора выражений"""
+
+    @pytest.mark.parametrize("text, expected", [
+        ("1+2*3", 7),
+        ("(1+2)*3", 9),
+        ("10-4-3", 3),
+        ("16/4/2", 2),
+        ("-2^2", -4),
+        ("2^3^2", 512),
+        ("2**3", 8),
+        ("-(-3)", 3),
+        ("+5", 5),
+        ("(1+5)* 6 + (4 - 6)/(8-3)", 35.6),
+    ])
+    def test_precedence(self, text, expected):
+        """Тест приоритета и ассоциативности операторов"""
+        # Act
+        result = compile_expression(text).evaluate()
+
+        # Assert
+        assert result == pytest.approx(expected)
+
+    def test_variables(self):
+        """Тест вычисления с переменными"""
+        # Arrange
+        compiled = compile_expression("a*b + a")
+
+        # Act
+        result = compiled.evaluate({"a": 2.0, "b": 3.0})
+
+        # Assert
+        assert compiled.variables == ("a", "b")
+        assert result == 8
+
+    @pytest.mark.parametrize("text", ["", "1+", "(1+2", "1+2)", "2(3)", "2*/3", "1 $ 2", "()"])
+    def test_syntax_errors(self, text):
+        """Тест ошибок разбора"""
+        # Act & Assert
+        with pytest.raises(ExpressionError):
+            compile_expression(text)
+
+    def test_missing_variable(self):
+        """Тест вычисления без значения переменной"""
+        # Act & Assert
+        with pytest.raises(ExpressionError):
+            compile_expression("a+1").evaluate({})
+
+    def test_cache_hits(self):
+        """Тест кеша: выражения с разными пробелами компилируются один раз"""
+        # Arrange
+        _compile_normalized.cache_clear()
+
+        # Act
+        first = compile_expression("1 + x * 2")
+        second = compile_expression("1+x*2")
+        third = compile_expression("1%20+%20x*2")
+        info = _compile_normalized.cache_info()
+
+        # Assert
+        assert first is second is third
+        assert info.misses == 1
+        assert info.hits == 2
+
+
+class TestComplication:
+    """Тесты вычисления выражения через API"""
+
+    def test_success(self):
+        """Тест успешного вычисления"""
+        # Act
+        response = client.get("/complication", params={"exp": "(1+5)* 6 + (4 - 6)/(8-3)"})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == pytest.approx(35.6)
+
+    @pytest.mark.parametrize("exp", ["1/0", "a*(1/0)", "0^-1", "1e308*10", "1e400", "1e308+1e308",
+                                     "10^400", "(-8)^0.5", "1+", "x"])
+    def test_errors_return_400(self, exp):
+        """Тест перевода ошибок вычисления в ответ 400"""
+        # Act
+        response = client.get("/complication", params={"exp": exp})
+
+        # Assert
+        assert response.status_code == 400
+        assert response.json()["detail"]
+
+
+class TestTemplates:
+    """Тесты зарегистрированных выражений"""
+
+    def test_register_and_evaluate(self):
+        """Тест регистрации шаблона и вычисления по id"""
+        # Arrange
+        created = client.post("/expressions", json={"expression": "a * b + 1"})
+        template_id = created.json()["id"]
+
+        # Act
+        response = client.get(f"/expressions/{template_id}", params={"a": 2, "b": 3})
+
+        # Assert
+        assert created.status_code == 201
+        assert created.json()["variables"] == ["a", "b"]
+        assert response.status_code == 200
+        assert response.json() == 7
+
+    def test_overflow_returns_400(self):
+        """Тест переполнения при вычислении шаблона"""
+        # Arrange
+        template_id = client.post("/expressions", json={"expression": "a * b"}).json()["id"]
+
+        # Act
+        response = client.get(f"/expressions/{template_id}", params={"a": 1e308, "b": 10})
+
+        # Assert
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("raw", ["nan", "inf", "-Infinity", "abc"])
+    def test_invalid_value_returns_400(self, raw):
+        """Тест значений переменных, которые не являются конечными числами"""
+        # Arrange
+        template_id = client.post("/expressions", json={"expression": "a + b"}).json()["id"]
+
+        # Act
+        response = client.get(f"/expressions/{template_id}", params={"a": raw, "b": 1})
+
+        # Assert
+        assert response.status_code == 400
+        assert "'a'" in response.json()["detail"]
+
+    def test_unknown_template(self):
+        """Тест вычисления незарегистрированного шаблона"""
+        # Act
+        response = client.get("/expressions/0000000000000000")
+
+        # Assert
+        assert response.status_code == 404
+
+
+class TestBatch:
+    """Тесты пакетного вычисления"""
+
+    @pytest.mark.parametrize("expression, bindings, expected", [
+        ("1/0", {}, [None]),
+        ("a*(1/0)", {"a": [1, 2]}, [None, None]),
+        ("0^-1", {}, [None]),
+        ("x^-1", {"x": [0, 2]}, [None, 0.5]),
+        ("x/y", {"x": [1, 6], "y": [0, 3]}, [None, 2.0]),
+    ])
+    def test_division_by_zero_per_item(self, expression, bindings, expected):
+        """Тест: деление на ноль, в том числе в константах, - ошибка элемента, а не всего пакета"""
+        # Act
+        response = client.post("/evaluate/batch", json={"expression": expression, "bindings": bindings})
+
+        # Assert
+        assert response.status_code == 200
+        data = response.json()
+        assert data["results"] == expected
+        assert [error["index"] for error in data["errors"]] == [i for i, value in enumerate(expected) if value is None]
+        assert all(error["error"] == "Деление на ноль" for error in data["errors"])
+
+    def test_not_finite_per_item(self):
+        """Тест: переполнение и комплексный результат отмечаются у элемента"""
+        # Act
+        response = client.post("/evaluate/batch", json={"expression": "x^0.5 * 1e308 * 10",
+                                                        "bindings": {"x": [-1, 1, 0]}})
+
+        # Assert
+        assert response.status_code == 200
+        data = response.json()
+        assert data["results"] == [None, None, 0.0]
+        assert [error["index"] for error in data["errors"]] == [0, 1]
+
+    def test_operations(self):
+        """Тест пакета троек (a, b, op)"""
+        # Act
+        response = client.post("/evaluate/batch", json={"operations": [
+            {"a": 1, "b": 2, "op": "+"}, {"a": 1, "b": 0, "op": "/"}, {"a": 3, "b": 4, "op": "*"},
+        ]})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {"results": [3.0, None, 12.0],
+                                   "errors": [{"index": 1, "error": "Деление на ноль"}]}
+
+
+class TestTracing:
+    """Тесты трассировки обработчиков"""
+
+    def test_traced_counts_calls_and_errors(self):
+        """Тест: вызовы и ошибки считаются у каждого вызова, время - у выборки"""
+        # Arrange
+        trace_registry = TraceRegistry()
+        evaluate = traced(lambda exp: compile_expression(exp).evaluate(), name="evaluate", enabled=True,
+                          sample_rate=0.5, trace_registry=trace_registry)
+
+        # Act
+        for exp in ["1+2", "2*3", "1+", "(1"]:
+            try:
+                evaluate(exp)
+            except ExpressionError:
+                pass
+        stats = trace_registry.snapshot()["evaluate"]
+
+        # Assert
+        assert stats["calls"] == 4
+        assert stats["errors"] == 2
+        assert stats["timed_calls"] == 2
+
+    def test_tracing_endpoint(self):
+        """Тест эндпоинта со статистикой трассировки"""
+        # Act
+        response = client.get("/tracing")
+
+        # Assert
+        assert response.status_code == 200
+        assert isinstance(response.json(), dict)
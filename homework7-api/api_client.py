@@ -0,0 +1,269 @@
+"""Общий HTTP-клиент для JSONPlaceholder и OpenWeatherMap.
+
+Один requests.Session на клиента: соединения переиспользуются (keep-alive,
+пул до POOL_SIZE соединений на хост). У каждого запроса есть таймауты на
+соединение и чтение. Сетевые ошибки и ответы 429/5xx повторяются с
+экспоненциальной задержкой и случайным разбросом (full jitter);
+Retry-After сервера учитывается. POST повторяется только при ошибке
+соединения, когда запрос точно не дошел до сервера.
+
+fan_out выполняет много запросов параллельно в пуле потоков - Session
+потокобезопасен для таких запросов, а пул соединений общий.
+
+stream_json_array разбирает JSON-массив из тела ответа по мере загрузки и
+отдает элементы генератором; после limit элементов соединение закрывается,
+и остаток ответа не скачивается.
+
+Адреса берутся из переменных окружения, поэтому клиент можно направить
+на локальный сервер-заглушку (stub_server.py).
+"""
+import codecs
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+JSONPLACEHOLDER_URL = os.getenv("JSONPLACEHOLDER_URL", "https://jsonplaceholder.typicode.com")
+WEATHER_URL = os.getenv("WEATHER_URL", "https://api.openweathermap.org/data/2.5")
+WEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY", "c90dd2133c5e351f59399392c958abdb")
+
+CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "10"))
+RETRIES = int(os.getenv("API_RETRIES", "3"))
+BACKOFF = 0.5
+BACKOFF_MAX = 10.0
+POOL_SIZE = 100
+MAX_WORKERS = 32
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+STREAM_CHUNK_SIZE = 64 * 1024
+WHITESPACE = " \t\n\r"
+# Символы, которыми может заканчиваться элемент массива
+ITEM_END = frozenset(WHITESPACE + ",]")
+
+
+class ApiError(Exception):
+    """Ответ сервера с кодом ошибки"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+def not_sent(error: requests.RequestException) -> bool:
+    """Ошибка до отправки запроса: соединение так и не установилось"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def iter_json_array(chunks, limit: int = None):
+    """Элементы JSON-массива из итератора кусков bytes, без загрузки массива целиком.
+
+    Каждый элемент разбирается json.JSONDecoder.raw_decode, как только он
+    полностью пришел; разобранная часть буфера отбрасывается.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def more() -> bool:
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            buffer = buffer[pos:] + utf8.decode(b"", final=True)
+        else:
+            buffer = buffer[pos:] + utf8.decode(chunk)
+        pos = 0
+        return True
+
+    def skip_whitespace() -> str:
+        """Следующий значимый символ (буфер дочитывается при необходимости); '' в конце потока"""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if not more():
+                return ""
+
+    if skip_whitespace() != "[":
+        raise json.JSONDecodeError("Ожидался JSON-массив", buffer, pos)
+    pos += 1
+    count = 0
+    first = True
+    while limit is None or count < limit:
+        char = skip_whitespace()
+        if char == "]":
+            return
+        if not first:
+            if char != ",":
+                raise json.JSONDecodeError("Ожидалась ',' или ']'", buffer, pos)
+            pos += 1
+            skip_whitespace()
+        first = False
+
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = None
+            # Число могло прийти не полностью: raw_decode примет и "1" из "1.5", и "1" из "1e3".
+            # Значение принимается, только если за ним уже виден разделитель
+            if end is not None and (eof or (end < len(buffer) and buffer[end] in ITEM_END)):
+                break
+            # Буфер растет хотя бы вдвое, чтобы большой элемент не разбирался заново на каждом куске
+            target = (len(buffer) - pos) * 2
+            while len(buffer) - pos < target and more():
+                pass
+        pos = end
+        count += 1
+        yield item
+
+
+class ApiClient:
+    def __init__(self, base_url: str, timeout: tuple = (CONNECT_TIMEOUT, READ_TIMEOUT), retries: int = RETRIES,
+                 backoff: float = BACKOFF, pool_size: int = POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        # Повторы делает сам клиент, у адаптера они выключены
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def _delay(self, attempt: int, response: requests.Response = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(BACKOFF_MAX, float(retry_after))
+        return random.uniform(0, min(BACKOFF_MAX, self.backoff * 2 ** attempt))
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Запрос с таймаутом и повторами; ответ возвращается как есть"""
+        method = method.upper()
+        kwargs.setdefault("timeout", self.timeout)
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        idempotent = method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # Неидемпотентный запрос безопасно повторить, только если он не дошел до сервера
+                if attempt >= self.retries or not (idempotent or not_sent(e)):
+                    raise
+                time.sleep(self._delay(attempt))
+            else:
+                if response.status_code not in RETRY_STATUSES or not idempotent or attempt >= self.retries:
+                    return response
+                delay = self._delay(attempt, response)
+                response.close()
+                time.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def json_or_error(response: requests.Response):
+        """Тело ответа; при коде ошибки - ApiError, даже если тело не JSON (HTML-страница прокси на 5xx)"""
+        if response.status_code >= 400:
+            try:
+                data = response.json()
+            except ValueError:
+                data = None
+            raise ApiError(response.status_code, data.get("message", response.reason) if isinstance(data, dict)
+                           else response.reason)
+        return response.json()
+
+    def get_json(self, path: str, params: dict = None):
+        return self.json_or_error(self.request("GET", path, params=params))
+
+    def stream_json_array(self, path: str, params: dict = None, limit: int = None,
+                          chunk_size: int = STREAM_CHUNK_SIZE):
+        """Генератор элементов JSON-массива из ответа; соединение закрывается после limit элементов"""
+        response = self.request("GET", path, params=params, stream=True)
+        try:
+            if response.status_code >= 400:
+                self.json_or_error(response)
+            yield from iter_json_array(response.iter_content(chunk_size), limit)
+        finally:
+            # Недочитанный ответ: соединение закрывается, а не возвращается в пул
+            response.close()
+
+    def fan_out(self, func, items, max_workers: int = MAX_WORKERS) -> list:
+        """[func(item)] параллельно в пуле потоков; вместо результата упавшего вызова - исключение"""
+        def call(item):
+            try:
+                return func(item)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(call, items))
+
+
+class JSONPlaceholderClient(ApiClient):
+    def __init__(self, base_url: str = JSONPLACEHOLDER_URL, **kwargs):
+        super().__init__(base_url, **kwargs)
+
+    def get_posts(self, limit: int = None, start: int = 0) -> list:
+        """Посты с сервера; limit и start передаются серверу (_limit, _start), а не режутся после загрузки"""
+        params = {}
+        if limit is not None:
+            params["_limit"] = limit
+        if start:
+            params["_start"] = start
+        return self.get_json("posts", params=params)
+
+    def iter_posts(self, limit: int = None, path: str = "posts"):
+        """Посты по одному по мере загрузки - для серверов, которые не умеют _limit"""
+        return self.stream_json_array(path, limit=limit)
+
+    def create_post(self, title: str, body: str, user_id: int) -> requests.Response:
+        return self.request("POST", "posts", json={"title": title, "body": body, "userId": user_id})
+
+
+class WeatherClient(ApiClient):
+    def __init__(self, base_url: str = WEATHER_URL, api_key: str = WEATHER_API_KEY, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.api_key = api_key
+
+    def weather_response(self, city: str, units: str = "metric", lang: str = "ru",
+                         headers: dict = None) -> requests.Response:
+        """Ответ как есть - для условных запросов (If-None-Match, 304)"""
+        return self.request("GET", "weather", headers=headers,
+                            params={"q": city, "appid": self.api_key, "units": units, "lang": lang})
+
+    def get_weather(self, city: str, units: str = "metric", lang: str = "ru") -> dict:
+        return self.json_or_error(self.weather_response(city, units, lang))
+
+    def get_weather_many(self, cities: list, max_workers: int = MAX_WORKERS, **kwargs) -> dict:
+        """{город: данные или исключение} - запросы идут параллельно"""
+        results = self.fan_out(lambda city: self.get_weather(city, **kwargs), cities, max_workers=max_workers)
+        return dict(zip(cities, results))
@@ -0,0 +1,72 @@
+"""Бенчмарк api_client против голых requests.get на локальной заглушке.
+
+1. Последовательные запросы: новое соединение на каждый requests.get
+   против пула соединений Session.
+2. Погода для 500 городов: по одному против fan_out в пуле потоков.
+3. Первые 5 постов: загрузка всех и срез [:5] против _limit на сервере.
+4. 10% ответов 503: доля успешных запросов с повторами и без.
+
+Запуск: python bench_api_client.py [задержка сервера, мс]
+"""
+import sys
+import time
+
+import requests
+
+from api_client import JSONPlaceholderClient, WeatherClient
+from stub_server import StubServer
+
+CITIES = 500
+
+
+def measure(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def main(latency_ms: float):
+    server = StubServer(latency=latency_ms / 1000).start()
+    url = server.url
+    weather = WeatherClient(url)
+    posts = JSONPlaceholderClient(url)
+    print(f"заглушка {url}, задержка ответа {latency_ms:.0f} мс")
+
+    count = 200
+    _, bare = measure(lambda: [requests.get(f"{url}/posts", params={"_limit": 1}) for _ in range(count)])
+    _, pooled = measure(lambda: [posts.get_posts(limit=1) for _ in range(count)])
+    print(f"\n{count} последовательных запросов")
+    print(f"{'requests.get (без пула)':<32} {bare / count * 1000:>8.2f} мс/запрос")
+    print(f"{'Session (пул соединений)':<32} {pooled / count * 1000:>8.2f} мс/запрос")
+
+    cities = [f"Город {i}" for i in range(CITIES)]
+    _, serial = measure(lambda: [weather.get_weather(city) for city in cities])
+    results, parallel = measure(lambda: weather.get_weather_many(cities))
+    assert not any(isinstance(value, Exception) for value in results.values())
+    print(f"\nпогода для {CITIES} городов")
+    print(f"{'по одному':<32} {serial:>8.2f} с")
+    print(f"{'get_weather_many (32 потока)':<32} {parallel:>8.2f} с")
+
+    full = requests.get(f"{url}/posts")
+    limited = requests.get(f"{url}/posts", params={"_limit": 5})
+    assert full.json()[:5] == limited.json()
+    print(f"\nпервые 5 постов: все посты и срез - {len(full.content)} байт, _limit=5 - {len(limited.content)} байт")
+
+    server.latency = 0
+    server.failure_rate = 0.1
+    attempts = 1000
+    no_retry = WeatherClient(url, retries=0)
+    with_retry = WeatherClient(url, backoff=0.001)
+    print(f"\n{attempts} запросов, 10% ответов 503")
+    for label, client in (("без повторов", no_retry), ("3 повтора с задержкой", with_retry)):
+        results = client.fan_out(lambda city: client.get_weather(city), cities * 2)
+        ok = sum(not isinstance(value, Exception) for value in results)
+        print(f"{label:<32} {ok / attempts * 100:>8.1f}% успешных")
+
+    for client in (weather, posts, no_retry, with_retry):
+        client.close()
+    server.stop()
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,73 @@
+"""Бенчмарк потокового разбора JSON-массива на локальной заглушке.
+
+Заглушка отдает /large - массив из N постов (~280 байт каждый).
+Сравниваются:
+    response.json() и срез [:5]            - прежний get_posts;
+    stream_json_array(limit=5)             - разбор до 5-го элемента и закрытие соединения;
+    stream_json_array без limit            - обход всех элементов по одному.
+Пиковая память - tracemalloc, объем - сколько байт сервер успел отправить.
+
+Запуск: python bench_streaming.py [число элементов]
+"""
+import sys
+import time
+import tracemalloc
+
+import requests
+
+from api_client import JSONPlaceholderClient
+from stub_server import StubServer
+
+
+def measure(server: StubServer, func) -> dict:
+    before = server.bytes_sent
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # Сервер досчитывает отправленное после закрытия соединения клиентом
+    time.sleep(0.2)
+    return {"result": result, "seconds": elapsed, "peak_mb": peak / 2 ** 20,
+            "sent_mb": (server.bytes_sent - before) / 2 ** 20}
+
+
+def main(count: int):
+    server = StubServer().start()
+    client = JSONPlaceholderClient(server.url)
+    params = {"count": count}
+
+    def full_then_slice():
+        return requests.get(f"{server.url}/large", params=params).json()[:5]
+
+    def stream_first():
+        return list(client.stream_json_array("large", params=params, limit=5))
+
+    def stream_all():
+        total = 0
+        for post in client.stream_json_array("large", params=params):
+            total += post["id"]
+        return total
+
+    cases = [
+        ("json() и срез [:5]", full_then_slice),
+        ("поток, первые 5", stream_first),
+        ("поток, все элементы", stream_all),
+    ]
+    print(f"массив из {count} элементов")
+    print(f"{'вариант':<24} {'время, с':>9} {'пик памяти, МБ':>15} {'передано, МБ':>13}")
+    results = []
+    for label, func in cases:
+        r = measure(server, func)
+        results.append(r["result"])
+        print(f"{label:<24} {r['seconds']:>9.2f} {r['peak_mb']:>15.1f} {r['sent_mb']:>13.1f}")
+    assert results[0] == results[1]
+    assert results[2] == count * (count + 1) // 2
+
+    client.close()
+    server.stop()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300_000)
@@ -0,0 +1,105 @@
+"""Бенчмарк кэша погоды на локальной заглушке с задержкой ответа.
+
+1. Поток запросов по 200 городам (популярные города спрашивают чаще):
+   без кэша, MemoryCache и SQLiteCache; погода на сервере меняется
+   каждые 2 с, TTL кэша 0.5 с - часть запросов идет с ETag и получает 304.
+2. 100 потоков одновременно спрашивают один город: сколько запросов
+   дошло до сервера.
+3. SQLiteCache после перезапуска клиента: запросы сразу из файла.
+
+Запуск: python bench_weather_cache.py [запросов] [задержка сервера, мс]
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from api_client import WeatherClient
+from stub_server import StubServer
+from weather_cache import CachedWeatherClient, MemoryCache, SQLiteCache
+
+CITIES = [f"Город {i}" for i in range(200)]
+
+
+def lookups(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    # Распределение Ципфа: первые города спрашивают много чаще остальных
+    weights = [1 / (rank + 1) for rank in range(len(CITIES))]
+    return rng.choices(CITIES, weights=weights, k=count)
+
+
+def run(server: StubServer, client, cities: list) -> dict:
+    before = server.requests
+    before_304 = server.not_modified
+    started = time.perf_counter()
+    for city in cities:
+        client.get_weather(city)
+    elapsed = time.perf_counter() - started
+    return {
+        "latency_ms": elapsed / len(cities) * 1000,
+        "upstream": server.requests - before,
+        "not_modified": server.not_modified - before_304,
+    }
+
+
+def main(count: int, latency_ms: float):
+    server = StubServer(latency=latency_ms / 1000, weather_period=2).start()
+    cities = lookups(count)
+    print(f"{count} запросов по {len(CITIES)} городам, задержка сервера {latency_ms:.0f} мс")
+    print(f"{'вариант':<20} {'мс/запрос':>10} {'к серверу':>10} {'из них 304':>11} {'попаданий':>10}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "weather.sqlite")
+        plain = WeatherClient(server.url)
+        cases = [
+            ("без кэша", plain, None),
+            ("MemoryCache", None, MemoryCache()),
+            ("SQLiteCache", None, SQLiteCache(db_path)),
+        ]
+        for label, client, backend in cases:
+            if backend is not None:
+                client = CachedWeatherClient(WeatherClient(server.url), backend, ttl=0.5)
+            result = run(server, client, cities)
+            ratio = f"{client.hit_ratio() * 100:.1f}%" if backend is not None else "-"
+            print(f"{label:<20} {result['latency_ms']:>10.2f} {result['upstream']:>10} "
+                  f"{result['not_modified']:>11} {ratio:>10}")
+
+        cached = CachedWeatherClient(WeatherClient(server.url), MemoryCache())
+        start = threading.Barrier(100)
+        before = server.requests
+
+        def worker():
+            start.wait()
+            cached.get_weather("Москва")
+
+        pool = [threading.Thread(target=worker) for _ in range(100)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        print(f"\n100 одновременных запросов одного города: к серверу {server.requests - before}, "
+              f"объединено {cached.stats['coalesced']}")
+
+        persistent_path = os.path.join(directory, "persistent.sqlite")
+        warm = list(dict.fromkeys(cities))[:50]
+        first = CachedWeatherClient(WeatherClient(server.url), SQLiteCache(persistent_path), ttl=600)
+        run(server, first, warm)
+        first.backend.close()
+        restarted = CachedWeatherClient(WeatherClient(server.url), SQLiteCache(persistent_path), ttl=600)
+        result = run(server, restarted, warm)
+        print(f"SQLiteCache после перезапуска, {len(warm)} городов: к серверу {result['upstream']} "
+              f"(304: {result['not_modified']}), {result['latency_ms']:.2f} мс/запрос")
+        for _, _, backend in cases:
+            if isinstance(backend, SQLiteCache):
+                backend.close()
+        restarted.backend.close()
+    server.stop()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 20,
+    )
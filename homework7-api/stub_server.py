@@ -0,0 +1,176 @@
+"""Локальная заглушка JSONPlaceholder и OpenWeatherMap для проверок и бенчмарков.
+
+    GET  /posts?_start=&_limit=      - посты (как json-server)
+    POST /posts                      - создание поста, 201
+    GET  /weather?q=&units=&lang=    - погода для города, 404 для "Nowhere";
+                                       ETag/Last-Modified, 304 на If-None-Match
+    GET  /large?count=               - большой JSON-массив постов, отдается по частям
+                                       (chunked), размер body - LARGE_BODY_SIZE
+
+Задержка ответа (latency) и доля ответов 503 (failure_rate) задаются при
+запуске, чтобы проверять пул соединений, параллельность и повторы.
+
+Запуск: python stub_server.py [порт]; затем, например,
+    JSONPLACEHOLDER_URL=http://127.0.0.1:8765 WEATHER_URL=http://127.0.0.1:8765 python task1_JSONPlaceholder.py
+"""
+import json
+import random
+import sys
+import threading
+import time
+import zlib
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+POSTS = [
+    {"userId": i // 10 + 1, "id": i + 1, "title": f"Заголовок {i + 1}", "body": f"Текст поста {i + 1}"}
+    for i in range(100)
+]
+LARGE_BODY_SIZE = 200
+LARGE_BATCH = 1000
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, как у настоящих серверов
+    # Заголовки и тело пишутся отдельно; без этого keep-alive упирается в задержку ACK (~40 мс)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, data, headers: dict = None):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_large(self, count: int):
+        """Массив генерируется на лету; сколько байт реально ушло клиенту - в server.bytes_sent"""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        body = "x" * LARGE_BODY_SIZE
+        sent = 0
+        try:
+            for start in range(0, count, LARGE_BATCH):
+                items = ",".join(
+                    json.dumps({"id": i + 1, "userId": i % 10 + 1, "title": f"Пост {i + 1}", "body": body},
+                               ensure_ascii=False)
+                    for i in range(start, min(count, start + LARGE_BATCH))
+                )
+                part = (("[" if start == 0 else ",") + items + ("]" if start + LARGE_BATCH >= count else ""))
+                data = part.encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                sent += len(data)
+            if count == 0:
+                self.wfile.write(b"2\r\n[]\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Клиент закрыл соединение, получив нужное
+            self.close_connection = True
+        finally:
+            with self.server.stats_lock:
+                self.server.bytes_sent += sent
+
+    def _prepare(self) -> bool:
+        server = self.server
+        with server.stats_lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+        if server.latency:
+            time.sleep(server.latency)
+        if server.failure_rate and random.random() < server.failure_rate:
+            self.send_json(503, {"message": "Service Unavailable"}, {"Retry-After": "0"})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._prepare():
+            return
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path == "/posts":
+            start = int(query.get("_start", 0))
+            limit = query.get("_limit")
+            self.send_json(200, POSTS[start:start + int(limit)] if limit is not None else POSTS[start:])
+        elif url.path == "/large":
+            self.send_large(int(query.get("count", 100_000)))
+        elif url.path.endswith("/weather"):
+            city = query.get("q", "")
+            if city == "Nowhere":
+                self.send_json(404, {"cod": "404", "message": "city not found"})
+                return
+            # Погода меняется раз в weather_period секунд; между сменами ETag тот же и ответ 304
+            version = int(time.time() // self.server.weather_period)
+            etag = f'"{version}-{zlib.crc32(city.encode())}"'
+            headers = {
+                "ETag": etag,
+                "Last-Modified": formatdate(version * self.server.weather_period, usegmt=True),
+            }
+            if self.headers.get("If-None-Match") == etag:
+                with self.server.stats_lock:
+                    self.server.not_modified += 1
+                self.send_response(304)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_json(200, {
+                "name": city,
+                "main": {"temp": round(zlib.crc32(f"{city}{version}".encode()) % 500 / 10 - 20, 1)},
+                "weather": [{"description": "ясно"}],
+            }, headers)
+        else:
+            self.send_json(404, {"message": "not found"})
+
+    def do_POST(self):
+        if not self._prepare():
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        data = json.loads(self.rfile.read(length) or b"{}")
+        if urlsplit(self.path).path != "/posts":
+            self.send_json(404, {"message": "not found"})
+            return
+        self.send_json(201, {**data, "id": len(POSTS) + 1})
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, port: int = 0, latency: float = 0.0, failure_rate: float = 0.0, weather_period: float = 600,
+                 handler=StubHandler):
+        super().__init__(("127.0.0.1", port), handler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.weather_period = weather_period
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self.connections = set()
+        self.stats_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "StubServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    server = StubServer(int(sys.argv[1]) if len(sys.argv) > 1 else 8765)
+    print(f"Заглушка на {server.url}")
+    server.serve_forever()
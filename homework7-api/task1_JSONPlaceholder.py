@@ -1,18 +1,27 @@
 import requests
 import json
 
-def get_posts():
+from api_client import ApiError, JSONPlaceholderClient
+
+
+def get_posts(client: JSONPlaceholderClient = None, limit: int = 5):
     try:
-        response = requests.get('https://jsonplaceholder.typicode.com/posts')
-        posts = response.json()
+        if client is None:
+            with JSONPlaceholderClient() as own_client:
+                posts = own_client.get_posts(limit=limit)
+        else:
+            posts = client.get_posts(limit=limit)
 
-        for i, post in enumerate(posts[:5], 1):
+        for i, post in enumerate(posts, 1):
             print(f"\nID: {post['id']}")
             print(f"Заголовок: {post['title']}")
             print(f"Текст: {post['body']}")
 
-        return posts[:5]
+        return posts
 
+    except ApiError as e:
+        print(f"Ошибка сервера: {e}")
+        return None
     except requests.exceptions.RequestException as e:
         print(f"Ошибка при выполнении запроса: {e}")
         return None
@@ -24,4 +33,4 @@ def get_posts():
         return None
 
 if __name__ == "__main__":
-    posts = get_posts()
\ No newline at end of file
+    posts = get_posts()
@@ -1,33 +1,31 @@
 import requests
 
-def get_weather():
-    api_key = "c90dd2133c5e351f59399392c958abdb"
-    city = input("Введите название города: ")
-
-    url = "https://api.openweathermap.org/data/2.5/weather"
-    params = {
-        'q': city,
-        'appid': api_key,
-        'units': 'metric',
-        'lang': 'ru'
-    }
+from api_client import ApiError
+from weather_cache import CachedWeatherClient
+
+# Повторный запрос того же города в пределах WEATHER_CACHE_TTL не идет в сеть
+weather = CachedWeatherClient()
+
+
+def get_weather(client=weather, city: str = None):
+    if city is None:
+        city = input("Введите название города: ")
 
     try:
-        response = requests.get(url, params=params)
-        data = response.json()
+        data = client.get_weather(city)
 
-        if response.status_code == 200:
-            temp = data['main']['temp']
-            description = data['weather'][0]['description']
+        temp = data['main']['temp']
+        description = data['weather'][0]['description']
 
-            print(f"Температура: {temp}°C")
-            print(f"Погода: {description}")
-        else:
-            print(f"Ошибка: {data.get('message', 'Неизвестная ошибка')}")
+        print(f"Температура: {temp}°C")
+        print(f"Погода: {description}")
+        return data
 
+    except ApiError as e:
+        print(f"Ошибка: {e.message}")
     except requests.exceptions.RequestException as e:
         print(f"Ошибка запроса: {e}")
 
 
 if __name__ == "__main__":
-    get_weather()
\ No newline at end of file
+    get_weather()
@@ -1,17 +1,21 @@
 import requests
 
+from api_client import JSONPlaceholderClient
 
-def create_post_with_error_handling():
-    url = "https://jsonplaceholder.typicode.com/posts"
 
+def create_post_with_error_handling(client: JSONPlaceholderClient = None):
     new_post = {
         'title': 'Заголовок',
         'body': 'Текст',
-        'userId': 1
+        'user_id': 1
     }
 
     try:
-        response = requests.post(url, json=new_post)
+        if client is None:
+            with JSONPlaceholderClient() as own_client:
+                response = own_client.create_post(**new_post)
+        else:
+            response = client.create_post(**new_post)
 
         if response.status_code == 201:
             data = response.json()
@@ -37,4 +41,4 @@ def create_post_with_error_handling():
 
 
 if __name__ == "__main__":
-    create_post_with_error_handling()
\ No newline at end of file
+    create_post_with_error_handling()
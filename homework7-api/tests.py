@@ -0,0 +1,427 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+import api_client
+from api_client import ApiClient, ApiError, JSONPlaceholderClient, WeatherClient, iter_json_array
+from stub_server import StubHandler, StubServer
+from weather_cache import CacheEntry, CachedWeatherClient, MemoryCache, SQLiteCache
+
+
+def split_every(data: bytes, size: int) -> list:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class FlakyHandler(StubHandler):
+    """Первые server.fail_first запросов получают 503 с HTML-страницей, как от балансировщика"""
+
+    def _prepare(self) -> bool:
+        if not super()._prepare():
+            return False
+        with self.server.stats_lock:
+            failing = self.server.requests <= self.server.fail_first
+        if not failing:
+            return True
+        body = b"<html><body><h1>503 Service Temporarily Unavailable</h1></body></html>"
+        self.send_response(503)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        if self.server.retry_after is not None:
+            self.send_header("Retry-After", self.server.retry_after)
+        self.end_headers()
+        self.wfile.write(body)
+        return False
+
+
+@pytest.fixture
+def flaky_server():
+    server = StubServer(handler=FlakyHandler)
+    server.fail_first = 0
+    server.retry_after = "0"
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Задержки между повторами записываются вместо ожидания"""
+    delays = []
+    monkeypatch.setattr(api_client.time, "sleep", delays.append)
+    return delays
+
+
+class TestIterJsonArray:
+    """Тесты потокового разбора JSON-массива"""
+
+    @pytest.mark.parametrize("chunks, expected", [
+        ([b"[1.", b"5, 2]"], [1.5, 2]),
+        ([b"[1e", b"3]"], [1000.0]),
+        ([b"[1", b"2, 3]"], [12, 3]),
+        ([b"[-", b"1]"], [-1]),
+        ([b"[1.5e", b"-", b"2 ]"], [0.015]),
+        ([b"[0, 1", b"0", b"0]"], [0, 100]),
+        ([b"[1.5]"], [1.5]),
+        ([b"[7", b"]"], [7]),
+    ])
+    def test_split_numbers(self, chunks, expected):
+        """Тест чисел, разрезанных между кусками"""
+        # Act
+        items = list(iter_json_array(chunks))
+
+        # Assert
+        assert items == expected
+
+    def test_any_split(self):
+        """Тест: результат не зависит от того, где разрезан поток"""
+        # Arrange
+        data = [1.25, -3e-2, "строка \"с кавычками\"", {"a": [1, 2, {"b": None}]}, True, False, None, 100]
+        body = json.dumps(data, ensure_ascii=False, indent=1).encode("utf-8")
+
+        # Act & Assert
+        for size in range(1, 12):
+            assert list(iter_json_array(split_every(body, size))) == data
+
+    def test_limit(self):
+        """Тест: после limit элементов остаток потока не читается"""
+        # Arrange
+        read = []
+
+        def chunks():
+            for chunk in (b"[1, ", b"2, ", b"3, ", b"4]"):
+                read.append(chunk)
+                yield chunk
+
+        # Act
+        items = list(iter_json_array(chunks(), limit=2))
+
+        # Assert
+        assert items == [1, 2]
+        assert len(read) < 4
+
+    def test_empty_array(self):
+        """Тест пустого массива"""
+        # Act & Assert
+        assert list(iter_json_array([b" [", b" ]"])) == []
+
+    @pytest.mark.parametrize("chunks", [[b"{}"], [b"[1 2]"], [b"[1,"], [b"[1.]"], [b""]])
+    def test_invalid(self, chunks):
+        """Тест ошибок разбора"""
+        # Act & Assert
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_json_array(chunks))
+
+
+class TestStreamJsonArray:
+    """Тесты потоковой загрузки с сервера-заглушки"""
+
+    def test_stream_with_limit(self):
+        """Тест: первые элементы большого массива без загрузки всего ответа"""
+        # Arrange
+        server = StubServer().start()
+        client = JSONPlaceholderClient(server.url)
+
+        # Act
+        items = list(client.stream_json_array("large", params={"count": 5000}, limit=5, chunk_size=1024))
+        client.close()
+        server.stop()
+
+        # Assert
+        assert [item["id"] for item in items] == [1, 2, 3, 4, 5]
+
+    def test_stream_all(self):
+        """Тест обхода всех элементов"""
+        # Arrange
+        server = StubServer().start()
+        client = JSONPlaceholderClient(server.url)
+
+        # Act
+        ids = [item["id"] for item in client.stream_json_array("large", params={"count": 2500}, chunk_size=777)]
+        client.close()
+        server.stop()
+
+        # Assert
+        assert ids == list(range(1, 2501))
+
+
+class TestApiClient:
+    """Тесты HTTP-клиента: повторы, задержки и разбор ошибок"""
+
+    def test_retry_until_success(self, flaky_server, sleeps):
+        """Тест: GET повторяется на 503, пока сервер не ответит"""
+        # Arrange
+        flaky_server.fail_first = 2
+        client = JSONPlaceholderClient(flaky_server.url, retries=3)
+
+        # Act
+        posts = client.get_posts(limit=2)
+        client.close()
+
+        # Assert
+        assert [post["id"] for post in posts] == [1, 2]
+        assert flaky_server.requests == 3
+        assert sleeps == [0.0, 0.0]
+
+    def test_backoff_with_jitter(self, flaky_server, sleeps):
+        """Тест: без Retry-After задержка случайная в пределах экспоненциально растущего окна"""
+        # Arrange
+        flaky_server.fail_first = 3
+        flaky_server.retry_after = None
+        client = JSONPlaceholderClient(flaky_server.url, retries=3, backoff=0.5)
+
+        # Act
+        client.get_posts(limit=1)
+        client.close()
+
+        # Assert
+        assert len(sleeps) == 3
+        assert all(0 <= delay <= 0.5 * 2 ** attempt for attempt, delay in enumerate(sleeps))
+
+    def test_retries_exhausted_html_body(self, flaky_server, sleeps):
+        """Тест: после последней попытки - ApiError с кодом, HTML-тело не ломает разбор"""
+        # Arrange
+        flaky_server.fail_first = 100
+        client = WeatherClient(flaky_server.url, retries=2)
+
+        # Act
+        with pytest.raises(ApiError) as error:
+            client.get_weather("Москва")
+        client.close()
+
+        # Assert
+        assert error.value.status == 503
+        assert error.value.message == "Service Unavailable"
+        assert flaky_server.requests == 3
+
+    def test_post_not_retried(self, flaky_server, sleeps):
+        """Тест: POST, дошедший до сервера, не повторяется"""
+        # Arrange
+        flaky_server.fail_first = 1
+        client = JSONPlaceholderClient(flaky_server.url, retries=3)
+
+        # Act
+        response = client.create_post("Заголовок", "Текст", 1)
+        client.close()
+
+        # Assert
+        assert response.status_code == 503
+        assert flaky_server.requests == 1
+        assert sleeps == []
+
+    def test_connection_error_retried(self, monkeypatch, sleeps):
+        """Тест: ошибка соединения повторяется и для POST, если запрос не был отправлен"""
+        # Arrange
+        client = JSONPlaceholderClient("http://127.0.0.1:1", retries=2)
+        calls = []
+        response = requests.Response()
+        response.status_code = 201
+
+        def request(method, url, **kwargs):
+            calls.append(method)
+            if len(calls) < 3:
+                raise requests.ConnectTimeout("connect timeout")
+            return response
+
+        monkeypatch.setattr(client.session, "request", request)
+
+        # Act
+        result = client.create_post("Заголовок", "Текст", 1)
+
+        # Assert
+        assert result is response
+        assert calls == ["POST"] * 3
+        assert len(sleeps) == 2
+
+    def test_json_error_message(self):
+        """Тест: сообщение об ошибке берется из JSON-тела"""
+        # Arrange
+        server = StubServer().start()
+        client = WeatherClient(server.url)
+
+        # Act
+        results = client.get_weather_many(["Москва", "Nowhere"])
+        client.close()
+        server.stop()
+
+        # Assert
+        assert results["Москва"]["name"] == "Москва"
+        assert isinstance(results["Nowhere"], ApiError)
+        assert (results["Nowhere"].status, results["Nowhere"].message) == (404, "city not found")
+
+    @pytest.mark.parametrize("status, body, message", [
+        (502, b"<html>Bad Gateway</html>", "Bad Gateway"),
+        (500, b"", "Internal Server Error"),
+        (400, b'["bad"]', "Bad Request"),
+    ])
+    def test_json_or_error_non_json(self, status, body, message):
+        """Тест: код ошибки проверяется до разбора тела"""
+        # Arrange
+        response = requests.Response()
+        response.status_code = status
+        response.reason = message
+        response._content = body
+
+        # Act & Assert
+        with pytest.raises(ApiError) as error:
+            ApiClient.json_or_error(response)
+        assert (error.value.status, error.value.message) == (status, message)
+
+
+@pytest.fixture
+def weather_server():
+    server = StubServer().start()
+    yield server
+    server.stop()
+
+
+def run_together(func, count: int) -> list:
+    """func() в count потоках, стартующих одновременно; результаты или исключения"""
+    barrier = threading.Barrier(count)
+
+    def call(_):
+        barrier.wait()
+        return func()
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        futures = [executor.submit(call, i) for i in range(count)]
+    return [future.exception() or future.result() for future in futures]
+
+
+class TestWeatherCache:
+    """Тесты кэша погоды: TTL, условные запросы и объединение запросов"""
+
+    def test_fresh_entry_served_from_cache(self, weather_server):
+        """Тест: пока запись свежая, сервер не запрашивается; ключ без учета регистра"""
+        # Arrange
+        cached = CachedWeatherClient(WeatherClient(weather_server.url), ttl=60)
+
+        # Act
+        first = cached.get_weather("Москва")
+        second = cached.get_weather("москва")
+        other_units = cached.get_weather("Москва", units="imperial")
+
+        # Assert
+        assert first == second == other_units
+        assert weather_server.requests == 2
+        assert cached.stats == {"hits": 1, "revalidated": 0, "misses": 2, "coalesced": 0}
+
+    def test_expired_entry_revalidated(self, weather_server):
+        """Тест: устаревшая запись проверяется по ETag, на 304 тело не пересылается"""
+        # Arrange
+        cached = CachedWeatherClient(WeatherClient(weather_server.url), ttl=60)
+        data = cached.get_weather("Казань")
+        entry = cached.backend.get(("казань", "metric", "ru"))
+        entry.expires_at = 0
+
+        # Act
+        revalidated = cached.get_weather("Казань")
+        fresh = cached.get_weather("Казань")
+
+        # Assert
+        assert revalidated == fresh == data
+        assert weather_server.requests == 2
+        assert weather_server.not_modified == 1
+        assert cached.stats["revalidated"] == 1 and cached.stats["hits"] == 1
+        assert cached.hit_ratio() == pytest.approx(2 / 3)
+
+    def test_changed_etag_refetched(self, weather_server):
+        """Тест: если ETag не совпал, запись заменяется новым ответом"""
+        # Arrange
+        cached = CachedWeatherClient(WeatherClient(weather_server.url), ttl=60)
+        key = ("сочи", "metric", "ru")
+        cached.get_weather("Сочи")
+        cached.backend.set(key, CacheEntry({"name": "старые данные"}, '"old"', None, 0))
+
+        # Act
+        data = cached.get_weather("Сочи")
+
+        # Assert
+        assert data["name"] == "Сочи"
+        assert weather_server.not_modified == 0
+        assert cached.stats["misses"] == 2
+        assert cached.backend.get(key).etag != '"old"'
+
+    def test_zero_ttl(self, weather_server):
+        """Тест: при ttl=0 каждый запрос идет на сервер, но тело приходит один раз"""
+        # Arrange
+        cached = CachedWeatherClient(WeatherClient(weather_server.url), ttl=0)
+
+        # Act
+        for _ in range(3):
+            cached.get_weather("Омск")
+
+        # Assert
+        assert weather_server.requests == 3
+        assert cached.stats["misses"] == 1 and cached.stats["revalidated"] == 2
+
+    def test_sqlite_backend_persists(self, weather_server, tmp_path):
+        """Тест: SQLite-кэш переживает перезапуск клиента"""
+        # Arrange
+        path = str(tmp_path / "weather.sqlite")
+        backend = SQLiteCache(path)
+        data = CachedWeatherClient(WeatherClient(weather_server.url), backend=backend, ttl=60).get_weather("Тула")
+        backend.close()
+
+        # Act
+        backend = SQLiteCache(path)
+        cached = CachedWeatherClient(WeatherClient(weather_server.url), backend=backend, ttl=60)
+        again = cached.get_weather("Тула")
+        backend.close()
+
+        # Assert
+        assert again == data
+        assert weather_server.requests == 1
+        assert cached.stats["hits"] == 1
+
+    def test_memory_cache_lru(self):
+        """Тест: при переполнении вытесняется давно не использованная запись"""
+        # Arrange
+        cache = MemoryCache(max_size=2)
+        cache.set("a", CacheEntry({"a": 1}))
+        cache.set("b", CacheEntry({"b": 2}))
+
+        # Act
+        cache.get("a")
+        cache.set("c", CacheEntry({"c": 3}))
+
+        # Assert
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a").data == {"a": 1}
+
+    def test_concurrent_lookups_coalesced(self):
+        """Тест: одновременные запросы одного города - один запрос к серверу"""
+        # Arrange
+        server = StubServer(latency=0.3).start()
+        cached = CachedWeatherClient(WeatherClient(server.url), ttl=60)
+
+        # Act
+        results = run_together(lambda: cached.get_weather("Пермь"), 8)
+        server.stop()
+
+        # Assert
+        assert all(result == results[0] for result in results)
+        assert server.requests == 1
+        assert cached.stats["misses"] == 1
+        assert cached.stats["coalesced"] + cached.stats["hits"] == 7
+        assert cached.stats["coalesced"] >= 1
+
+    def test_coalesced_error_not_cached(self):
+        """Тест: ошибка ведущего запроса получают все ожидающие, и она не кэшируется"""
+        # Arrange
+        server = StubServer(latency=0.3).start()
+        cached = CachedWeatherClient(WeatherClient(server.url), ttl=60)
+
+        # Act
+        results = run_together(lambda: cached.get_weather("Nowhere"), 4)
+        with pytest.raises(ApiError):
+            cached.get_weather("Nowhere")
+        server.stop()
+
+        # Assert
+        assert all(isinstance(result, ApiError) and result.status == 404 for result in results)
+        assert server.requests == 2
+        assert cached.stats["coalesced"] == 3
@@ -0,0 +1,180 @@
+"""Кэш ответов погоды: TTL, условные запросы и объединение одинаковых запросов.
+
+Ключ - (город, units, lang). Пока запись свежая (моложе ttl), ответ берется
+из кэша без сети. Устаревшая запись не выбрасывается: запрос уходит с
+If-None-Match / If-Modified-Since, и на 304 сервер не пересылает тело -
+запись просто продлевается.
+
+Если несколько потоков одновременно спрашивают один и тот же город, в сеть
+идет только первый, остальные ждут его результат (coalescing).
+
+Хранилища: MemoryCache (LRU в памяти) и SQLiteCache (файл, переживает
+перезапуск). Время в записях - time.time(), чтобы SQLite-кэш был корректен
+между процессами.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+from api_client import WeatherClient
+
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "10000"))
+WEATHER_CACHE_DB = os.getenv("WEATHER_CACHE_DB", "weather_cache.sqlite")
+
+
+@dataclass
+class CacheEntry:
+    data: dict
+    etag: str = None
+    last_modified: str = None
+    expires_at: float = 0.0
+
+
+class MemoryCache:
+    def __init__(self, max_size: int = WEATHER_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: tuple, entry: CacheEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """Кэш в файле SQLite; одно соединение на процесс под блокировкой"""
+
+    def __init__(self, path: str = WEATHER_CACHE_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS weather_cache ("
+            "key TEXT PRIMARY KEY, data TEXT NOT NULL, etag TEXT, last_modified TEXT, expires_at REAL NOT NULL)"
+        )
+
+    @staticmethod
+    def _key(key: tuple) -> str:
+        return json.dumps(key, ensure_ascii=False)
+
+    def get(self, key: tuple):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data, etag, last_modified, expires_at FROM weather_cache WHERE key = ?", (self._key(key),)
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(json.loads(row[0]), row[1], row[2], row[3])
+
+    def set(self, key: tuple, entry: CacheEntry):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO weather_cache (key, data, etag, last_modified, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self._key(key), json.dumps(entry.data, ensure_ascii=False), entry.etag, entry.last_modified,
+                 entry.expires_at),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM weather_cache").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+
+class CachedWeatherClient:
+    """get_weather с кэшем поверх WeatherClient"""
+
+    def __init__(self, client: WeatherClient = None, backend=None, ttl: float = WEATHER_CACHE_TTL):
+        self.client = client or WeatherClient()
+        self.backend = backend if backend is not None else MemoryCache()
+        self.ttl = ttl
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "coalesced": 0}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get_weather(self, city: str, units: str = "metric", lang: str = "ru") -> dict:
+        key = (city.casefold(), units, lang)
+        entry = self.backend.get(key)
+        if entry is not None and entry.expires_at > time.time():
+            self._count("hits")
+            return entry.data
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            data = self._fetch(key, city, units, lang, entry)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(data)
+            return data
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _fetch(self, key: tuple, city: str, units: str, lang: str, entry: CacheEntry) -> dict:
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        response = self.client.weather_response(city, units, lang, headers=headers)
+
+        if response.status_code == 304 and entry is not None:
+            self._count("revalidated")
+            entry.expires_at = time.time() + self.ttl
+            self.backend.set(key, entry)
+            return entry.data
+
+        self._count("misses")
+        data = self.client.json_or_error(response)
+        self.backend.set(key, CacheEntry(
+            data,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+            time.time() + self.ttl,
+        ))
+        return data
+
+    def hit_ratio(self) -> float:
+        """Доля ответов без загрузки тела (свежий кэш, 304 и объединенные запросы)"""
+        served = sum(self.stats.values())
+        return (served - self.stats["misses"]) / served if served else 0.0
+
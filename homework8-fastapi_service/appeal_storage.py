@@ -0,0 +1,400 @@
+"""Хранилище обращений: журнал JSONL из сегментов с одним писателем.
+
+Обработчики кладут записи в асинхронную очередь и ждут подтверждения.
+Фоновая задача забирает из очереди все накопившиеся записи, дописывает их
+в текущий сегмент и делает один fsync на всю пачку (group commit).
+Сегмент закрывается при достижении SEGMENT_MAX_BYTES, запись идет в следующий.
+
+Писатель у каталога один: на время работы он держит блокировку файла
+LOCK_NAME, и второй писатель (другой процесс, утилиты import и compact) не стартует.
+
+Вторичные индексы хранятся в памяти: ключ -> список адресов (сегмент, смещение,
+длина) записей. При старте они строятся одним проходом по журналу, поиск
+читает с диска только найденные записи.
+
+Запуск утилит:
+    python appeal_storage.py export appeals.json [--dir appeals]
+    python appeal_storage.py compact [--dir appeals]
+    python appeal_storage.py import [каталог с appeal_*.json] [--dir appeals]
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import uuid
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировка каталога не поддерживается
+    fcntl = None
+
+APPEALS_DIR = os.getenv("APPEALS_DIR", "appeals")
+SEGMENT_MAX_BYTES = int(os.getenv("APPEALS_SEGMENT_MAX_BYTES", str(64 * 1024 * 1024)))
+# Максимум записей в одной пачке group commit и размер очереди (обратное давление)
+MAX_BATCH = 1024
+QUEUE_SIZE = 10000
+SEGMENT_PREFIX = "segment_"
+SEGMENT_SUFFIX = ".jsonl"
+LOCK_NAME = ".writer.lock"
+
+
+class WriterActiveError(RuntimeError):
+    """Журнал уже открыт другим писателем"""
+
+
+def acquire_writer_lock(directory: str):
+    """Исключительная блокировка каталога журнала; снимается закрытием файла и при падении процесса"""
+    lock_file = open(os.path.join(directory, LOCK_NAME), "a")
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        raise WriterActiveError(f"Журнал {directory} уже открыт другим писателем")
+    return lock_file
+
+
+def segment_name(number: int) -> str:
+    return f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+
+
+def list_segments(directory: str) -> list:
+    """Имена сегментов в порядке записи"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+    )
+
+
+def iter_located_records(directory: str = APPEALS_DIR):
+    """Пары (адрес, запись) по порядку; адрес - (сегмент, смещение, длина).
+
+    Недописанная строка в конце сегмента (сбой во время записи) пропускается.
+    """
+    for name in list_segments(directory):
+        offset = 0
+        with open(os.path.join(directory, name), "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if record is not None:
+                    yield (name, offset, len(line)), record
+                offset += len(line)
+
+
+def iter_records(directory: str = APPEALS_DIR):
+    """Все записи журнала по порядку"""
+    for _, record in iter_located_records(directory):
+        yield record
+
+
+class AppealStorage:
+    """Асинхронный буферизованный писатель журнала обращений"""
+
+    def __init__(self, directory: str = APPEALS_DIR, segment_max_bytes: int = SEGMENT_MAX_BYTES,
+                 max_batch: int = MAX_BATCH, fsync: bool = True, indexes: dict = None):
+        """indexes - имя индекса -> функция, вычисляющая ключ по записи (None - не индексировать)"""
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self.index_keys = indexes or {}
+        self._indexes = {name: {} for name in self.index_keys}
+        self._queue = None
+        self._writer_task = None
+        self._file = None
+        self._lock_file = None
+        self._segment_number = 0
+
+    # Жизненный цикл
+
+    async def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock_file = acquire_writer_lock(self.directory)
+        try:
+            segments = list_segments(self.directory)
+            self._segment_number = int(segments[-1][len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]) if segments else 1
+            if self.index_keys:
+                await asyncio.to_thread(self._rebuild_indexes)
+            self._open_segment()
+        except BaseException:
+            self._unlock()
+            raise
+        self._queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._writer_task = asyncio.create_task(self._writer())
+
+    async def stop(self):
+        """Дописывает все, что уже в очереди, и закрывает сегмент"""
+        if self._writer_task is None:
+            return
+        await self._queue.put(None)
+        await self._writer_task
+        self._writer_task = None
+        self._file.close()
+        self._file = None
+        self._unlock()
+
+    def _unlock(self):
+        # Закрытие файла снимает flock
+        self._lock_file.close()
+        self._lock_file = None
+
+    # Запись
+
+    async def append(self, data: dict) -> dict:
+        """Сохранение обращения; возвращает запись после fsync"""
+        return (await self.append_many([data]))[0]
+
+    async def append_many(self, items: list) -> list:
+        """Сохранение нескольких обращений одной записью; возвращает записи после fsync"""
+        if not items:
+            return []
+        created_at = datetime.now().isoformat()
+        records = [{"id": uuid.uuid4().hex, "created_at": created_at, **data} for data in items]
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((records, future))
+        await future
+        return records
+
+    async def _writer(self):
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            batch = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.max_batch or self._queue.empty():
+                    break
+                item = self._queue.get_nowait()
+            stopping = item is None
+            if not batch:
+                continue
+
+            records = [record for records, _ in batch for record in records]
+            try:
+                locators = await asyncio.to_thread(self._write_batch, records)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                # Индексы меняются только в цикле событий, поэтому поиску не нужны блокировки
+                for record, locator in zip(records, locators):
+                    self._index(record, locator)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+
+    def _write_batch(self, records: list) -> list:
+        """Одна запись и один fsync на пачку; выполняется в потоке, чтобы не блокировать цикл событий.
+
+        Возвращает адреса записанных строк.
+        """
+        lines = [json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n" for record in records]
+        size = sum(len(line) for line in lines)
+        if self._file.tell() > 0 and self._file.tell() + size > self.segment_max_bytes:
+            self._file.close()
+            self._segment_number += 1
+            self._open_segment()
+
+        name = segment_name(self._segment_number)
+        offset = self._file.tell()
+        locators = []
+        for line in lines:
+            locators.append((name, offset, len(line)))
+            offset += len(line)
+        self._file.write(b"".join(lines))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        return locators
+
+    # Индексы и поиск
+
+    def _index(self, record: dict, locator: tuple):
+        for name, key_func in self.index_keys.items():
+            try:
+                key = key_func(record)
+            except (KeyError, TypeError, AttributeError):
+                continue
+            if key is not None:
+                self._indexes[name].setdefault(key, []).append(locator)
+
+    def _rebuild_indexes(self):
+        for index in self._indexes.values():
+            index.clear()
+        for locator, record in iter_located_records(self.directory):
+            self._index(record, locator)
+
+    def lookup(self, index: str, key) -> list:
+        """Адреса записей с данным ключом индекса - один поиск в словаре"""
+        return list(self._indexes[index].get(key, ()))
+
+    async def find(self, **criteria) -> list:
+        """Записи, подходящие под все условия вида индекс=ключ"""
+        if not criteria:
+            raise ValueError("Нужно хотя бы одно условие поиска")
+        matches = None
+        for index, key in criteria.items():
+            locators = self.lookup(index, key)
+            if matches is None:
+                matches = locators
+            else:
+                found = set(locators)
+                matches = [locator for locator in matches if locator in found]
+            if not matches:
+                return []
+        return await asyncio.to_thread(self._read_records, matches)
+
+    def _read_records(self, locators: list) -> list:
+        """Чтение записей по адресам: каждый сегмент открывается один раз"""
+        by_segment = {}
+        for position, (name, offset, length) in enumerate(locators):
+            by_segment.setdefault(name, []).append((position, offset, length))
+        records = [None] * len(locators)
+        for name, items in by_segment.items():
+            with open(os.path.join(self.directory, name), "rb") as f:
+                for position, offset, length in items:
+                    f.seek(offset)
+                    records[position] = json.loads(f.read(length))
+        return records
+
+    def _open_segment(self):
+        path = os.path.join(self.directory, segment_name(self._segment_number))
+        self._file = open(path, "ab")
+        self._file.seek(0, os.SEEK_END)
+        # Недописанная после сбоя строка завершается переводом строки, чтобы новые записи не склеились с ней
+        if self._file.tell() > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+            if torn:
+                self._file.write(b"\n")
+                self._file.flush()
+
+
+# Утилиты обслуживания
+
+
+def _close_synced(f):
+    f.flush()
+    os.fsync(f.fileno())
+    f.close()
+
+
+def export_appeals(output: str, directory: str = APPEALS_DIR) -> int:
+    """Выгрузка всех обращений одним JSON-массивом (потоково, без загрузки журнала в память)"""
+    count = 0
+    with open(output, "w", encoding="utf-8") as f:
+        f.write("[")
+        for record in iter_records(directory):
+            f.write(",\n" if count else "\n")
+            json.dump(record, f, ensure_ascii=False)
+            count += 1
+        f.write("\n]\n")
+    return count
+
+
+async def import_legacy_files(source_dir: str = ".", directory: str = APPEALS_DIR,
+                              batch_size: int = MAX_BATCH) -> int:
+    """Однократный перенос файлов appeal_*.json прежнего формата в журнал.
+
+    У записи сохраняется имя исходного файла (imported_from), поэтому повторный
+    запуск уже перенесенные файлы пропускает. Сами файлы не удаляются.
+    Пока сервис пишет в журнал, перенос отказывается (WriterActiveError).
+    """
+    storage = AppealStorage(directory)
+    # Блокировка берется до чтения журнала: список перенесенных файлов не устареет
+    await storage.start()
+    try:
+        imported = {record.get("imported_from") for record in iter_records(directory)}
+        paths = [
+            path for path in sorted(glob.glob(os.path.join(source_dir, "appeal_*.json")))
+            if os.path.basename(path) not in imported
+        ]
+        for start in range(0, len(paths), batch_size):
+            batch = []
+            for path in paths[start:start + batch_size]:
+                with open(path, encoding="utf-8") as f:
+                    batch.append({**json.load(f), "imported_from": os.path.basename(path)})
+            await storage.append_many(batch)
+    finally:
+        await storage.stop()
+    return len(paths)
+
+
+def compact_segments(directory: str = APPEALS_DIR, segment_max_bytes: int = SEGMENT_MAX_BYTES) -> int:
+    """Слияние мелких сегментов в полные, с отбрасыванием поврежденных строк.
+
+    Новые сегменты пишутся во временные файлы и подменяют старые только после
+    полной записи. Пока сервис пишет в журнал, слияние отказывается
+    (WriterActiveError): иначе оно подменило бы открытый писателем сегмент.
+    """
+    if not os.path.isdir(directory):
+        return 0
+    lock_file = acquire_writer_lock(directory)
+    try:
+        return _compact_locked(directory, segment_max_bytes)
+    finally:
+        lock_file.close()
+
+
+def _compact_locked(directory: str, segment_max_bytes: int) -> int:
+    old_segments = list_segments(directory)
+    if not old_segments:
+        return 0
+
+    new_paths = []
+    out = None
+    written = 0
+    for record in iter_records(directory):
+        line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+        if out is None or (written and written + len(line) > segment_max_bytes):
+            if out is not None:
+                _close_synced(out)
+            new_paths.append(os.path.join(directory, segment_name(len(new_paths) + 1) + ".tmp"))
+            out = open(new_paths[-1], "wb")
+            written = 0
+        out.write(line)
+        written += len(line)
+    if out is not None:
+        _close_synced(out)
+
+    # Сначала атомарная подмена, потом удаление лишних: при сбое записи могут задвоиться, но не пропасть
+    new_names = set()
+    for path in new_paths:
+        os.replace(path, path[:-len(".tmp")])
+        new_names.add(os.path.basename(path[:-len(".tmp")]))
+    for name in old_segments:
+        if name not in new_names:
+            os.remove(os.path.join(directory, name))
+    return len(new_paths)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Обслуживание журнала обращений")
+    parser.add_argument("--dir", default=APPEALS_DIR, help="каталог журнала")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="выгрузить обращения в JSON-файл")
+    export_parser.add_argument("output")
+    commands.add_parser("compact", help="слить сегменты журнала")
+    import_parser = commands.add_parser("import", help="перенести файлы appeal_*.json в журнал")
+    import_parser.add_argument("source", nargs="?", default=".")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "export":
+            print(f"Выгружено обращений: {export_appeals(args.output, args.dir)}")
+        elif args.command == "import":
+            print(f"Перенесено обращений: {asyncio.run(import_legacy_files(args.source, args.dir))}")
+        else:
+            print(f"Сегментов после слияния: {compact_segments(args.dir)}")
+    except WriterActiveError as e:
+        raise SystemExit(f"{e}: остановите сервис")
@@ -0,0 +1,198 @@
+"""Бенчмарки сервиса обращений.
+
+Запись: файл на каждое обращение против журнала с group commit.
+Валидация: прежние валидаторы (строковые шаблоны) против скомпилированных.
+Поиск: перебор файлов appeal_*.json против индексов журнала.
+
+Запуск: python bench_appeals.py [число обращений]
+"""
+import asyncio
+import glob
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter, field_validator
+
+from appeal_storage import AppealStorage
+from pydantic_swagger_service import APPEAL_INDEXES, SubscriberAppeal, normalize_phone, validate_appeals
+
+APPEAL = {
+    "last_name": "Иванов",
+    "first_name": "Иван",
+    "birth_date": "1990-01-01",
+    "phone_number": "+7 (999) 123-45-67",
+    "email": "ivanov@example.ru",
+}
+
+
+async def legacy_create(directory: str, index: int, fsync: bool):
+    """Прежний create_appeal: блокирующая запись нового файла прямо в обработчике"""
+    filename = os.path.join(
+        directory,
+        f"appeal_{APPEAL['last_name']}_{APPEAL['first_name']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{index}.json",
+    )
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(APPEAL, f, ensure_ascii=False, indent=2)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+async def bench_legacy(count: int, fsync: bool) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        await asyncio.gather(*(legacy_create(directory, i, fsync) for i in range(count)))
+        return time.perf_counter() - started
+
+
+async def bench_storage(count: int) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        storage = AppealStorage(directory)
+        await storage.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(storage.append(APPEAL) for _ in range(count)))
+        elapsed = time.perf_counter() - started
+        await storage.stop()
+        return elapsed
+
+
+class LegacyAppeal(BaseModel):
+    """Прежняя модель: re.match/re.sub со строковыми шаблонами на каждое поле"""
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    last_name: str
+    first_name: str
+    birth_date: date
+    phone_number: str
+    email: str
+
+    @field_validator('last_name', 'first_name')
+    @classmethod
+    def validate_name(cls, v: str) -> str:
+        v = v.strip()
+        if not v or not v[0].isupper():
+            raise ValueError('Должно начинаться с заглавной буквы')
+        if not re.match(r'^[А-Яа-яЁё\s-]+$', v):
+            raise ValueError('Должно содержать только кириллические символы')
+        return v
+
+    @field_validator('phone_number')
+    @classmethod
+    def validate_phone_number(cls, v: str) -> str:
+        cleaned = re.sub(r'[\s\(\)\-+]', '', v)
+        if not cleaned.isdigit():
+            raise ValueError('Номер телефона должен содержать только цифры')
+        if len(cleaned) < 10:
+            raise ValueError('Номер телефона слишком короткий')
+        return v
+
+    @field_validator('email')
+    @classmethod
+    def validate_email(cls, v: str) -> str:
+        if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', v):
+            raise ValueError('Неверный формат email')
+        return v
+
+
+def bench_validation(count: int = 10000):
+    """Стоимость валидации count обращений (каждое десятое невалидно)"""
+    items = [dict(APPEAL, email="bad" if i % 10 == 0 else f"user{i}@example.ru") for i in range(count)]
+    valid_items = [item for item in items if item["email"] != "bad"]
+    list_adapter = TypeAdapter(list[SubscriberAppeal])
+
+    def legacy():
+        for item in items:
+            try:
+                LegacyAppeal(**item)
+            except ValueError:
+                pass
+
+    def current():
+        for item in items:
+            try:
+                SubscriberAppeal(**item)
+            except ValueError:
+                pass
+
+    cases = [
+        ("прежние валидаторы, модель на запрос", legacy),
+        ("скомпилированные шаблоны, модель на запрос", current),
+        ("validate_appeals (TypeAdapter, ошибки по индексам)", lambda: validate_appeals(items)),
+        ("TypeAdapter(list), только валидные", lambda: list_adapter.validate_python(valid_items)),
+    ]
+    print(f"\nвалидация {count} обращений")
+    for label, func in cases:
+        func()
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        print(f"{label:<52} {elapsed * 1000:>8.1f} мс {elapsed / count * 1e6:>8.2f} мкс/шт")
+
+
+async def bench_lookup(count: int, lookups: int = 20):
+    """Поиск обращений по телефону среди count сохраненных"""
+    items = [dict(APPEAL, phone_number=f"+7 (999) {i:07d}") for i in range(count)]
+    phones = [items[i * (count // lookups)]["phone_number"] for i in range(lookups)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        for i, item in enumerate(items):
+            with open(os.path.join(directory, f"appeal_{i}.json"), "w", encoding="utf-8") as f:
+                json.dump(item, f, ensure_ascii=False, indent=2)
+
+        started = time.perf_counter()
+        for phone in phones:
+            wanted = normalize_phone(phone)
+            found = []
+            for path in glob.glob(os.path.join(directory, "appeal_*.json")):
+                with open(path, encoding="utf-8") as f:
+                    appeal = json.load(f)
+                if normalize_phone(appeal["phone_number"]) == wanted:
+                    found.append(appeal)
+            assert len(found) == 1
+        scan = (time.perf_counter() - started) / lookups
+
+    with tempfile.TemporaryDirectory() as directory:
+        storage = AppealStorage(directory, fsync=False, indexes=APPEAL_INDEXES)
+        await storage.start()
+        await storage.append_many(items)
+        await storage.stop()
+
+        storage = AppealStorage(directory, indexes=APPEAL_INDEXES)
+        started = time.perf_counter()
+        await storage.start()
+        rebuild = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for phone in phones:
+            assert len(await storage.find(phone=normalize_phone(phone))) == 1
+        indexed = (time.perf_counter() - started) / lookups
+        await storage.stop()
+
+    print(f"\nпоиск по телефону среди {count} обращений")
+    print(f"{'перебор файлов appeal_*.json':<32} {scan * 1000:>10.3f} мс/поиск")
+    print(f"{'индекс журнала':<32} {indexed * 1000:>10.3f} мс/поиск")
+    print(f"{'построение индексов при старте':<32} {rebuild * 1000:>10.1f} мс")
+
+
+async def main(count: int):
+    cases = [
+        ("файл на обращение, без fsync", bench_legacy(count, fsync=False)),
+        ("файл на обращение, fsync", bench_legacy(count, fsync=True)),
+        ("журнал, group commit + fsync", bench_storage(count)),
+    ]
+    print(f"{count} одновременных обращений")
+    for label, coroutine in cases:
+        elapsed = await coroutine
+        print(f"{label:<32} {elapsed * 1000:>10.1f} мс {count / elapsed:>12.0f} обращений/с")
+    await bench_lookup(count)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    asyncio.run(main(count))
+    bench_validation(count)
@@ -1,14 +1,53 @@
-from fastapi import FastAPI
-from pydantic import BaseModel, field_validator, ConfigDict
-from typing import List, Optional
-from datetime import date, datetime
-import json
+from contextlib import asynccontextmanager
+from fastapi import Body, FastAPI, HTTPException
+from pydantic import BaseModel, TypeAdapter, ValidationError, field_validator, ConfigDict
+from typing import Any, List, Optional
+from datetime import date
 import re
 
+from appeal_storage import AppealStorage
+from tracing import registry, traced
+
+# Шаблоны компилируются один раз при импорте, а не на каждое поле каждого запроса
+CYRILLIC_NAME_RE = re.compile(r'^[А-Яа-яЁё\s-]+$')
+PHONE_SEPARATORS_RE = re.compile(r'[\s\(\)\-+]')
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+
+def normalize_phone(phone: str) -> str:
+    """Только цифры номера: по ним проверяется телефон и строится индекс"""
+    return PHONE_SEPARATORS_RE.sub('', phone)
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+# Вторичные индексы журнала: имя -> ключ по сохраненной записи
+APPEAL_INDEXES = {
+    "id": lambda record: record["id"],
+    "phone": lambda record: normalize_phone(record["phone_number"]),
+    "email": lambda record: normalize_email(record["email"]),
+    "last_name": lambda record: record["last_name"],
+    "birth_date": lambda record: record["birth_date"],
+}
+
+storage = AppealStorage(indexes=APPEAL_INDEXES)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Фоновый писатель журнала живет столько же, сколько приложение
+    await storage.start()
+    yield
+    await storage.stop()
+
+
 app = FastAPI(
     title="Сервис обращений абонентов",
     description="API для сбора обращений абонентов",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 
@@ -27,7 +66,7 @@ class SubscriberAppeal(BaseModel):
         v = v.strip()
         if not v or not v[0].isupper():
             raise ValueError('Фамилия должна начинаться с заглавной буквы')
-        if not re.match(r'^[А-Яа-яЁё\s-]+$', v):
+        if not CYRILLIC_NAME_RE.match(v):
             raise ValueError('Фамилия должна содержать только кириллические символы')
         return v
 
@@ -37,14 +76,14 @@ class SubscriberAppeal(BaseModel):
         v = v.strip()
         if not v or not v[0].isupper():
             raise ValueError('Имя должно начинаться с заглавной буквы')
-        if not re.match(r'^[А-Яа-яЁё\s-]+$', v):
+        if not CYRILLIC_NAME_RE.match(v):
             raise ValueError('Имя должно содержать только кириллические символы')
         return v
 
     @field_validator('phone_number')
     @classmethod
     def validate_phone_number(cls, v: str) -> str:
-        cleaned = re.sub(r'[\s\(\)\-+]', '', v)
+        cleaned = normalize_phone(v)
         if not cleaned.isdigit():
             raise ValueError('Номер телефона должен содержать только цифры')
         if len(cleaned) < 10:
@@ -54,28 +93,87 @@ class SubscriberAppeal(BaseModel):
     @field_validator('email')
     @classmethod
     def validate_email(cls, v: str) -> str:
-        if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', v):
+        if not EMAIL_RE.match(v):
             raise ValueError('Неверный формат email')
         return v
 
 
 @app.post("/appeal/", summary="Создать обращение абонента")
+@traced
 async def create_appeal(appeal: SubscriberAppeal):
     appeal_data = appeal.model_dump()
     appeal_data['birth_date'] = appeal_data['birth_date'].isoformat()
 
-    filename = f"appeal_{appeal.last_name}_{appeal.first_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(appeal_data, f, ensure_ascii=False, indent=2)
+    # Запись в журнал через очередь; ответ уходит после fsync пачки с этим обращением
+    record = await storage.append(appeal_data)
 
     return {
         "message": "Обращение успешно создано",
-        "filename": filename,
+        "id": record["id"],
         "data": appeal_data
     }
 
 
+APPEAL_ADAPTER = TypeAdapter(SubscriberAppeal)
+MAX_BATCH_SIZE = 10000
+
+
+def validate_appeals(items: List[Any]):
+    """Валидация пачки: (валидные обращения, ошибки по индексам)"""
+    valid = []
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            valid.append(APPEAL_ADAPTER.validate_python(item))
+        except ValidationError as e:
+            errors.append({
+                "index": index,
+                "errors": e.errors(include_url=False, include_context=False, include_input=False),
+            })
+    return valid, errors
+
+
+@app.post("/appeals/batch", summary="Создать несколько обращений")
+@traced
+async def create_appeals_batch(items: List[Any] = Body(..., max_length=MAX_BATCH_SIZE)):
+    # Невалидные обращения (в том числе не объекты) не мешают сохранить остальные; валидные пишутся одной пачкой
+    valid, errors = validate_appeals(items)
+    records = await storage.append_many([appeal.model_dump(mode="json") for appeal in valid])
+    return {
+        "accepted": len(records),
+        "ids": [record["id"] for record in records],
+        "errors": errors
+    }
+
+
+@app.get("/appeals", summary="Найти обращения")
+@traced
+async def find_appeals(id: Optional[str] = None, phone: Optional[str] = None, email: Optional[str] = None,
+                       last_name: Optional[str] = None, birth_date: Optional[date] = None):
+    # Поиск по индексам: с диска читаются только найденные обращения
+    criteria = {}
+    if id is not None:
+        criteria["id"] = id.strip()
+    if phone is not None:
+        criteria["phone"] = normalize_phone(phone)
+    if email is not None:
+        criteria["email"] = normalize_email(email)
+    if last_name is not None:
+        criteria["last_name"] = last_name.strip()
+    if birth_date is not None:
+        # В журнале дата хранится строкой ISO, как ее сохраняет create_appeal
+        criteria["birth_date"] = birth_date.isoformat()
+    if not criteria:
+        raise HTTPException(status_code=400, detail="Укажите id, phone, email, last_name или birth_date")
+    return await storage.find(**criteria)
+
+
+@app.get("/tracing")
+async def tracing_stats():
+    """Статистика @traced в JSON (пусто, если TRACING_ENABLED не задан)"""
+    return registry.snapshot()
+
+
 if __name__ == "__main__":
     import uvicorn
     # посмотреть http://127.0.0.1:8000/docs
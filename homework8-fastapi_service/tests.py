@@ -0,0 +1,296 @@
+import asyncio
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import appeal_storage
+from appeal_storage import (AppealStorage, WriterActiveError, compact_segments, import_legacy_files, iter_records,
+                            list_segments)
+
+
+def appeal(i: int) -> dict:
+    return {"last_name": "Иванов", "first_name": "Петр", "birth_date": "1990-01-01",
+            "phone_number": f"+7 900 000-{i:04d}", "email": f"user{i}@example.ru"}
+
+
+@pytest.fixture
+def appeals_dir(tmp_path):
+    return str(tmp_path / "appeals")
+
+
+class TestAppealStorage:
+    """Тесты журнала обращений"""
+
+    def test_group_commit(self, appeals_dir, monkeypatch):
+        """Тест: одновременные обращения подтверждаются пачками, fsync меньше, чем записей"""
+        # Arrange
+        fsyncs = []
+        real_fsync = os.fsync
+        monkeypatch.setattr(appeal_storage.os, "fsync", lambda fd: (fsyncs.append(fd), real_fsync(fd)))
+
+        async def scenario():
+            storage = AppealStorage(appeals_dir)
+            await storage.start()
+            records = await asyncio.gather(*(storage.append(appeal(i)) for i in range(200)))
+            await storage.stop()
+            return records
+
+        # Act
+        records = asyncio.run(scenario())
+        stored = list(iter_records(appeals_dir))
+
+        # Assert
+        assert len({record["id"] for record in records}) == 200
+        assert [record["id"] for record in stored] == [record["id"] for record in records]
+        assert 1 <= len(fsyncs) < 200
+
+    def test_segment_rotation(self, appeals_dir):
+        """Тест: при достижении segment_max_bytes запись идет в новый сегмент"""
+        # Arrange
+        async def scenario():
+            storage = AppealStorage(appeals_dir, segment_max_bytes=2000, fsync=False)
+            await storage.start()
+            for i in range(50):
+                await storage.append(appeal(i))
+            await storage.stop()
+
+        # Act
+        asyncio.run(scenario())
+        segments = list_segments(appeals_dir)
+
+        # Assert
+        assert len(segments) > 1
+        assert all(os.path.getsize(os.path.join(appeals_dir, name)) <= 2000 for name in segments)
+        assert [record["email"] for record in iter_records(appeals_dir)] == [appeal(i)["email"] for i in range(50)]
+
+    def test_torn_line_recovery(self, appeals_dir):
+        """Тест: недописанная после сбоя строка пропускается и не склеивается с новой записью"""
+        # Arrange
+        async def write(items):
+            storage = AppealStorage(appeals_dir, fsync=False, indexes={"email": lambda record: record["email"]})
+            await storage.start()
+            records = await storage.append_many(items)
+            found = await storage.find(email=items[0]["email"])
+            await storage.stop()
+            return records, found
+
+        asyncio.run(write([appeal(1), appeal(2)]))
+        segment = os.path.join(appeals_dir, list_segments(appeals_dir)[-1])
+        with open(segment, "ab") as f:
+            f.write(b'{"id": "torn", "last_na')
+
+        # Act
+        _, found = asyncio.run(write([appeal(3)]))
+
+        # Assert
+        assert [record["email"] for record in iter_records(appeals_dir)] == [appeal(i)["email"] for i in (1, 2, 3)]
+        assert [record["email"] for record in found] == [appeal(3)["email"]]
+
+    def test_single_writer(self, appeals_dir, tmp_path):
+        """Тест: пока сервис пишет, второй писатель, перенос и слияние отказываются"""
+        # Arrange
+        (tmp_path / "appeal_1.json").write_text(json.dumps(appeal(1)), encoding="utf-8")
+
+        async def scenario():
+            storage = AppealStorage(appeals_dir, fsync=False)
+            await storage.start()
+            await storage.append(appeal(0))
+            errors = []
+            try:
+                await AppealStorage(appeals_dir).start()
+            except WriterActiveError as e:
+                errors.append(e)
+            try:
+                await import_legacy_files(str(tmp_path), appeals_dir)
+            except WriterActiveError as e:
+                errors.append(e)
+            try:
+                compact_segments(appeals_dir)
+            except WriterActiveError as e:
+                errors.append(e)
+            await storage.stop()
+            return errors
+
+        # Act
+        errors = asyncio.run(scenario())
+        compacted = compact_segments(appeals_dir)
+
+        # Assert
+        assert len(errors) == 3
+        assert compacted == 1
+        assert [record["email"] for record in iter_records(appeals_dir)] == [appeal(0)["email"]]
+
+    def test_compact_segments(self, appeals_dir):
+        """Тест: слияние мелких сегментов сохраняет все записи по порядку"""
+        # Arrange
+        async def scenario():
+            storage = AppealStorage(appeals_dir, segment_max_bytes=500, fsync=False)
+            await storage.start()
+            for i in range(20):
+                await storage.append(appeal(i))
+            await storage.stop()
+
+        asyncio.run(scenario())
+        before = list(iter_records(appeals_dir))
+
+        # Act
+        segments = compact_segments(appeals_dir, segment_max_bytes=64 * 1024)
+
+        # Assert
+        assert len(before) == 20
+        assert segments == 1
+        assert list_segments(appeals_dir) == [appeal_storage.segment_name(1)]
+        assert list(iter_records(appeals_dir)) == before
+
+
+@pytest.fixture
+def service(appeals_dir, monkeypatch):
+    """Сервис с журналом во временном каталоге"""
+    import pydantic_swagger_service as svc
+    monkeypatch.setattr(svc, "storage", AppealStorage(appeals_dir, fsync=False, indexes=svc.APPEAL_INDEXES))
+    return svc
+
+
+class TestAppealsBatch:
+    """Тесты пакетного приема обращений"""
+
+    def test_batch_accepted(self, service, appeals_dir):
+        """Тест: валидная пачка сохраняется целиком"""
+        # Arrange
+        items = [appeal(i) for i in range(3)]
+
+        # Act
+        with TestClient(service.app) as client:
+            response = client.post("/appeals/batch", json=items)
+
+        # Assert
+        assert response.status_code == 200
+        body = response.json()
+        assert body["accepted"] == 3 and body["errors"] == []
+        assert [record["id"] for record in iter_records(appeals_dir)] == body["ids"]
+
+    def test_per_item_errors(self, service):
+        """Тест: ошибки TypeAdapter возвращаются по индексам, не объекты тоже"""
+        # Arrange
+        bad = dict(appeal(1), last_name="ivanov")
+        items = [appeal(0), bad, "не обращение", dict(appeal(3), email="нет")]
+
+        # Act
+        with TestClient(service.app) as client:
+            response = client.post("/appeals/batch", json=items)
+
+        # Assert
+        body = response.json()
+        assert body["accepted"] == 1
+        assert [error["index"] for error in body["errors"]] == [1, 2, 3]
+        assert body["errors"][0]["errors"][0]["loc"] == ["last_name"]
+        assert body["errors"][1]["errors"][0]["type"] == "model_type"
+        assert body["errors"][2]["errors"][0]["loc"] == ["email"]
+
+    def test_bad_item_not_persisted(self, service, appeals_dir, monkeypatch):
+        """Тест: плохое обращение не попадает в журнал, валидные пишутся одной записью"""
+        # Arrange
+        writes = []
+        write_batch = AppealStorage._write_batch
+        monkeypatch.setattr(AppealStorage, "_write_batch",
+                            lambda self, records: (writes.append(len(records)), write_batch(self, records))[1])
+        items = [appeal(0), dict(appeal(1), phone_number="12"), appeal(2)]
+
+        # Act
+        with TestClient(service.app) as client:
+            response = client.post("/appeals/batch", json=items)
+
+        # Assert
+        assert response.json()["accepted"] == 2
+        assert writes == [2]
+        assert [record["email"] for record in iter_records(appeals_dir)] == [appeal(0)["email"], appeal(2)["email"]]
+
+    def test_all_invalid_nothing_written(self, service, appeals_dir):
+        """Тест: пачка без валидных обращений ничего не пишет"""
+        # Act
+        with TestClient(service.app) as client:
+            response = client.post("/appeals/batch", json=[{"email": "x"}, 42])
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["accepted"] == 0
+        assert list(iter_records(appeals_dir)) == []
+
+    def test_batch_size_limit(self, service, appeals_dir):
+        """Тест: пачка больше MAX_BATCH_SIZE отклоняется с 422 и не пишется"""
+        # Arrange
+        items = [appeal(i) for i in range(service.MAX_BATCH_SIZE + 1)]
+
+        # Act
+        with TestClient(service.app) as client:
+            response = client.post("/appeals/batch", json=items)
+
+        # Assert
+        assert response.status_code == 422
+        assert list(iter_records(appeals_dir)) == []
+
+
+class TestAppealLookup:
+    """Тесты поиска обращений по индексам"""
+
+    def test_lookup_by_id_email_date(self, service):
+        """Тест: поиск по id, email (без учета регистра) и дате рождения"""
+        # Arrange
+        items = [appeal(0), dict(appeal(1), birth_date="2001-02-03"), appeal(2)]
+
+        # Act
+        with TestClient(service.app) as client:
+            ids = client.post("/appeals/batch", json=items).json()["ids"]
+            by_id = client.get("/appeals", params={"id": ids[1]}).json()
+            by_email = client.get("/appeals", params={"email": " USER2@example.ru "}).json()
+            by_date = client.get("/appeals", params={"birth_date": "1990-01-01"}).json()
+            combined = client.get("/appeals", params={"birth_date": "1990-01-01", "email": "user0@example.ru"}).json()
+            bad_date = client.get("/appeals", params={"birth_date": "вчера"})
+            no_criteria = client.get("/appeals")
+
+        # Assert
+        assert [record["email"] for record in by_id] == [appeal(1)["email"]]
+        assert [record["id"] for record in by_email] == [ids[2]]
+        assert [record["id"] for record in by_date] == [ids[0], ids[2]]
+        assert [record["id"] for record in combined] == [ids[0]]
+        assert bad_date.status_code == 422
+        assert no_criteria.status_code == 400
+
+    def test_indexes_rebuilt_after_restart(self, service, appeals_dir, monkeypatch):
+        """Тест: после перезапуска индексы строятся заново по журналу"""
+        # Arrange
+        with TestClient(service.app) as client:
+            created = client.post("/appeal/", json=appeal(7)).json()
+        monkeypatch.setattr(service, "storage", AppealStorage(appeals_dir, fsync=False, indexes=service.APPEAL_INDEXES))
+
+        # Act
+        with TestClient(service.app) as client:
+            by_phone = client.get("/appeals", params={"phone": "+7 (900) 000 0007"}).json()
+            by_id = client.get("/appeals", params={"id": created["id"]}).json()
+
+        # Assert
+        assert [record["id"] for record in by_phone] == [created["id"]]
+        assert [record["email"] for record in by_id] == [appeal(7)["email"]]
+
+    def test_legacy_import_idempotent(self, service, appeals_dir, tmp_path):
+        """Тест: повторный перенос appeal_*.json не создает дублей"""
+        # Arrange
+        legacy = tmp_path / "legacy"
+        legacy.mkdir()
+        for i in range(3):
+            (legacy / f"appeal_{i}.json").write_text(json.dumps(appeal(i), ensure_ascii=False), encoding="utf-8")
+
+        # Act
+        first = asyncio.run(import_legacy_files(str(legacy), appeals_dir, batch_size=2))
+        (legacy / "appeal_3.json").write_text(json.dumps(appeal(3), ensure_ascii=False), encoding="utf-8")
+        second = asyncio.run(import_legacy_files(str(legacy), appeals_dir))
+        with TestClient(service.app) as client:
+            found = client.get("/appeals", params={"email": "user1@example.ru"}).json()
+
+        # Assert
+        assert (first, second) == (3, 1)
+        assert sorted(record["imported_from"] for record in iter_records(appeals_dir)) == \
+            [f"appeal_{i}.json" for i in range(4)]
+        assert [record["imported_from"] for record in found] == ["appeal_1.json"]